@@ -1 +1,33 @@
-from dsRenamingTool.mainDialog import Dialog
+import sys
+
+
+# UI pulls in pymel and Qt, it is only imported when Dialog is first used
+def _loadDialog():
+    from dsRenamingTool.mainDialog import Dialog
+    return Dialog
+
+
+def display():
+    """Show the main dialog, imports the UI on first call"""
+    return _loadDialog().display()
+
+
+if sys.version_info[:2] < (3, 7):
+    class _LazyDialog(object):
+        """Stands in for mainDialog.Dialog, no module __getattr__ before Python 3.7"""
+
+        def __call__(self, *args, **kwargs):
+            return _loadDialog()(*args, **kwargs)
+
+        def __getattr__(self, name):
+            return getattr(_loadDialog(), name)
+
+        def __repr__(self):
+            return "<lazy dsRenamingTool.mainDialog.Dialog>"
+
+    Dialog = _LazyDialog()
+else:
+    def __getattr__(name):
+        if name == "Dialog":
+            return _loadDialog()
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
@@ -0,0 +1,152 @@
+import json
+from dsRenamingTool import statsFn
+
+
+OPTION_VAR = "dsRenamingToolSuffixAliases"
+DEFAULT_SUFFIX_ALIASES = {
+    "transform": "GRP",
+    "joint": "JNT",
+    "mesh": "PLY",
+    "nurbsCurve": "CRV",
+    "nurbsSurface": "NURB",
+    "pointLight": "LGT",
+    "areaLight": "LGT",
+    "locator": "LOC",
+    "camera": "CAM",
+}
+
+
+_stats = statsFn.RenameStats.instance()
+
+
+class AliasStore(object):
+    """Suffix aliases parsed once and kept as a lookup table.
+
+    Aliases are only re-read when written through the store, every write bumps version.
+    Lookups fall back to the nearest aliased ancestor of the node type, results are memoized
+    until the next write.
+    """
+
+    _instance = None  # type: AliasStore
+
+    def __init__(self, aliases=None, optionVar=None):
+        """
+        :param aliases: Initial aliases, loaded from optionVar on first access if not given
+        :type aliases: dict, optional
+        :param optionVar: Maya optionVar to persist aliases in, None keeps them in memory only
+        :type optionVar: str, optional
+        """
+        self.optionVar = optionVar
+        self._aliases = dict(aliases) if aliases is not None else None
+        self._resolved = {}
+        self._version = 0
+
+    @classmethod
+    def instance(cls):
+        """Shared store backed by the tool optionVar
+
+        :rtype: AliasStore
+        """
+        if cls._instance is None:
+            cls._instance = cls(optionVar=OPTION_VAR)
+        return cls._instance
+
+    @property
+    def version(self):
+        return self._version
+
+    def aliases(self):
+        """Current aliases, must be treated as read only
+
+        :rtype: dict
+        """
+        if self._aliases is None:
+            self._aliases = self._read()
+        return self._aliases
+
+    def setAliases(self, aliasDict):
+        """Replace aliases and persist them, nothing is written if they didn't change
+
+        :param aliasDict: Node type to suffix map
+        :type aliasDict: dict
+        :return: True if aliases were changed
+        :rtype: bool
+        """
+        aliasDict = dict(aliasDict)
+        if aliasDict == self.aliases():
+            return False
+
+        self._aliases = aliasDict
+        self._write(aliasDict)
+        self._invalidate()
+        return True
+
+    def reload(self):
+        """Drop parsed aliases, for when optionVar was changed outside of the store."""
+        self._aliases = None
+        self._invalidate()
+
+    def lookup(self, nodeType, scene=None, default=None):
+        """Get suffix for node type, falling back to aliases of its ancestor types
+
+        :param nodeType: Node type name
+        :type nodeType: str
+        :param scene: Scene access used to get type inheritance, exact match only if not given
+        :type scene: sceneFn.SceneBase, optional
+        :param default: Returned if neither type nor any of its ancestors has an alias
+        :rtype: str
+        """
+        try:
+            suffix = self._resolved[nodeType]
+            _stats.count("aliasHits")
+        except KeyError:
+            _stats.count("aliasMisses")
+            suffix = self._resolve(nodeType, scene)
+            if scene is not None or suffix is not None:
+                self._resolved[nodeType] = suffix
+
+        return default if suffix is None else suffix
+
+    def __contains__(self, nodeType):
+        return nodeType in self.aliases()
+
+    def __getitem__(self, nodeType):
+        return self.aliases()[nodeType]
+
+    def _resolve(self, nodeType, scene):
+        aliases = self.aliases()
+        if nodeType in aliases:
+            return aliases[nodeType]
+        if scene is None:
+            return None
+
+        # Ancestry goes from root type down to the type itself
+        for ancestor in reversed(scene.typeAncestry(nodeType)):
+            if ancestor in aliases:
+                return aliases[ancestor]
+        return None
+
+    def _invalidate(self):
+        self._resolved = {}
+        self._version += 1
+
+    def _read(self):
+        if self.optionVar is None:
+            return dict(DEFAULT_SUFFIX_ALIASES)
+        try:
+            from maya import cmds
+        except ImportError:
+            return dict(DEFAULT_SUFFIX_ALIASES)
+
+        if not cmds.optionVar(exists=self.optionVar):
+            return dict(DEFAULT_SUFFIX_ALIASES)
+        return json.loads(cmds.optionVar(q=self.optionVar))
+
+    def _write(self, aliasDict):
+        if self.optionVar is None:
+            return
+        try:
+            from maya import cmds
+        except ImportError:
+            return
+        cmds.optionVar(sv=(self.optionVar, json.dumps(aliasDict, sort_keys=True)))
@@ -1,28 +1,17 @@
-import pymel.core as pm
 import json
 from PySide2 import QtWidgets, QtCore
+from dsRenamingTool import aliasFn
 from dsRenamingTool import dialogBase
 from dsRenamingTool.loggingFn import Logger
 
 
 class AliasDialog(dialogBase._modalDialog):
 
-    DEFAULT_SUFFIX_ALIASES = {
-        "transform": "GRP",
-        "joint": "JNT",
-        "mesh": "PLY",
-        "nurbsCurve": "CRV",
-        "nurbsSurface": "NURB",
-        "pointLight": "LGT",
-        "areaLight": "LGT",
-        "joint": "JNT",
-        "locator": "LOC",
-        "camera": "CAM",
-    }
+    DEFAULT_SUFFIX_ALIASES = aliasFn.DEFAULT_SUFFIX_ALIASES
 
     @classmethod
     def checkOptionVar(cls):
-        pm.optionVar.get("dsRenamingToolSuffixAliases", json.dumps(cls.DEFAULT_SUFFIX_ALIASES, sort_keys=True))
+        aliasFn.AliasStore.instance().aliases()
 
     def __init__(self, parent=None, title="Edit aliases"):
         super(AliasDialog, self).__init__(parent=parent)
@@ -58,11 +47,18 @@ class AliasDialog(dialogBase._modalDialog):
 
     def createWidgets(self):
         # Table
+        self.aliasModel = AliasModel(self)
+        self.proxyModel = QtCore.QSortFilterProxyModel(self)
+        self.proxyModel.setSourceModel(self.aliasModel)
+        self.proxyModel.setFilterKeyColumn(-1)
+        self.proxyModel.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
         self.aliasesTable = AliasTable()
-        self.aliasesTable.setColumnCount(2)
-        self.aliasesTable.setHorizontalHeaderLabels(["Object type", "Suffix"])
+        self.aliasesTable.setModel(self.proxyModel)
         tableHeaderView = self.aliasesTable.horizontalHeader()
         tableHeaderView.setSectionResizeMode(1, QtWidgets.QHeaderView.Stretch)
+        self.filterLineEdit = QtWidgets.QLineEdit()
+        self.filterLineEdit.setPlaceholderText("Filter")
+        self.filterLineEdit.setClearButtonEnabled(True)
 
         # Dialog buttons
         self.confirmButton = QtWidgets.QPushButton("Confirm")
@@ -74,6 +70,7 @@ class AliasDialog(dialogBase._modalDialog):
 
         # Table layout
         tableLayout = QtWidgets.QVBoxLayout()
+        tableLayout.addWidget(self.filterLineEdit)
         tableLayout.addWidget(self.aliasesTable)
 
         # Buttons layout
@@ -90,53 +87,42 @@ class AliasDialog(dialogBase._modalDialog):
         # Buttons
         self.confirmButton.clicked.connect(self.confirmAndClose)
         self.cancelButton.clicked.connect(self.close)
+        self.filterLineEdit.textChanged.connect(self.proxyModel.setFilterFixedString)
 
         # MenuBar
         # File menu
         self.exportAliasesAction.triggered.connect(self.exportAliases)
         self.importAliasesAction.triggered.connect(self.importAliases)
 
-        self.addAliasesAction.triggered.connect(self.aliasesTable.addNewEntry)
+        self.addAliasesAction.triggered.connect(self.addNewEntry)
+        self.aliasesTable.addAliasAction.triggered.connect(self.addNewEntry)
         self.deleteAliasAction.triggered.connect(self.aliasesTable.deleteSelectedRow)
         self.resetAliasesAction.triggered.connect(self.resetToDefault)
 
     def updateAliasTable(self):
-        self.aliasesTable.setRowCount(0)
-        self.suffixAliases = json.loads(pm.optionVar.get("dsRenamingToolSuffixAliases", json.dumps(self.DEFAULT_SUFFIX_ALIASES, sort_keys=True)))
-        for i, k in enumerate(self.suffixAliases.keys()):
-            self.aliasesTable.insertRow(i)
-            self.insertItem(i, 0, text=k)
-            self.insertItem(i, 1, text=self.suffixAliases[k])
-
-    def insertItem(self, row, column, text=""):
-        item = QtWidgets.QTableWidgetItem(text)
-        self.aliasesTable.setItem(row, column, item)
-
-        return item
+        self.suffixAliases = aliasFn.AliasStore.instance().aliases()
+        self.aliasModel.setAliases(self.suffixAliases)
 
     def getAliasTableData(self):
-        newAliasDict = {}
-        for row in range(0, self.aliasesTable.rowCount()):
-            objType = self.aliasesTable.model().index(row, 0).data()
-            suffix = self.aliasesTable.model().index(row, 1).data()
-            if objType:
-                newAliasDict[str(objType)] = str(suffix)
-
-        return newAliasDict
+        return self.aliasModel.aliases()
 
     def loadFromDict(self, aliasDict):
-        self.aliasesTable.setRowCount(0)
-        for i, k in enumerate(aliasDict.keys()):
-            self.aliasesTable.insertRow(i)
-            self.insertItem(i, 0, text=k)
-            self.insertItem(i, 1, text=aliasDict[k])
+        self.aliasModel.setAliases(aliasDict)
+
+    @QtCore.Slot()
+    def addNewEntry(self):
+        # New row is empty, a filter would hide it right away
+        self.filterLineEdit.clear()
+        row = self.aliasModel.addEntry()
+        index = self.proxyModel.mapFromSource(self.aliasModel.index(row, 0))
+        self.aliasesTable.scrollTo(index)
+        self.aliasesTable.edit(index)
 
     # Slots
     @QtCore.Slot()
     def saveAliases(self):
         self.suffixAliases = self.getAliasTableData()
-        aliasString = json.dumps(self.suffixAliases, sort_keys=True)
-        pm.optionVar["dsRenamingToolSuffixAliases"] = aliasString
+        aliasFn.AliasStore.instance().setAliases(self.suffixAliases)
 
     @QtCore.Slot()
     def confirmAndClose(self):
@@ -183,12 +169,107 @@ class AliasDialog(dialogBase._modalDialog):
         self.checkOptionVar()
 
 
-class AliasTable(QtWidgets.QTableWidget):
-    def __init__(self, rows=0, columns=0, parent=None):
-        super(AliasTable, self).__init__(rows, columns, parent)
+class AliasModel(QtCore.QAbstractTableModel):
+    """Node type -> suffix rows, whole alias sets are loaded with a single model reset."""
+
+    HEADERS = ("Object type", "Suffix")
+
+    def __init__(self, parent=None):
+        super(AliasModel, self).__init__(parent)
+        self._rows = []
+
+    def setAliases(self, aliasDict):
+        self.beginResetModel()
+        self._rows = [[str(nodeType), str(suffix)] for nodeType, suffix in sorted(aliasDict.items())]
+        self.endResetModel()
+
+    def aliases(self):
+        """Aliases of rows with a type set
+
+        :rtype: dict
+        """
+        return dict((nodeType, suffix) for nodeType, suffix in self._rows if nodeType)
+
+    def addEntry(self):
+        """Append empty row
+
+        :return: Row index
+        :rtype: int
+        """
+        row = len(self._rows)
+        self.insertRows(row, 1)
+        return row
+
+    def removeRowSet(self, rows):
+        """Remove rows in contiguous ranges, from the bottom so indices of remaining ranges don't shift
+
+        :param rows: Row indices
+        :type rows: iterable[int]
+        """
+        ranges = []
+        for row in sorted(set(rows), reverse=True):
+            if ranges and ranges[-1][0] == row + 1:
+                ranges[-1][0] = row
+            else:
+                ranges.append([row, row])
+        for first, last in ranges:
+            self.removeRows(first, last - first + 1)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEditable
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role not in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return None
+        return self._rows[index.row()][index.column()]
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+        self._rows[index.row()][index.column()] = str(value).strip()
+        self.dataChanged.emit(index, index)
+        return True
+
+    def insertRows(self, row, count, parent=QtCore.QModelIndex()):
+        self.beginInsertRows(parent, row, row + count - 1)
+        self._rows[row:row] = [["", ""] for _ in range(count)]
+        self.endInsertRows()
+        return True
+
+    def removeRows(self, row, count, parent=QtCore.QModelIndex()):
+        if count < 1 or row < 0 or row + count > len(self._rows):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        del self._rows[row:row + count]
+        self.endRemoveRows()
+        return True
+
+
+class AliasTable(QtWidgets.QTableView):
+    def __init__(self, parent=None):
+        super(AliasTable, self).__init__(parent)
 
         self.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.showContextMenu)
+        self.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
 
         self.createActions()
         self.createConnections()
@@ -198,16 +279,12 @@ class AliasTable(QtWidgets.QTableWidget):
         self.deleteAliasAction = QtWidgets.QAction("Delete alias", self)
 
     def createConnections(self):
-        self.addAliasAction.triggered.connect(self.addNewEntry)
         self.deleteAliasAction.triggered.connect(self.deleteSelectedRow)
 
-    def addNewEntry(self):
-        newIndex = self.rowCount()
-        self.insertRow(newIndex)
-
     def deleteSelectedRow(self):
-        for each in self.selectedItems():
-            self.removeRow(each.row())
+        proxyModel = self.model()
+        rows = [proxyModel.mapToSource(index).row() for index in self.selectionModel().selectedRows()]
+        proxyModel.sourceModel().removeRowSet(rows)
 
     def showContextMenu(self, point):
         contextMenu = QtWidgets.QMenu()
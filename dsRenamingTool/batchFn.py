@@ -0,0 +1,319 @@
+"""Compact column storage of rename batches.
+
+A batch of a million nodes kept as PlanEntry objects costs an object per node on top of its
+names. RenameBatch keeps one column per field instead: integer node handles and ids of interned
+values in arrays, names in plain lists. New names are the same string objects the name index
+claimed, so the batch doesn't duplicate them. PlanEntry records are only created on access.
+"""
+import array
+
+
+class PlanEntry(object):
+    """Single planned rename of a batch, reason tells which rule produced the new name."""
+
+    __slots__ = ("node", "oldName", "newName", "reason", "scope")
+
+    PATTERN = "pattern"
+    REWRITE = "rewrite"
+    COLLISION = "collision"
+
+    def __init__(self, node, oldName, newName, reason=None, scope=None):
+        """
+        :param scope: Uniqueness scope key of the names, see indexFn.ScopedNameIndex. None is global
+        """
+        self.node = node
+        self.oldName = oldName
+        self.newName = newName
+        self.reason = reason
+        self.scope = scope
+
+    def __repr__(self):
+        return "PlanEntry({0!r} -> {1!r})".format(self.oldName, self.newName)
+
+
+class InternPool(object):
+    """Interned hashable values, e.g. suffixes or node types, numbered in order of first use."""
+
+    __slots__ = ("values", "_ids")
+
+    def __init__(self, values=()):
+        self.values = []
+        self._ids = {}
+        for value in values:
+            self.id(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, valueId):
+        return self.values[valueId]
+
+    def id(self, value):
+        try:
+            return self._ids[value]
+        except KeyError:
+            valueId = self._ids[value] = len(self.values)
+            self.values.append(value)
+            return valueId
+
+    def ids(self, values, typecode="H"):
+        """Intern many values at once
+
+        :rtype: array.array
+        """
+        ids = self._ids
+        column = array.array(typecode)
+        append = column.append
+        for value in values:
+            try:
+                append(ids[value])
+            except KeyError:
+                append(self.id(value))
+        return column
+
+
+def nodeColumn(nodes):
+    """Integer node handles go in an array, any other handles in a list
+
+    :rtype: array.array or list
+    """
+    nodes = nodes if isinstance(nodes, (list, array.array)) else list(nodes)
+    if isinstance(nodes, list) and all(type(node) is int for node in nodes):
+        try:
+            return array.array("l", nodes)
+        except OverflowError:
+            pass
+    return nodes
+
+
+class RenameBatch(object):
+    """Plan of a rename batch in columns, a sequence of PlanEntry records.
+
+    Entries are created on access, changing them doesn't change the batch. Columns are filled
+    with append() or set whole, reasons and scope keys are interned. Scope column is only
+    created once a scoped entry is added.
+    """
+
+    __slots__ = ("nodes", "oldNames", "newNames", "reasonIds", "reasons", "scopeIds", "scopes")
+
+    REASONS = (None, PlanEntry.PATTERN, PlanEntry.REWRITE, PlanEntry.COLLISION)
+
+    def __init__(self, nodes=None, oldNames=None):
+        """
+        :param nodes: Batch nodes, planned by appending entries if not given
+        :type nodes: list, optional
+        :param oldNames: Current names of nodes
+        :type oldNames: list, optional
+        """
+        self.nodes = nodeColumn(nodes) if nodes is not None else []
+        self.oldNames = list(oldNames) if oldNames is not None else []
+        self.newNames = []
+        self.reasonIds = array.array("B")
+        self.reasons = InternPool(self.REASONS)
+        self.scopeIds = None
+        self.scopes = InternPool([None])
+
+    @classmethod
+    def fromEntries(cls, entries):
+        """
+        :param entries: Plan entries
+        :type entries: iterable[PlanEntry]
+        :rtype: RenameBatch
+        """
+        batch = cls()
+        for entry in entries:
+            batch.append(entry.node, entry.oldName, entry.newName, entry.reason, entry.scope)
+        batch.nodes = nodeColumn(batch.nodes)
+        return batch
+
+    def __len__(self):
+        return len(self.newNames)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self.entry(each) for each in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        return self.entry(position)
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self.entry(position)
+
+    def __repr__(self):
+        return "RenameBatch({0} entries)".format(len(self))
+
+    def entry(self, position):
+        """
+        :rtype: PlanEntry
+        """
+        return PlanEntry(self.nodes[position], self.oldNames[position], self.newNames[position], self.reason(position), self.scope(position))
+
+    def reason(self, position):
+        return self.reasons[self.reasonIds[position]]
+
+    def scope(self, position):
+        if self.scopeIds is None:
+            return None
+        return self.scopes[self.scopeIds[position]]
+
+    @property
+    def scoped(self):
+        return self.scopeIds is not None
+
+    def append(self, node, oldName, newName, reason=None, scope=None):
+        """Add planned entry, node and old name are only added if the batch doesn't have them yet"""
+        position = len(self.newNames)
+        if position == len(self.nodes):
+            self.nodes.append(node)
+        if position == len(self.oldNames):
+            self.oldNames.append(oldName)
+        self.newNames.append(newName)
+        self.reasonIds.append(self.reasons.id(reason))
+        if scope is not None and self.scopeIds is None:
+            self.scopeIds = array.array("l", [0] * position)
+        if self.scopeIds is not None:
+            self.scopeIds.append(self.scopes.id(scope))
+
+    def setNewNames(self, newNames, reason=None):
+        """Set planned names of all nodes at once"""
+        self.newNames = list(newNames)
+        self.reasonIds = array.array("B", [self.reasons.id(reason)]) * len(self.newNames)
+        self.scopeIds = None
+
+    def resetPlan(self):
+        """Drop planned names, nodes and old names stay"""
+        self.newNames = []
+        self.reasonIds = array.array("B")
+        self.scopeIds = None
+
+    def mapNodes(self, function):
+        """Replace node handles, e.g. snapshot positions by live nodes"""
+        self.nodes = nodeColumn([function(node) for node in self.nodes])
+
+    def changed(self):
+        """Batch of entries whose name changes
+
+        :rtype: RenameBatch
+        """
+        return RenameBatch.fromEntries(entry for entry in self if entry.oldName != entry.newName)
+
+    def orderSteps(self):
+        """Order renames so no node is renamed to a name another batch node still holds.
+
+        Entries depend on the batch nodes currently holding their new name, usually a single one,
+        several if DAG nodes share a short name. Dependencies are applied first, depth first,
+        cycles are broken by moving the node that closes them to a temporary name.
+
+        Names of scoped entries only depend on their own scope. Global names can be held by nodes
+        of any scope, so scoped entries go first and release them.
+
+        :return: Positions in rename order, ~position for steps renaming to a temporary name
+        :rtype: array.array
+        """
+        count = len(self)
+        oldNames = self.oldNames
+        newNames = self.newNames
+        if self.scopeIds is not None:
+            scopeIds = self.scopeIds
+            order = [each for each in range(count) if scopeIds[each]] + [each for each in range(count) if not scopeIds[each]]
+            oldKeys = [(scopeIds[each], oldNames[each]) for each in range(count)]
+            newKeys = [(scopeIds[each], newNames[each]) for each in range(count)]
+        else:
+            order = range(count)
+            oldKeys = oldNames
+            newKeys = newNames
+
+        # Single holder is stored as is, a list only for shared short names
+        holders = {}
+        for position in order:
+            key = oldKeys[position]
+            held = holders.get(key)
+            if held is None:
+                holders[key] = position
+            elif isinstance(held, list):
+                held.append(position)
+            else:
+                holders[key] = [held, position]
+
+        def dependencies(position):
+            held = holders.get(newKeys[position])
+            if held is None:
+                return iter(())
+            return iter(held) if isinstance(held, list) else iter((held,))
+
+        IN_PROGRESS, DONE, MOVED = 1, 2, 4
+        state = bytearray(count)
+        steps = array.array("l")
+        for root in order:
+            if state[root]:
+                continue
+
+            # Iterative, chains can be as long as the batch
+            state[root] = IN_PROGRESS
+            stack = [(root, dependencies(root))]
+            while stack:
+                position, pending = stack[-1]
+                for holder in pending:
+                    if holder == position:
+                        continue
+                    holderState = state[holder]
+                    if not holderState:
+                        state[holder] = IN_PROGRESS
+                        stack.append((holder, dependencies(holder)))
+                        break
+                    if holderState & IN_PROGRESS and not holderState & MOVED:
+                        # Cycle, holder gets its final name once its own dependencies are done
+                        state[holder] |= MOVED
+                        steps.append(~holder)
+                else:
+                    stack.pop()
+                    state[position] = DONE
+                    if newNames[position] != oldNames[position]:
+                        steps.append(position)
+
+        return steps
+
+
+class RenameJournal(object):
+    """Performed renames as (node, fromName, toName) records kept in columns, oldest first.
+
+    Same interface as the list journals of RenameUtils.applyPlan and revertJournal, without
+    a tuple per rename.
+    """
+
+    __slots__ = ("nodes", "fromNames", "toNames")
+
+    def __init__(self):
+        self.nodes = []
+        self.fromNames = []
+        self.toNames = []
+
+    def __len__(self):
+        return len(self.toNames)
+
+    def __iter__(self):
+        return iter(zip(self.nodes, self.fromNames, self.toNames))
+
+    def __reversed__(self):
+        for position in range(len(self.toNames) - 1, -1, -1):
+            yield self.nodes[position], self.fromNames[position], self.toNames[position]
+
+    def __repr__(self):
+        return "RenameJournal({0} renames)".format(len(self))
+
+    def append(self, record):
+        node, fromName, toName = record
+        self.nodes.append(node)
+        self.fromNames.append(fromName)
+        self.toNames.append(toName)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def truncate(self, length):
+        """Drop records after the first length ones"""
+        del self.nodes[length:]
+        del self.fromNames[length:]
+        del self.toNames[length:]
@@ -0,0 +1,323 @@
+"""Rename throughput benchmark on synthetic in-memory scenes.
+
+Usage:
+    python -m dsRenamingTool.benchmark --sizes 1000 10000 100000 --densities 0 0.5 --output bench.json
+    python -m dsRenamingTool.benchmark --startup --startup-budget-ms 50
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from dsRenamingTool import batchFn
+from dsRenamingTool import indexFn
+from dsRenamingTool import renameFn
+from dsRenamingTool import sceneFn
+from dsRenamingTool import statsFn
+from dsRenamingTool import templateFn
+
+
+BENCH_ALIASES = {"transform": "GRP",
+                 "mesh": "PLY",
+                 "nurbsCurve": "CRV",
+                 "joint": "JNT"}
+SHAPE_TYPES = ("mesh", "nurbsCurve", None)
+NEW_NAME = "node"
+_clock = getattr(time, "perf_counter", time.time)
+
+
+class CountingScene(sceneFn.SceneBase):
+    """Scene wrapper counting queries made by the naming logic."""
+
+    COUNTED = ("selection", "nodeName", "nodeType", "nodeTypes", "children", "firstChildTypes", "exists", "ls", "listNames", "rename")
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.counts = dict.fromkeys(self.COUNTED, 0)
+
+    def selection(self):
+        self.counts["selection"] += 1
+        return self.scene.selection()
+
+    def nodeName(self, node):
+        self.counts["nodeName"] += 1
+        return self.scene.nodeName(node)
+
+    def nodeType(self, node):
+        self.counts["nodeType"] += 1
+        return self.scene.nodeType(node)
+
+    def children(self, node):
+        self.counts["children"] += 1
+        return self.scene.children(node)
+
+    def nodeTypes(self, nodes):
+        self.counts["nodeTypes"] += 1
+        return self.scene.nodeTypes(nodes)
+
+    def firstChildTypes(self, nodes):
+        self.counts["firstChildTypes"] += 1
+        return self.scene.firstChildTypes(nodes)
+
+    def exists(self, name):
+        self.counts["exists"] += 1
+        return self.scene.exists(name)
+
+    def ls(self, patterns=None, nodeType=None):
+        self.counts["ls"] += 1
+        return self.scene.ls(patterns, nodeType=nodeType)
+
+    def listNames(self, patterns=None):
+        self.counts["listNames"] += 1
+        return self.scene.listNames(patterns)
+
+    def rename(self, node, name):
+        self.counts["rename"] += 1
+        return self.scene.rename(node, name)
+
+    def batch(self):
+        return self.scene.batch()
+
+    def undoChunk(self):
+        return self.scene.undoChunk()
+
+
+def buildScene(size, density, seed=0):
+    """Build scene with a selection of transforms and colliding names
+
+    :param size: Number of selected transforms
+    :type size: int
+    :param density: Ratio of unselected nodes already using target names to selection size
+    :type density: float
+    :rtype: sceneFn.MemoryScene
+    """
+    rng = random.Random(seed)
+    scene = sceneFn.MemoryScene()
+    selection = []
+    for i in range(size):
+        node = scene.createNode("transform", "pasted__obj{0}".format(i))
+        shapeType = SHAPE_TYPES[i % len(SHAPE_TYPES)]
+        if shapeType:
+            scene.createNode(shapeType, "pasted__obj{0}Shape".format(i), parent=node)
+        selection.append(node)
+
+    # Collisions are spread over the index range the batch will allocate from
+    for index in rng.sample(range(size * 2), int(size * density)):
+        suffix = BENCH_ALIASES[SHAPE_TYPES[index % len(SHAPE_TYPES)] or "transform"]
+        scene.createNode("transform", "{0}{1}_{2}".format(NEW_NAME, str(index).zfill(2), suffix))
+
+    scene.select(selection)
+    return scene
+
+
+def runPlanned(scene):
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+    plan = renameFn.RenameUtils.planBatch(scene.selection(), NEW_NAME, BENCH_ALIASES, autoSuffix=True, nameIndex=nameIndex, scene=scene)
+    renameFn.RenameUtils.applyPlan(plan, nameIndex=nameIndex, scene=scene)
+    return len(plan)
+
+
+def runTemplate(scene, template=templateFn.DEFAULT_TEMPLATE):
+    """Planned flow with a naming template, the way the dialog always plans"""
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+    plan = renameFn.RenameUtils.planBatch(scene.selection(), NEW_NAME, BENCH_ALIASES, autoSuffix=True, nameIndex=nameIndex, scene=scene,
+                                          template=templateFn.compileTemplate(template))
+    renameFn.RenameUtils.applyPlan(plan, nameIndex=nameIndex, scene=scene)
+    return len(plan)
+
+
+def runSideTemplate(scene):
+    return runTemplate(scene, templateFn.PRESET_TEMPLATES[1])
+
+
+def runLegacy(scene):
+    """Temp name pass followed by final name pass, probing with exists like Dialog.rename used to."""
+    selection = scene.selection()
+    for node in selection:
+        renameFn.RenameUtils.rename(node, "tempName", BENCH_ALIASES, prefix="NULL", suffix="NULL", indexPadding=0, scene=scene)
+    for node in selection:
+        renameFn.RenameUtils.rename(node, NEW_NAME, BENCH_ALIASES, autoSuffix=True, scene=scene)
+    return len(selection)
+
+
+FLOWS = {"planned": runPlanned,
+         "template": runTemplate,
+         "sideTemplate": runSideTemplate,
+         "legacy": runLegacy}
+
+
+def measurePlanMemory(size, density, seed=0):
+    """Memory held by a planned batch, as RenameBatch columns and as a list of PlanEntry objects
+
+    Names are shared with the scene and name index in both cases, only the container and
+    records are counted.
+
+    :return: Bytes allocated by each representation
+    :rtype: dict
+    """
+    scene = buildScene(size, density, seed=seed)
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+    entries = list(renameFn.RenameUtils.iterPlan(scene.selection(), NEW_NAME, BENCH_ALIASES, autoSuffix=True, nameIndex=nameIndex, scene=scene))
+
+    measured = {}
+    for key, build in (("batch", batchFn.RenameBatch.fromEntries), ("entries", lambda each: [batchFn.PlanEntry(entry.node, entry.oldName, entry.newName, entry.reason, entry.scope) for entry in each])):
+        gc.collect()
+        tracemalloc.start()
+        held = build(entries)
+        measured[key] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del held
+    return measured
+
+
+def runCase(flow, size, density, measureMemory=True, seed=0, collectStats=False):
+    """Run single benchmark case
+
+    :param collectStats: Record pipeline stats of the timed run, adds their overhead to it
+    :type collectStats: bool
+    :return: Result record
+    :rtype: dict
+    """
+    scene = CountingScene(buildScene(size, density, seed=seed))
+    stats = statsFn.RenameStats.instance()
+    if collectStats:
+        stats.enable()
+    gc.collect()
+    start = _clock()
+    try:
+        count = FLOWS[flow](scene)
+    finally:
+        stats.disable()
+    elapsed = _clock() - start
+
+    result = {"flow": flow,
+              "size": size,
+              "density": density,
+              "nodes": count,
+              "seconds": round(elapsed, 6),
+              "renamesPerSecond": round(count / elapsed, 1) if elapsed else None,
+              "queries": scene.counts,
+              "peakMemoryBytes": None,
+              "planMemoryBytes": None,
+              "stats": stats.asDict() if collectStats else None}
+
+    # Tracing slows the run down, memory is measured on a separate identical run
+    if measureMemory and tracemalloc is not None:
+        scene = CountingScene(buildScene(size, density, seed=seed))
+        gc.collect()
+        tracemalloc.start()
+        FLOWS[flow](scene)
+        result["peakMemoryBytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if flow != "legacy":
+            result["planMemoryBytes"] = measurePlanMemory(size, density, seed=seed)
+
+    return result
+
+
+def run(sizes, densities, flows=("planned",), legacyMaxSize=10000, measureMemory=True, seed=0, collectStats=False):
+    results = []
+    for flow in flows:
+        for size in sizes:
+            # Legacy flow is quadratic, large sizes would take hours
+            if flow == "legacy" and size > legacyMaxSize:
+                continue
+            for density in densities:
+                results.append(runCase(flow, size, density, measureMemory=measureMemory, seed=seed, collectStats=collectStats))
+
+    return {"python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results}
+
+
+STARTUP_MODULES = ("dsRenamingTool",
+                   "dsRenamingTool.renameFn",
+                   "dsRenamingTool.aliasFn",
+                   "dsRenamingTool.loggingFn")
+HEAVY_MODULES = ("pymel.core", "PySide2", "shiboken2", "maya.app.general.mayaMixin")
+_STARTUP_SCRIPT = """
+import json, sys, time
+clock = getattr(time, "perf_counter", time.time)
+start = clock()
+for module in {modules!r}:
+    __import__(module)
+elapsed = clock() - start
+json.dump({{"seconds": elapsed, "heavyModules": [m for m in {heavy!r} if m in sys.modules]}}, sys.stdout)
+"""
+
+
+def measureStartup(modules=STARTUP_MODULES, budgetMs=None, python=None):
+    """Measure cold import time of the headless modules in a fresh interpreter
+
+    :param modules: Modules to import
+    :type modules: tuple
+    :param budgetMs: Allowed import time in milliseconds
+    :type budgetMs: float, optional
+    :param python: Interpreter to use, e.g. mayapy, defaults to the current one
+    :type python: str, optional
+    :return: Result record, "passed" is False if over budget or heavy modules got imported
+    :rtype: dict
+    """
+    env = dict(os.environ)
+    packageRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join([packageRoot] + [path for path in [env.get("PYTHONPATH")] if path])
+    script = _STARTUP_SCRIPT.format(modules=tuple(modules), heavy=HEAVY_MODULES)
+    output = subprocess.check_output([python or sys.executable, "-c", script], env=env)
+    measured = json.loads(output.decode("utf-8"))
+
+    milliseconds = round(measured["seconds"] * 1000.0, 3)
+    passed = not measured["heavyModules"]
+    if budgetMs is not None:
+        passed = passed and milliseconds <= budgetMs
+    return {"modules": list(modules),
+            "milliseconds": milliseconds,
+            "budgetMs": budgetMs,
+            "heavyModules": measured["heavyModules"],
+            "passed": passed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="dsRenamingTool rename benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.0, 0.5, 1.0])
+    parser.add_argument("--flows", nargs="+", choices=sorted(FLOWS.keys()), default=["planned", "template", "legacy"])
+    parser.add_argument("--legacy-max-size", type=int, default=10000)
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak memory measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stats", action="store_true", help="Record per-phase timers and counters of each case")
+    parser.add_argument("--startup", action="store_true", help="Only measure cold import time")
+    parser.add_argument("--startup-budget-ms", type=float, default=None)
+    parser.add_argument("--python", help="Interpreter for startup measurement, e.g. mayapy")
+    parser.add_argument("--output", help="Write JSON to file instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        report = measureStartup(budgetMs=args.startup_budget_ms, python=args.python)
+    else:
+        report = run(args.sizes, args.densities, flows=args.flows, legacyMaxSize=args.legacy_max_size,
+                     measureMemory=not args.no_memory, seed=args.seed, collectStats=args.stats)
+    if args.output:
+        with open(args.output, "w") as outputFile:
+            json.dump(report, outputFile, indent=4, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=4, sort_keys=True)
+        sys.stdout.write("\n")
+
+    if args.startup and not report["passed"]:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,7 +24,10 @@ def mayaMainWindow():
 
 class _modalDialog(QtWidgets.QDialog):
 
-    def __init__(self, parent=mayaMainWindow()):
+    def __init__(self, parent=None):
+        # Resolved on construction, a default argument would query Maya UI on import
+        if parent is None:
+            parent = mayaMainWindow()
         super(_modalDialog, self).__init__(parent)
 
         # Disable question mark for windows
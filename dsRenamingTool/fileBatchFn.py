@@ -0,0 +1,240 @@
+"""Rename nodes of many Maya ASCII files in parallel processes.
+
+Usage:
+    python -m dsRenamingTool.fileBatchFn assets/ --name body --type mesh --auto-suffix --summary rename.jsonl
+    python -m dsRenamingTool.fileBatchFn assets/ --name body --type mesh --auto-suffix --summary rename.jsonl --resume
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent import futures
+
+from dsRenamingTool import maFileFn
+from dsRenamingTool.loggingFn import Logger
+
+# Raised for every pending job once a worker process dies, e.g. killed for running out of memory
+try:
+    from concurrent.futures.process import BrokenProcessPool
+except ImportError:
+    BrokenProcessPool = RuntimeError
+
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+# New pools dying before finishing any file, e.g. workers failing to start, give up on the next file
+MAX_POOL_RESTARTS = 3
+_clock = getattr(time, "perf_counter", time.time)
+
+
+def renameJob(inputPath, outputPath, renameKwargs):
+    """Rename single file, runs in a worker process.
+
+    Errors are returned as part of the record so one broken file doesn't stop the batch.
+
+    :return: Summary record
+    :rtype: dict
+    """
+    start = _clock()
+    record = {"input": inputPath, "output": outputPath}
+    try:
+        outputDir = os.path.dirname(os.path.abspath(outputPath))
+        if not os.path.isdir(outputDir):
+            try:
+                os.makedirs(outputDir)
+            except OSError:
+                # Another worker could have created it meanwhile
+                if not os.path.isdir(outputDir):
+                    raise
+        result = maFileFn.renameFile(inputPath, outputPath=outputPath, **renameKwargs)
+        record.update(status=STATUS_OK, nodes=result["nodes"], renamed=result["renamed"], error=None)
+    except Exception as e:
+        record.update(failedRecord(inputPath, outputPath, e))
+        record["traceback"] = traceback.format_exc()
+    record["seconds"] = round(_clock() - start, 6)
+    return record
+
+
+def failedRecord(inputPath, outputPath, error):
+    """Summary record of a file that failed to rename
+
+    :rtype: dict
+    """
+    return {"input": inputPath,
+            "output": outputPath,
+            "status": STATUS_FAILED,
+            "nodes": None,
+            "renamed": None,
+            "error": "{0}: {1}".format(type(error).__name__, error)}
+
+
+def collectFiles(paths, outputDir=None, extensions=(".ma",)):
+    """Expand files and directories to input/output path pairs
+
+    :param paths: Files or directories searched recursively
+    :type paths: list
+    :param outputDir: Output root, directory structure below input directories is kept. Files are renamed in place if not given
+    :type outputDir: str, optional
+    :return: Input and output path pairs
+    :rtype: list[tuple]
+    """
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for fileName in sorted(files):
+                    if os.path.splitext(fileName)[1].lower() in extensions:
+                        inputPath = os.path.join(root, fileName)
+                        relativePath = os.path.relpath(inputPath, path)
+                        jobs.append((inputPath, os.path.join(outputDir, relativePath) if outputDir else inputPath))
+        else:
+            jobs.append((path, os.path.join(outputDir, os.path.basename(path)) if outputDir else path))
+    return jobs
+
+
+def readSummary(summaryPath):
+    """Read records of a previous run, a line cut short by an interruption is ignored
+
+    :rtype: list[dict]
+    """
+    records = []
+    if not os.path.isfile(summaryPath):
+        return records
+    with open(summaryPath, "r") as summaryFile:
+        for line in summaryFile:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def runBatch(jobs, renameKwargs, summaryPath, workers=None, resume=False):
+    """Rename files in a process pool, writing one summary record per finished file.
+
+    Records are flushed as files finish, so an interrupted batch can be resumed and only
+    files without a successful record are processed again. A pool whose worker died is
+    replaced, after MAX_POOL_RESTARTS pools in a row died without finishing a file, the
+    file that can't be submitted is recorded as failed.
+
+    :param jobs: Input and output path pairs, see collectFiles
+    :type jobs: list[tuple]
+    :param renameKwargs: Keyword arguments of maFileFn.renameFile
+    :type renameKwargs: dict
+    :param summaryPath: JSON lines summary file
+    :type summaryPath: str
+    :param workers: Maximum number of worker processes, CPU count if not given
+    :type workers: int, optional
+    :param resume: Skip files finished successfully by a previous run with the same summary
+    :type resume: bool
+    :return: Counts of processed, failed and skipped files
+    :rtype: dict
+    """
+    counts = {"processed": 0, "failed": 0, "skipped": 0}
+    if resume:
+        finished = set(record["input"] for record in readSummary(summaryPath) if record.get("status") == STATUS_OK)
+        pending = [job for job in jobs if job[0] not in finished]
+        counts["skipped"] = len(jobs) - len(pending)
+        mode = "a"
+    else:
+        pending = list(jobs)
+        mode = "w"
+
+    workers = max(1, workers or multiprocessing.cpu_count())
+    # Only a few jobs per worker are queued at once, thousands of files don't sit in the pool queue
+    maxInFlight = workers * 2
+    queue = iter(pending)
+    executor = futures.ProcessPoolExecutor(max_workers=workers)
+    with open(summaryPath, mode) as summaryFile:
+        inFlight = {}
+        restarts = 0
+        try:
+            while True:
+                broken = False
+                for job in queue:
+                    try:
+                        inFlight[executor.submit(renameJob, job[0], job[1], renameKwargs)] = job
+                    except BrokenProcessPool as e:
+                        if restarts < MAX_POOL_RESTARTS:
+                            # Pool died after the last wait, job goes to the new pool
+                            queue = itertools.chain([job], queue)
+                        else:
+                            _writeRecord(failedRecord(job[0], job[1], e), summaryFile, counts)
+                        broken = True
+                        break
+                    if len(inFlight) >= maxInFlight:
+                        break
+                if not inFlight and not broken:
+                    break
+
+                done, _ = futures.wait(list(inFlight), return_when=futures.FIRST_COMPLETED)
+                if _writeRecords(done, inFlight, summaryFile, counts) or broken:
+                    # Every other job of the dead pool fails too, they are recorded before starting a new one
+                    done, _ = futures.wait(list(inFlight))
+                    _writeRecords(done, inFlight, summaryFile, counts)
+                    Logger.warning("Worker process died, starting a new pool")
+                    executor.shutdown(wait=False)
+                    executor = futures.ProcessPoolExecutor(max_workers=workers)
+                    restarts += 1
+                else:
+                    restarts = 0
+        except KeyboardInterrupt:
+            for future in inFlight:
+                future.cancel()
+            Logger.warning("Batch interrupted after {0} files, run with resume to continue".format(counts["processed"]))
+            raise
+        finally:
+            executor.shutdown()
+
+    Logger.info("Renamed {processed} files, {failed} failed, {skipped} skipped".format(**counts))
+    return counts
+
+
+def _writeRecords(done, inFlight, summaryFile, counts):
+    # Returns True if a worker process died
+    broken = False
+    for future in done:
+        inputPath, outputPath = inFlight.pop(future)
+        try:
+            record = future.result()
+        except BrokenProcessPool as e:
+            # Can't tell which of the files killed the worker, all files in flight fail
+            record = failedRecord(inputPath, outputPath, e)
+            broken = True
+        _writeRecord(record, summaryFile, counts)
+    return broken
+
+
+def _writeRecord(record, summaryFile, counts):
+    counts["processed"] += 1
+    if record["status"] != STATUS_OK:
+        counts["failed"] += 1
+        Logger.warning("Failed to rename {0}: {1}".format(record["input"], record["error"]))
+    summaryFile.write(json.dumps(record, sort_keys=True) + "\n")
+    summaryFile.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rename nodes of many Maya ASCII files in parallel")
+    parser.add_argument("inputs", nargs="+", help="Maya ASCII files or directories searched recursively")
+    parser.add_argument("--output-dir", help="Output root, files are renamed in place if not given")
+    parser.add_argument("--summary", required=True, help="JSON lines summary file")
+    parser.add_argument("--workers", type=int, help="Maximum number of worker processes")
+    parser.add_argument("--resume", action="store_true", help="Skip files finished by a previous run with the same summary")
+    maFileFn.addRenameArguments(parser)
+    args = parser.parse_args(argv)
+    if not args.patterns and not args.nodeTypes:
+        parser.error("at least one --pattern or --type is required")
+
+    jobs = collectFiles(args.inputs, outputDir=args.output_dir)
+    counts = runBatch(jobs, maFileFn.renameArguments(args), args.summary, workers=args.workers, resume=args.resume)
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,607 @@
+import bisect
+import collections
+import re
+
+
+class NameIndex(object):
+    """Index of existing node names and of the indices taken by each naming pattern.
+
+    Patterns are keyed by (base name, suffix, padding) and built lazily from the recorded names,
+    so a batch only pays for the patterns it actually uses. Renames made through the index keep it
+    in sync with the scene for the rest of the batch.
+
+    Names are also bucketed by the text around each of their digit runs, so building a pattern
+    only looks at names that can match it instead of scanning the whole index.
+
+    Padding is either number of digits or one of the letter styles, letter indices go A..Z, AA..ZZ
+    and so on starting from index 0. Indices wider than the padding are written in full like zfill
+    does, index 100 with padding 2 is "100", and count as used by every digit padding they match.
+
+    Allocation policies:
+        FILL_GAPS: Lowest free index from start, same as probing upwards
+        APPEND: Index after the highest used one, start at the least
+        KEEP_EXISTING: Current index of the object if it matches the pattern, lowest free otherwise
+
+    Bulk allocation takes free indices run by run and formats all names of a pattern with a single
+    format string, checks against taken names are done per block of candidates.
+
+    Every index caches at most MAX_PATTERNS patterns, least recently used ones are dropped and
+    rebuilt from names if needed again. Overlays build their patterns from the parent without
+    caching them there, so previews don't grow the long lived index they read.
+    """
+
+    UPPER_LETTERS = "A"
+    LOWER_LETTERS = "a"
+    LETTER_STYLES = (UPPER_LETTERS, LOWER_LETTERS)
+
+    FILL_GAPS = "fill"
+    APPEND = "append"
+    KEEP_EXISTING = "keep"
+    POLICIES = (FILL_GAPS, APPEND, KEEP_EXISTING)
+
+    FREE_NAMES_BLOCK = 256
+    MAX_PATTERNS = 32
+
+    _DIGIT_RUN = re.compile(r"\d+")
+
+    def __init__(self, names=None, parent=None):
+        """
+        :param names: Initial names
+        :type names: iterable, optional
+        :param parent: Index this one is an overlay of, see overlay()
+        :type parent: NameIndex, optional
+        """
+        self._parent = parent
+        self._names = {}  # type: dict
+        self._patterns = collections.OrderedDict()
+        self._stems = None  # type: dict
+        if names:
+            counts = self._names
+            for name in names:
+                counts[name] = counts.get(name, 0) + 1
+
+    @classmethod
+    def fromScene(cls, scene, patterns=None):
+        """Build index from a single scene scan
+
+        :param scene: Scene access backend
+        :param patterns: Optional list of ls patterns to limit the scan to, defaults to whole scene
+        :type patterns: list, optional
+        :return: Name index
+        :rtype: NameIndex
+        """
+        return cls(scene.listNames(patterns))
+
+    def overlay(self):
+        """Create index recording changes on top of this one without modifying it.
+
+        Used for previews, where a batch is planned repeatedly against the same scene state.
+
+        :rtype: NameIndex
+        """
+        return NameIndex(parent=self)
+
+    def copy(self):
+        """Independent flat copy, overlays are merged into it
+
+        :rtype: NameIndex
+        """
+        index = NameIndex()
+        if self._parent is None:
+            index._names = dict(self._names)
+            return index
+        names = set(self._names)
+        parent = self._parent
+        while parent is not None:
+            names.update(parent._names)
+            parent = parent._parent
+        for name in names:
+            count = self.count(name)
+            if count > 0:
+                index._names[name] = count
+        return index
+
+    def names(self):
+        """Names currently in the index
+
+        :rtype: list[str]
+        """
+        return list(self.copy()._names) if self._parent is not None else list(self._names)
+
+    def __contains__(self, name):
+        return self.count(name) > 0
+
+    def __len__(self):
+        return len(self._names)
+
+    def count(self, name):
+        count = self._names.get(name, 0)
+        if self._parent is not None:
+            count += self._parent.count(name)
+        return count
+
+    def exists(self, name):
+        return self.count(name) > 0
+
+    def add(self, name):
+        count = self.count(name)
+        self._names[name] = self._names.get(name, 0) + 1
+        if count:
+            return
+        self._nameAdded(name)
+
+    def discard(self, name):
+        count = self.count(name)
+        if not count:
+            return
+        own = self._names.get(name, 0) - 1
+        if own or self._parent is not None:
+            self._names[name] = own
+        else:
+            del self._names[name]
+        if count > 1:
+            return
+        self._nameRemoved(name)
+
+    def rename(self, oldName, newName):
+        if oldName == newName:
+            return
+        self.discard(oldName)
+        self.add(newName)
+
+    @classmethod
+    def formatIndex(cls, index, padding=2):
+        if padding in cls.LETTER_STYLES:
+            letters = ""
+            index += 1
+            while index:
+                index, remainder = divmod(index - 1, 26)
+                letters = chr(ord(padding) + remainder) + letters
+            return letters
+        return str(index).zfill(padding)
+
+    @classmethod
+    def formatName(cls, base, index, suffix="", padding=2):
+        return base + cls.formatIndex(index, padding) + suffix
+
+    @classmethod
+    def formatNames(cls, base, indices, suffix="", padding=2):
+        """Format many names of one pattern at once, same as formatName of every index
+
+        :param indices: Indices, e.g. a range
+        :type indices: iterable
+        :rtype: list[str]
+        """
+        if padding in cls.LETTER_STYLES:
+            return [base + cls.formatIndex(index, padding) + suffix for index in indices]
+        # Zero padded %d writes wider indices in full like zfill does
+        template = "{0}%0{1}d{2}".format(base.replace("%", "%%"), padding, suffix.replace("%", "%%"))
+        return [template % index for index in indices]
+
+    @classmethod
+    def freeNames(cls, base, suffix="", padding=2, start=0, count=1, existing=()):
+        """Lowest count names of the pattern from start that aren't taken, same as probing upwards.
+
+        Candidates are generated and checked against taken names in blocks, not one name at a time.
+
+        :param existing: Taken names, any container, e.g. a set of scene names or a NameIndex
+        :rtype: list[str]
+        """
+        names = []
+        index = start
+        while len(names) < count:
+            block = max(count - len(names), cls.FREE_NAMES_BLOCK)
+            candidates = cls.formatNames(base, range(index, index + block), suffix, padding)
+            names.extend([name for name in candidates if name not in existing])
+            index += block
+        return names[:count]
+
+    @classmethod
+    def parseIndex(cls, name, base, suffix="", padding=2):
+        """Get index of the name if it was generated from given pattern
+
+        :return: Index or None if name doesn't match the pattern
+        :rtype: int or None
+        """
+        if not name.startswith(base) or (suffix and not name.endswith(suffix)):
+            return None
+        digits = name[len(base):len(name) - len(suffix)] if suffix else name[len(base):]
+        if padding in cls.LETTER_STYLES:
+            return cls._parseLetters(digits, padding)
+        if not digits.isdigit():
+            return None
+        index = int(digits)
+        # Only exact zfill output counts, "obj1" and "obj01" are different patterns
+        if str(index).zfill(padding) != digits:
+            return None
+        return index
+
+    @staticmethod
+    def _parseLetters(letters, style):
+        first = ord(style)
+        index = 0
+        for letter in letters:
+            value = ord(letter) - first
+            if not 0 <= value < 26:
+                return None
+            index = index * 26 + value + 1
+        return index - 1 if letters else None
+
+    def nextName(self, base, suffix="", padding=2, start=0, current=None, policy=FILL_GAPS):
+        """Get free name of the pattern, with FILL_GAPS same as probing upwards from start index.
+
+        :param current: Current name of the object being renamed, kept if reached before a free index.
+            KEEP_EXISTING keeps it whenever it matches the pattern, APPEND ignores it
+        :type current: str, optional
+        :param policy: Allocation policy, see POLICIES
+        :type policy: str
+        :rtype: str
+        """
+        pattern = self._pattern(base, suffix, padding)
+        if policy == self.APPEND:
+            return self.formatName(base, pattern.nextAppend(start), suffix, padding)
+
+        if current is not None:
+            currentIndex = self.parseIndex(current, base, suffix, padding)
+            if currentIndex is not None and start <= currentIndex:
+                if policy == self.KEEP_EXISTING or currentIndex < pattern.nextFree(start):
+                    return current
+
+        return self.formatName(base, pattern.nextFree(start), suffix, padding)
+
+    def reserveNames(self, base, suffix="", padding=2, start=0, count=1, policy=FILL_GAPS):
+        """Claim count free names of the pattern at once, in the order nextName would return them
+
+        Free indices are taken run by run and the names formatted in bulk, see formatNames.
+
+        :rtype: list[str]
+        """
+        pattern = self._pattern(base, suffix, padding)
+        runs = []
+        reserved = 0
+        for first, end in pattern.iterFreeRuns(start, policy):
+            limit = first + count - reserved
+            end = limit if end is None else min(end, limit)
+            if end > first:
+                runs.append((first, end))
+                reserved += end - first
+            if reserved >= count:
+                break
+        names = []
+        for first, end in runs:
+            names.extend(self.formatNames(base, range(first, end), suffix, padding))
+        self._namesReserved(names, (base, suffix, padding), runs)
+        return names
+
+    def _namesReserved(self, names, key, runs):
+        # Same as adding every name, reserved names are free and all of them belong to the pattern of key
+        counts = self._names
+        for name in names:
+            counts[name] = counts.get(name, 0) + 1
+
+        base, suffix, padding = key
+        if self._stems is not None:
+            if padding in self.LETTER_STYLES or self._DIGIT_RUN.search(base) or self._DIGIT_RUN.search(suffix):
+                for name in names:
+                    for stemKey in self._stemKeys(name):
+                        self._stems.setdefault(stemKey, set()).add(name)
+            else:
+                # Index is the only digit run
+                self._stems.setdefault((base, suffix), set()).update(names)
+
+        for patternKey, pattern in self._patterns.items():
+            if patternKey == key:
+                for first, end in runs:
+                    pattern.addRange(first, end)
+                continue
+            # Other patterns can only match if their base and suffix overlap these
+            otherBase, otherSuffix, _ = patternKey
+            if not (base.startswith(otherBase) or otherBase.startswith(base)) or not (suffix.endswith(otherSuffix) or otherSuffix.endswith(suffix)):
+                continue
+            for name in names:
+                index = self.parseIndex(name, *patternKey)
+                if index is not None:
+                    pattern.add(index)
+
+    def _nameAdded(self, name):
+        if self._stems is not None:
+            for key in self._stemKeys(name):
+                self._stems.setdefault(key, set()).add(name)
+        for key, pattern in self._patterns.items():
+            index = self.parseIndex(name, *key)
+            if index is not None:
+                pattern.add(index)
+
+    def _nameRemoved(self, name):
+        if self._stems is not None:
+            for key in self._stemKeys(name):
+                bucket = self._stems.get(key)
+                if bucket is not None:
+                    bucket.discard(name)
+                    if not bucket:
+                        del self._stems[key]
+        for key, pattern in self._patterns.items():
+            index = self.parseIndex(name, *key)
+            if index is not None:
+                pattern.discard(index)
+
+    @classmethod
+    def _stemKeys(cls, name):
+        for match in cls._DIGIT_RUN.finditer(name):
+            yield name[:match.start()], name[match.end():]
+
+    def _candidates(self, base, suffix, padding):
+        # Digit runs only line up with the pattern when digits don't touch base or suffix
+        if padding in self.LETTER_STYLES or (base and base[-1].isdigit()) or (suffix and suffix[0].isdigit()):
+            return list(self._names)
+        if self._stems is None:
+            self._stems = {}
+            for name in self._names:
+                for key in self._stemKeys(name):
+                    self._stems.setdefault(key, set()).add(name)
+        return self._stems.get((base, suffix), ())
+
+    def _pattern(self, base, suffix, padding):
+        key = (base, suffix, padding)
+        pattern = self._patterns.pop(key, None)
+        if pattern is None:
+            pattern = self._buildPattern(base, suffix, padding)
+            while len(self._patterns) >= self.MAX_PATTERNS:
+                self._patterns.popitem(last=False)
+        # Most recently used last
+        self._patterns[key] = pattern
+        return pattern
+
+    def _buildPattern(self, base, suffix, padding):
+        # Pattern of this index, overlays copy the one cached by their parent or build it without caching it there
+        if self._parent is not None:
+            pattern = self._parent._patterns.get((base, suffix, padding))
+            pattern = pattern.copy() if pattern is not None else self._parent._buildPattern(base, suffix, padding)
+            for name in self._names:
+                index = self.parseIndex(name, base, suffix, padding)
+                if index is None:
+                    continue
+                if self.count(name) > 0:
+                    pattern.add(index)
+                else:
+                    pattern.discard(index)
+            return pattern
+
+        pattern = _PatternIndex()
+        for name in self._candidates(base, suffix, padding):
+            index = self.parseIndex(name, base, suffix, padding)
+            if index is not None:
+                pattern.add(index)
+        return pattern
+
+    def clearPatterns(self):
+        """Drop cached patterns, they are rebuilt from names on next use"""
+        self._patterns.clear()
+
+
+class ScopedNameIndex(object):
+    """Name indices of uniqueness scopes, each built from the scene once per batch on first use.
+
+    Scopes:
+        GLOBAL: Names are unique in the whole scene
+        PARENT: DAG names only have to be unique among siblings, world level and non DAG nodes
+            fall back to the global index
+        NAMESPACE: Names are unique within the namespace of the node, which they keep
+
+    Scope indices hold names without namespace, global index passed in is kept in sync with
+    full names, so it can still be used for applying the plan.
+    """
+
+    GLOBAL = "global"
+    PARENT = "parent"
+    NAMESPACE = "namespace"
+    SCOPES = (GLOBAL, PARENT, NAMESPACE)
+
+    def __init__(self, scene, scope=GLOBAL, nameIndex=None, parent=None):
+        """
+        :param scene: Scene access backend
+        :param scope: Uniqueness scope, see SCOPES
+        :type scope: str
+        :param nameIndex: Global index, built from the scene if a batch needs it
+        :type nameIndex: NameIndex, optional
+        :param parent: Scoped index this one is an overlay of, see overlay()
+        :type parent: ScopedNameIndex, optional
+        """
+        if scope not in self.SCOPES:
+            raise ValueError("Unknown uniqueness scope: {0}".format(scope))
+        self.scene = scene
+        self.scope = scope
+        self.nameIndex = nameIndex
+        self._parent = parent
+        self._indices = {}
+        self._globalClaims = []
+        # Parent scopes of nodes and parent nodes of scopes are shared with overlays
+        self._nodeKeys = parent._nodeKeys if parent is not None else {}
+        self._scopeNodes = parent._scopeNodes if parent is not None else {}
+
+    def overlay(self):
+        """Create scoped index recording changes on top of this one, see NameIndex.overlay
+
+        :rtype: ScopedNameIndex
+        """
+        scoped = ScopedNameIndex(self.scene, self.scope, parent=self)
+        if self.nameIndex is not None:
+            # Global overlay has to exist before any scope records changes, they are mirrored into it
+            scoped.index(None)
+        return scoped
+
+    def scopeKeys(self, nodes, names):
+        """Scope of every node, None is the global scope. Parents are queried once per node
+
+        :param names: Current names of nodes
+        :type names: list[str]
+        :rtype: list
+        """
+        if self.scope == self.NAMESPACE:
+            return [name.rpartition(":")[0] or None for name in names]
+        if self.scope != self.PARENT:
+            return [None] * len(names)
+
+        scene = self.scene
+        nodeIds = [scene.nodeId(node) for node in nodes]
+        missing = [node for node, nodeId in zip(nodes, nodeIds) if nodeId not in self._nodeKeys]
+        for node, parent in zip(missing, scene.parents(missing)):
+            key = None
+            if parent is not None:
+                key = scene.nodeId(parent)
+                self._scopeNodes[key] = parent
+            self._nodeKeys[scene.nodeId(node)] = key
+        return [self._nodeKeys[nodeId] for nodeId in nodeIds]
+
+    def index(self, key):
+        """Index of scope
+
+        :rtype: NameIndex
+        """
+        index = self._indices.get(key)
+        if index is not None:
+            return index
+
+        if self._parent is not None:
+            index = self._parent.index(key).overlay()
+            if key is None:
+                self.nameIndex = index
+        elif key is None:
+            if self.nameIndex is None:
+                self.nameIndex = NameIndex.fromScene(self.scene)
+            index = self.nameIndex
+        elif self.scope == self.PARENT:
+            index = NameIndex(self.scene.childNames(self._scopeNodes[key]))
+            for name in self._globalClaims:
+                index.add(name)
+        else:
+            prefix = key + ":"
+            index = NameIndex(name[len(prefix):] for name in self.scene.listNames([prefix + "*"])
+                              if ":" not in name[len(prefix):])
+        self._indices[key] = index
+        return index
+
+    def localName(self, key, name):
+        """Name without namespace of the scope"""
+        if key is not None and self.scope == self.NAMESPACE and name.startswith(key + ":"):
+            return name[len(key) + 1:]
+        return name
+
+    def fullName(self, key, name):
+        """Name with namespace of the scope"""
+        if key is not None and self.scope == self.NAMESPACE:
+            return key + ":" + name
+        return name
+
+    def release(self, key, name):
+        index = self.index(key)
+        index.discard(self.localName(key, name))
+        if self.nameIndex is not None and index is not self.nameIndex:
+            self.nameIndex.discard(name)
+
+    def claim(self, key, name):
+        """Record name as taken, name is local to the scope"""
+        index = self.index(key)
+        index.add(name)
+        if key is None and self.scope == self.PARENT:
+            # Children planned later must not take it either, their renames are applied first
+            self._globalClaims.append(name)
+            for scopeKey, scopeIndex in self._indices.items():
+                if scopeKey is not None:
+                    scopeIndex.add(name)
+        elif self.nameIndex is not None and index is not self.nameIndex:
+            self.nameIndex.add(self.fullName(key, name))
+
+
+class _PatternIndex(object):
+    """Used indices of a single pattern as a sorted list of disjoint [start, end) intervals.
+
+    Runs of taken indices collapse into one interval, so free index lookups and reservations
+    are a binary search plus a walk over the gaps they actually use.
+    """
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def __len__(self):
+        return sum(end - start for start, end in zip(self.starts, self.ends))
+
+    def __contains__(self, index):
+        position = bisect.bisect_right(self.starts, index) - 1
+        return position >= 0 and index < self.ends[position]
+
+    def copy(self):
+        pattern = _PatternIndex()
+        pattern.starts = list(self.starts)
+        pattern.ends = list(self.ends)
+        return pattern
+
+    def add(self, index):
+        position = bisect.bisect_right(self.starts, index) - 1
+        if position >= 0 and index < self.ends[position]:
+            return
+        self.addRange(index, index + 1)
+
+    def addRange(self, first, end):
+        """Add [first, end) indices, all of them must be free"""
+        starts = self.starts
+        ends = self.ends
+        position = bisect.bisect_right(starts, first) - 1
+        joinsPrevious = position >= 0 and ends[position] == first
+        joinsNext = position + 1 < len(starts) and starts[position + 1] == end
+        if joinsPrevious and joinsNext:
+            ends[position] = ends[position + 1]
+            del starts[position + 1]
+            del ends[position + 1]
+        elif joinsPrevious:
+            ends[position] = end
+        elif joinsNext:
+            starts[position + 1] = first
+        else:
+            starts.insert(position + 1, first)
+            ends.insert(position + 1, end)
+
+    def discard(self, index):
+        starts = self.starts
+        ends = self.ends
+        position = bisect.bisect_right(starts, index) - 1
+        if position < 0 or index >= ends[position]:
+            return
+        start, end = starts[position], ends[position]
+        if start == index and end == index + 1:
+            del starts[position]
+            del ends[position]
+        elif start == index:
+            starts[position] = index + 1
+        elif end == index + 1:
+            ends[position] = index
+        else:
+            ends[position] = index
+            starts.insert(position + 1, index + 1)
+            ends.insert(position + 1, end)
+
+    def nextFree(self, start):
+        position = bisect.bisect_right(self.starts, start) - 1
+        if position >= 0 and start < self.ends[position]:
+            # Intervals are merged, end of the one containing start is free
+            return self.ends[position]
+        return start
+
+    def nextAppend(self, start):
+        return max(start, self.ends[-1]) if self.ends else start
+
+    def iterFreeRuns(self, start, policy=NameIndex.FILL_GAPS):
+        """Free indices from start upwards as [first, end) runs, the last one is open with end None
+
+        :rtype: generator
+        """
+        index = self.nextAppend(start) if policy == NameIndex.APPEND else self.nextFree(start)
+        position = bisect.bisect_right(self.starts, index)
+        while position < len(self.starts):
+            yield index, self.starts[position]
+            index = self.ends[position]
+            position += 1
+        yield index, None
@@ -0,0 +1,114 @@
+import contextlib
+from maya import cmds
+from maya.api import OpenMaya as om2
+from dsRenamingTool import indexFn
+from dsRenamingTool.loggingFn import Logger
+
+
+class LiveNameIndex(object):
+    """Name index kept in sync with the scene by Maya message callbacks.
+
+    Node added, removed and name changed callbacks update the index incrementally. File open,
+    import and reference changes mark it dirty instead, it is rebuilt by a full scan on the next
+    access and callbacks are ignored until then.
+
+    Renames made by the tool go through suspended(), the planner keeps the index in sync itself
+    there. Plans that aren't applied right away must use an overlay.
+
+    Generation counts scene changes seen outside of suspended(), plans made in the background
+    only need re-checking if it moved on.
+    """
+
+    # Events after which incremental updates can't be trusted
+    REBUILD_EVENTS = ("kBeforeNew",
+                      "kBeforeOpen",
+                      "kBeforeImport",
+                      "kBeforeReference",
+                      "kBeforeLoadReference",
+                      "kBeforeUnloadReference",
+                      "kBeforeRemoveReference",
+                      "kBeforeCreateReference")
+
+    def __init__(self):
+        self._index = None  # type: indexFn.NameIndex
+        self._callbackIds = []
+        self._suspended = False
+        self.generation = 0
+
+    @property
+    def running(self):
+        return bool(self._callbackIds)
+
+    def start(self):
+        """Register callbacks, index is built on first access"""
+        if self.running:
+            return
+        self._index = None
+        self._callbackIds.append(om2.MDGMessage.addNodeAddedCallback(self.onNodeAdded, "dependNode"))
+        self._callbackIds.append(om2.MDGMessage.addNodeRemovedCallback(self.onNodeRemoved, "dependNode"))
+        # Null object listens to name changes of every node
+        self._callbackIds.append(om2.MNodeMessage.addNameChangedCallback(om2.MObject(), self.onNameChanged))
+        for eventName in self.REBUILD_EVENTS:
+            event = getattr(om2.MSceneMessage, eventName, None)
+            if event is not None:
+                self._callbackIds.append(om2.MSceneMessage.addCallback(event, self.invalidate))
+
+    def stop(self):
+        """Remove callbacks and drop the index, it would go stale without them"""
+        for callbackId in self._callbackIds:
+            om2.MMessage.removeCallback(callbackId)
+        self._callbackIds = []
+        self._index = None
+
+    def invalidate(self, *args):
+        self._index = None
+        self.generation += 1
+
+    def index(self):
+        """Current index, rebuilt from a scene scan if invalidated.
+
+        Outside of suspended() only callbacks may modify it, read it through an overlay.
+
+        :rtype: indexFn.NameIndex
+        """
+        if self._index is None:
+            self._index = indexFn.NameIndex(cmds.ls(sn=1) or [])
+            Logger.debug("Rebuilt name index of {0} names".format(len(self._index)))
+        return self._index
+
+    @contextlib.contextmanager
+    def suspended(self):
+        """Ignore callbacks while the tool renames nodes, the planner keeps the index in sync itself
+
+        Index is rebuilt if the block fails, renames it recorded may not have happened.
+        """
+        self._suspended = True
+        try:
+            yield
+        except BaseException:
+            self.invalidate()
+            raise
+        finally:
+            self._suspended = False
+
+    # Callbacks
+    def onNodeAdded(self, mobj, *args):
+        if self._suspended:
+            return
+        self.generation += 1
+        if self._index is not None:
+            self._index.add(om2.MFnDependencyNode(mobj).name())
+
+    def onNodeRemoved(self, mobj, *args):
+        if self._suspended:
+            return
+        self.generation += 1
+        if self._index is not None:
+            self._index.discard(om2.MFnDependencyNode(mobj).name())
+
+    def onNameChanged(self, mobj, previousName, *args):
+        if self._suspended:
+            return
+        self.generation += 1
+        if self._index is not None:
+            self._index.rename(previousName, om2.MFnDependencyNode(mobj).name())
@@ -1,36 +1,187 @@
 import sys
-import inspect
+import time
+import atexit
 import logging
+import threading
+import contextlib
 import logging.handlers
 
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    from maya import utils as maya_utils
+except ImportError:
+    maya_utils = None
+
+
+class DedupFilter(logging.Filter):
+    """Drops repeated messages and caps number of records per second, errors always pass.
+
+    Only filters while active, Logger.batch() activates it for the length of a batch. Dropped
+    records are counted, so a summary can be logged at its end.
+    """
+
+    MAX_TRACKED = 10000
+
+    def __init__(self, max_repeats=3, rate_limit=100):
+        """
+        :param max_repeats: Copies of the same message let through
+        :type max_repeats: int
+        :param rate_limit: Records let through per second, 0 for no limit
+        :type rate_limit: int
+        """
+        logging.Filter.__init__(self)
+        self.max_repeats = max_repeats
+        self.rate_limit = rate_limit
+        self.active = False
+        self.reset()
+
+    def reset(self):
+        self.seen = {}
+        self.suppressed = {}
+        self.rate_suppressed = 0
+        self._window = 0
+        self._window_count = 0
+
+    def filter(self, record):
+        if not self.active or record.levelno >= logging.ERROR:
+            return True
+
+        key = (record.levelno, record.getMessage())
+        count = self.seen.get(key, 0) + 1
+        if count > self.max_repeats:
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return False
+        if len(self.seen) >= self.MAX_TRACKED:
+            self.seen.clear()
+        self.seen[key] = count
+
+        if self.rate_limit:
+            window = int(time.time())
+            if window != self._window:
+                self._window = window
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count > self.rate_limit:
+                self.rate_suppressed += 1
+                return False
+        return True
+
+
+class StderrHandler(logging.StreamHandler):
+    """Writes to sys.stderr of the moment, Maya and test runners replace it after import.
+
+    Inside Maya sys.stderr is the Script Editor, which can only be written from the main thread.
+    Records of other threads are written there once the main thread is idle.
+    """
+
+    def __init__(self):
+        logging.StreamHandler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+    def emit(self, record):
+        if maya_utils is None or isinstance(threading.current_thread(), threading._MainThread):
+            logging.StreamHandler.emit(self, record)
+        else:
+            maya_utils.executeDeferred(logging.StreamHandler.emit, self, record)
+
 
 class Logger:
 
     LOGGER_NAME = "dsRenamingTool"
     LEVEL_DEFAULT = logging.DEBUG
+    SUMMARY_LIMIT = 20
     _logger_obj = None  # type: logging.Logger
+    _listener = None  # type: logging.handlers.QueueListener
+    _handlers = []
+    _dedup_filter = None  # type: DedupFilter
+    _batch_depth = 0
 
     @classmethod
     def logger_obj(cls):
         """Returns logger object
 
+        Output handlers run on a QueueListener thread, the calling thread only puts records on a queue.
+        Python 2 has no queue handlers, output is written directly there. Inside Maya console output
+        is written directly too, a listener thread would have to hand every record to the main thread.
+
         :return: Logger object
         :rtype: logging.Logger
         """
-        if not cls._logger_obj:
-            if cls.logger_exists():
-                cls._logger_obj = logging.getLogger(cls.LOGGER_NAME)
-            else:
-                cls._logger_obj = logging.getLogger(cls.LOGGER_NAME)
-                cls._logger_obj.setLevel(cls.LEVEL_DEFAULT)
-                fmt = logging.Formatter("[{0}][%(levelname)s] %(message)s".format(cls.LOGGER_NAME), datefmt="%d-%m-%Y %H:%M:%S")
-                stream_handler = logging.StreamHandler(sys.stderr)
-                stream_handler.setFormatter(fmt)
-                cls._logger_obj.addHandler(stream_handler)
+        if cls._logger_obj is not None:
+            return cls._logger_obj
+
+        lg = logging.getLogger(cls.LOGGER_NAME)
+        # Module reload leaves previous setup attached to the logger
+        previous_listener = getattr(lg, "_ds_listener", None)
+        if previous_listener is not None:
+            previous_listener.stop()
+        for handler in list(lg.handlers):
+            lg.removeHandler(handler)
+        for log_filter in list(lg.filters):
+            lg.removeFilter(log_filter)
+
+        lg.setLevel(cls.LEVEL_DEFAULT)
+        lg.propagate = 0
+        cls._dedup_filter = DedupFilter()
+        lg.addFilter(cls._dedup_filter)
+
+        fmt = logging.Formatter("[{0}][%(levelname)s] %(message)s".format(cls.LOGGER_NAME), datefmt="%d-%m-%Y %H:%M:%S")
+        stream_handler = StderrHandler()
+        stream_handler.setFormatter(fmt)
+        if maya_utils is not None:
+            lg.addHandler(stream_handler)
+            cls._handlers = []
+        else:
+            cls._handlers = [stream_handler]
+        cls._logger_obj = lg
+        cls._start_output()
+        return lg
 
-        cls._logger_obj.propagate = 0
+    @classmethod
+    def _start_output(cls):
+        lg = cls._logger_obj
+        if not hasattr(logging.handlers, "QueueListener"):
+            for handler in cls._handlers:
+                if handler not in lg.handlers:
+                    lg.addHandler(handler)
+            return
+
+        if not cls._handlers:
+            return
+        if cls._listener is not None:
+            cls._listener.stop()
+        else:
+            lg.addHandler(logging.handlers.QueueHandler(queue.Queue(-1)))
+        record_queue = next(handler for handler in lg.handlers if isinstance(handler, logging.handlers.QueueHandler)).queue
+        cls._listener = logging.handlers.QueueListener(record_queue, *cls._handlers, respect_handler_level=True)
+        cls._listener.start()
+        lg._ds_listener = cls._listener
+
+    @classmethod
+    def flush(cls):
+        """Wait until queued records are written"""
+        if cls._listener is not None:
+            cls._listener.stop()
+            cls._listener.start()
 
-        return cls._logger_obj
+    @classmethod
+    def shutdown(cls):
+        if cls._listener is not None:
+            cls._listener.stop()
+            cls._listener = None
+        for handler in cls._handlers:
+            handler.flush()
 
     @classmethod
     def logger_exists(cls):
@@ -48,9 +199,62 @@ class Logger:
         return cls.logger_obj().level
 
     @classmethod
-    def call_info(cls, message):
-        caller = inspect.getframeinfo(inspect.stack()[1][0])
-        message = "file: {0} function {1}() lineno:{2}-{3}".format(caller.filename, caller.function, caller.lineno, message)
+    def set_dedup(cls, max_repeats=3, rate_limit=100):
+        """Configure repeated message and rate limits, see DedupFilter"""
+        cls.logger_obj()
+        cls._dedup_filter.max_repeats = max_repeats
+        cls._dedup_filter.rate_limit = rate_limit
+
+    @classmethod
+    def log_summary(cls, level=logging.INFO):
+        """Log counts of messages dropped since the last summary and start counting again
+
+        :return: Number of dropped messages
+        :rtype: int
+        """
+        lg = cls.logger_obj()
+        suppressed = cls._dedup_filter.suppressed
+        rate_suppressed = cls._dedup_filter.rate_suppressed
+        cls._dedup_filter.reset()
+
+        for (_, message), count in sorted(suppressed.items(), key=lambda item: -item[1])[:cls.SUMMARY_LIMIT]:
+            lg.log(level, "Suppressed {0} repeats of: {1}".format(count, message))
+        total = sum(suppressed.values()) + rate_suppressed
+        if total:
+            lg.log(level, "Suppressed {0} messages in total, {1} over rate limit".format(total, rate_suppressed))
+        return total
+
+    @classmethod
+    def begin_batch(cls):
+        """Start dropping repeated messages, for batches that don't fit in a with block. Nested batches join the outer one"""
+        cls.logger_obj()
+        if not cls._batch_depth:
+            cls._dedup_filter.reset()
+            cls._dedup_filter.active = True
+        cls._batch_depth += 1
+
+    @classmethod
+    def end_batch(cls):
+        """Let all messages through again and log summary of the dropped ones
+
+        :return: Number of dropped messages, 0 for a nested batch
+        :rtype: int
+        """
+        cls._batch_depth = max(0, cls._batch_depth - 1)
+        if cls._batch_depth:
+            return 0
+        cls._dedup_filter.active = False
+        return cls.log_summary()
+
+    @classmethod
+    @contextlib.contextmanager
+    def batch(cls):
+        """Collect repeated messages of a batch and log their summary at its end, outside of batches every message is logged"""
+        cls.begin_batch()
+        try:
+            yield
+        finally:
+            cls.end_batch()
 
     @classmethod
     def debug(cls, msg, *args, **kwargs):
@@ -88,15 +292,19 @@ class Logger:
         lg.exception(msg, *args, **kwargs)
 
     @classmethod
-    def write_to_rotating_file(cls, path, level=logging.WARNING, mode="w", max_bytes=1024):
-        lg = cls.logger_obj()
-        if any([isinstance(handler, logging.handlers.RotatingFileHandler) for handler in lg.handlers]):
-            lg.warning("Rotating file hander already exists")
+    def write_to_rotating_file(cls, path, level=logging.WARNING, mode="a", max_bytes=10 * 1024 * 1024, backup_count=5):
+        cls.logger_obj()
+        if any([isinstance(handler, logging.handlers.RotatingFileHandler) for handler in cls._handlers]):
+            cls.warning("Rotating file hander already exists")
             return
 
-        rfile_hander = logging.handlers.RotatingFileHandler(path, mode=mode, maxBytes=max_bytes, backupCount=0, delay=0)
+        rfile_hander = logging.handlers.RotatingFileHandler(path, mode=mode, maxBytes=max_bytes, backupCount=backup_count, delay=1)
         rfile_hander.setLevel(level)
         fmt = logging.Formatter("[%(asctime)s][%(levelname)s] %(message)s")
         rfile_hander.setFormatter(fmt)
 
-        lg.addHandler(rfile_hander)
+        cls._handlers.append(rfile_hander)
+        cls._start_output()
+
+
+atexit.register(Logger.shutdown)
@@ -0,0 +1,366 @@
+"""Rename nodes of Maya ASCII files without Maya.
+
+Usage:
+    python -m dsRenamingTool.maFileFn asset.ma --name body --type mesh --auto-suffix -o asset_renamed.ma
+    python -m dsRenamingTool.maFileFn asset.ma --name ctrl --pattern "*_ctl" --aliases namingAliases.json
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+
+from dsRenamingTool import aliasFn
+from dsRenamingTool import indexFn
+from dsRenamingTool import renameFn
+from dsRenamingTool import sceneFn
+from dsRenamingTool.loggingFn import Logger
+
+
+# Lines are decoded as latin-1 so any byte sequence survives the round trip unchanged
+ENCODING = "latin-1"
+# Every Maya ASCII file starts with it, e.g. //Maya ASCII 2022 scene
+HEADER = b"//Maya ASCII"
+# Commands whose quoted arguments are all node or plug references
+REFERENCE_COMMANDS = ("connectAttr", "disconnectAttr", "parent")
+
+
+class MaFileScene(sceneFn.MemoryScene):
+    """Nodes created by a Maya ASCII file, built by a single scan of its createNode statements.
+
+    Only names, types and parenting are kept, memory depends on node count, not on file size.
+    """
+
+    NAME = "maFile"
+
+    _CREATE_NODE = re.compile(r'^createNode\s+(\S+)(.*);\s*$')
+    _NAME_FLAG = re.compile(r'-n\s+"([^"]*)"')
+    _PARENT_FLAG = re.compile(r'-p\s+"([^"]*)"')
+    _SHARED_FLAG = re.compile(r'(?:^|\s)-s(?:\s|$)')
+    _SELECT = re.compile(r'^select\s+-ne\s+([^;\s]+)\s*;')
+
+    def __init__(self):
+        super(MaFileScene, self).__init__()
+        self.shared = set()
+        self.external = set()
+
+    @classmethod
+    def fromFile(cls, path):
+        """Scan file createNode statements
+
+        :param path: Maya ASCII file path
+        :type path: str
+        :rtype: MaFileScene
+        :raises ValueError: File doesn't start with the Maya ASCII header
+        """
+        scene = cls()
+        with open(path, "rb") as maFile:
+            if maFile.read(len(HEADER)) != HEADER:
+                raise ValueError("Not a Maya ASCII file: {0}".format(path))
+            maFile.seek(0)
+            for line in iterStatementStarts(maFile):
+                scene.scanLine(line)
+        return scene
+
+    def scanLine(self, line):
+        match = self._CREATE_NODE.match(line)
+        if match:
+            nodeType, flags = match.groups()
+            nameMatch = self._NAME_FLAG.search(flags)
+            parentMatch = self._PARENT_FLAG.search(flags)
+            parent = self.resolvePath(parentMatch.group(1)) if parentMatch else None
+            node = self.createNode(nodeType, nameMatch.group(1) if nameMatch else None, parent=parent)
+            if self._SHARED_FLAG.search(flags):
+                self.shared.add(node)
+            return
+
+        # Default nodes like :time1 are never created by the file, their names are still taken
+        match = self._SELECT.match(line)
+        if match:
+            name = match.group(1).lstrip(":")
+            if not self.exists(name):
+                self.external.add(self.createNode("unknown", name))
+
+    def resolvePath(self, path):
+        """Get node from short name, partial or full DAG path
+
+        :rtype: int or None
+        """
+        components = path.lstrip("|").split("|")
+        for node in self.ls(components[-1]):
+            parent = self.parent(node)
+            matched = True
+            for component in reversed(components[:-1]):
+                if parent is None or self.nodeName(parent) != component:
+                    matched = False
+                    break
+                parent = self.parent(parent)
+            if matched and (not path.startswith("|") or parent is None):
+                return node
+
+        Logger.warning("Failed to resolve parent: {0}".format(path))
+        return None
+
+    def renamableNodes(self, patterns=None, nodeTypes=None):
+        """Nodes matching patterns and types that can be renamed safely by short name.
+
+        Shared nodes, default nodes and DAG nodes sharing their short name with another node are skipped.
+
+        :param patterns: Name wildcards, any name if not given
+        :type patterns: list, optional
+        :param nodeTypes: Node types, any type if not given
+        :type nodeTypes: list, optional
+        :return: Nodes in file order
+        :rtype: list[int]
+        """
+        if nodeTypes:
+            nodes = set()
+            for nodeType in nodeTypes:
+                nodes.update(self.ls(patterns, nodeType=nodeType))
+        else:
+            nodes = set(self.ls(patterns))
+
+        skipped = set(node for node in nodes if self.nodeName(node) in self._sharedNames)
+        if skipped:
+            Logger.warning("Skipped {0} nodes with non unique names".format(len(skipped)))
+        return sorted(nodes - skipped - self.shared - self.external)
+
+
+def iterStatementStarts(maFile):
+    """Decoded lines starting a statement, continuation lines of multi-line statements are skipped
+
+    :param maFile: File opened in binary mode
+    :rtype: generator
+    """
+    inStatement = False
+    for rawLine in maFile:
+        line = rawLine.decode(ENCODING)
+        if not inStatement:
+            yield line.strip()
+            # Comment lines like the file header don't end with a semicolon
+            if line.startswith("//"):
+                continue
+        inStatement = not line.rstrip().endswith(";")
+
+
+class ReferenceRewriter(object):
+    """Rewrites node references of file statements through an old name -> new name map."""
+
+    _QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"')
+    _COMMAND = re.compile(r'^\s*(\w+)')
+    _CREATE_FLAGS = re.compile(r'(-[np]\s+")([^"]*)(")')
+    _SELECT = re.compile(r'^(\s*select\s+-ne\s+)(:?)([^;\s]+)')
+
+    def __init__(self, nameMap):
+        """
+        :param nameMap: Short name map
+        :type nameMap: dict
+        """
+        self.nameMap = nameMap
+
+    def renameReference(self, reference):
+        """Rename every path component of a node, DAG path or plug reference"""
+        node, dot, attribute = reference.partition(".")
+        components = node.split("|")
+        renamed = [self.nameMap.get(component, component) for component in components]
+        if renamed == components:
+            return reference
+        return "|".join(renamed) + dot + attribute
+
+    def rewriteLine(self, line):
+        """Rewrite first line of a statement
+
+        :rtype: str
+        """
+        match = self._COMMAND.match(line)
+        if not match:
+            return line
+
+        command = match.group(1)
+        if command == "createNode":
+            return self._CREATE_FLAGS.sub(self._subQuoted, line)
+        if command in REFERENCE_COMMANDS:
+            return self._QUOTED.sub(lambda m: '"{0}"'.format(self.renameReference(m.group(1))), line)
+        if command == "relationship":
+            # First argument is the relationship kind
+            head, quoted, tail = self._splitFirstQuoted(line)
+            return head + quoted + self._QUOTED.sub(lambda m: '"{0}"'.format(self.renameReference(m.group(1))), tail)
+        if command == "setAttr":
+            # Only the plug can be a node reference, relative plugs start with a dot
+            head, quoted, tail = self._splitFirstQuoted(line)
+            if quoted and not quoted.startswith('".'):
+                quoted = '"{0}"'.format(self.renameReference(quoted[1:-1]))
+            return head + quoted + tail
+        if command == "select":
+            return self._SELECT.sub(lambda m: m.group(1) + m.group(2) + self.renameReference(m.group(3)), line)
+        return line
+
+    def _subQuoted(self, match):
+        return match.group(1) + self.renameReference(match.group(2)) + match.group(3)
+
+    def _splitFirstQuoted(self, line):
+        match = self._QUOTED.search(line)
+        if not match:
+            return line, "", ""
+        return line[:match.start()], match.group(), line[match.end():]
+
+
+def planFile(scene, newName, aliasesDict=None, patterns=None, nodeTypes=None, **renameOptions):
+    """Plan renames of a scanned file with the same rules as RenameUtils.planBatch
+
+    :param scene: Scanned file
+    :type scene: MaFileScene
+    :param aliasesDict: Node type to suffix map, default aliases if not given
+    :type aliasesDict: dict, optional
+    :return: Plan entries
+    :rtype: batchFn.RenameBatch
+    """
+    if aliasesDict is None:
+        aliasesDict = aliasFn.DEFAULT_SUFFIX_ALIASES
+    nodes = scene.renamableNodes(patterns, nodeTypes)
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+    plan = renameFn.RenameUtils.planBatch(nodes, newName, aliasesDict, nameIndex=nameIndex, scene=scene, **renameOptions)
+    return plan.changed()
+
+
+def rewriteFile(inputPath, outputPath, nameMap):
+    """Stream input file into output with node references renamed.
+
+    Output is written to a temporary file next to it and moved in place when complete,
+    so input and output can be the same file.
+
+    :return: Number of rewritten lines
+    :rtype: int
+    """
+    rewriter = ReferenceRewriter(nameMap)
+    outputDir = os.path.dirname(os.path.abspath(outputPath))
+    handle, tempPath = tempfile.mkstemp(prefix=".dsRenamingTool", suffix=".tmp", dir=outputDir)
+    rewritten = 0
+    try:
+        with os.fdopen(handle, "wb") as outputFile, open(inputPath, "rb") as inputFile:
+            inStatement = False
+            for rawLine in inputFile:
+                if not inStatement and nameMap:
+                    line = rawLine.decode(ENCODING)
+                    newLine = rewriter.rewriteLine(line)
+                    if newLine != line:
+                        rawLine = newLine.encode(ENCODING)
+                        rewritten += 1
+                if inStatement or not rawLine.startswith(b"//"):
+                    inStatement = not rawLine.rstrip().endswith(b";")
+                outputFile.write(rawLine)
+        replaceFile(tempPath, outputPath)
+    except BaseException:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        raise
+
+    return rewritten
+
+
+def replaceFile(sourcePath, targetPath):
+    """Atomically move file over target"""
+    if hasattr(os, "replace"):
+        os.replace(sourcePath, targetPath)
+        return
+    # Python 2 on Windows can't rename over an existing file
+    if os.name == "nt" and os.path.exists(targetPath):
+        os.remove(targetPath)
+    os.rename(sourcePath, targetPath)
+
+
+def renameFile(inputPath, newName, outputPath=None, aliasesDict=None, patterns=None, nodeTypes=None, dryRun=False, **renameOptions):
+    """Rename nodes of a Maya ASCII file.
+
+    File is read twice, first pass collects created nodes, second one streams the file
+    into the output rewriting node references.
+
+    :param inputPath: Maya ASCII file
+    :type inputPath: str
+    :param outputPath: Output file, input file is overwritten if not given
+    :type outputPath: str, optional
+    :param renameOptions: Keyword arguments of RenameUtils.planBatch
+    :return: Result record
+    :rtype: dict
+    """
+    scene = MaFileScene.fromFile(inputPath)
+    plan = planFile(scene, newName, aliasesDict=aliasesDict, patterns=patterns, nodeTypes=nodeTypes, **renameOptions)
+    outputPath = outputPath or inputPath
+    result = {"input": inputPath,
+              "output": outputPath,
+              "nodes": len(scene),
+              "renamed": len(plan),
+              "rewrittenLines": 0}
+    if dryRun:
+        result["renames"] = [[entry.oldName, entry.newName] for entry in plan]
+        return result
+
+    nameMap = dict((entry.oldName, entry.newName) for entry in plan)
+    result["rewrittenLines"] = rewriteFile(inputPath, outputPath, nameMap)
+    return result
+
+
+def loadAliases(path):
+    """Load aliases exported from the alias editor
+
+    :rtype: dict
+    """
+    with open(path, "r") as aliasFile:
+        return json.load(aliasFile)
+
+
+def addRenameArguments(parser):
+    """Add naming arguments shared by file level command line tools"""
+    parser.add_argument("--name", required=True, help="Base name")
+    parser.add_argument("--pattern", dest="patterns", action="append", help="Node name wildcard, can be repeated")
+    parser.add_argument("--type", dest="nodeTypes", action="append", help="Node type, can be repeated")
+    parser.add_argument("--prefix")
+    parser.add_argument("--suffix")
+    parser.add_argument("--auto-suffix", action="store_true")
+    parser.add_argument("--no-indexing", action="store_true")
+    parser.add_argument("--padding", type=int, default=1, help="Index padding, same as the dialog one")
+    parser.add_argument("--start", type=int, default=0, help="Start index")
+    parser.add_argument("--index-policy", choices=indexFn.NameIndex.POLICIES, default=indexFn.NameIndex.FILL_GAPS,
+                        help="Fill lowest free indices, append after the highest one or keep indices of already matching names")
+    parser.add_argument("--template", help="Naming template, e.g. \"{side}_{name}[_{index:03d}][_{suffix}]\"")
+    parser.add_argument("--aliases", help="Aliases JSON exported from the alias editor")
+
+
+def renameArguments(args):
+    """Convert parsed arguments to renameFile keyword arguments
+
+    :rtype: dict
+    """
+    return {"newName": args.name,
+            "aliasesDict": loadAliases(args.aliases) if args.aliases else None,
+            "patterns": args.patterns,
+            "nodeTypes": args.nodeTypes,
+            "prefix": args.prefix,
+            "suffix": args.suffix,
+            "autoSuffix": args.auto_suffix,
+            "indexing": not args.no_indexing,
+            "indexPadding": args.padding,
+            "startIndex": args.start,
+            "template": args.template,
+            "indexPolicy": args.index_policy}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rename nodes of Maya ASCII files")
+    parser.add_argument("input", help="Maya ASCII file")
+    parser.add_argument("-o", "--output", help="Output file, input is overwritten if not given")
+    parser.add_argument("--dry-run", action="store_true", help="Only print planned renames")
+    addRenameArguments(parser)
+    args = parser.parse_args(argv)
+    if not args.patterns and not args.nodeTypes:
+        parser.error("at least one --pattern or --type is required")
+
+    result = renameFile(args.input, outputPath=args.output, dryRun=args.dry_run, **renameArguments(args))
+    json.dump(result, sys.stdout, indent=4, sort_keys=True)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
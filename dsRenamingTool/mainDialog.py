@@ -1,12 +1,24 @@
 import os
 import json
+import re
+import traceback
 import pymel.core as pm
 import pymel.api as pma
+from maya.api import OpenMaya as om2
 from PySide2 import QtWidgets
 from PySide2 import QtCore
 
+from dsRenamingTool import aliasFn
 from dsRenamingTool import renameFn
+from dsRenamingTool import indexFn
+from dsRenamingTool import liveIndexFn
+from dsRenamingTool import mayaSceneFn
+from dsRenamingTool import planFn
 from dsRenamingTool import aliasesDialog
+from dsRenamingTool import previewWidget
+from dsRenamingTool import snapshotFn
+from dsRenamingTool import statsFn
+from dsRenamingTool import templateFn
 from dsRenamingTool.loggingFn import Logger
 from maya.app.general.mayaMixin import MayaQWidgetDockableMixin
 from shiboken2 import getCppPointer
@@ -24,6 +36,27 @@ def add_widget_to_layout(widget, control_name):
         pma.MQtUtil.addWidgetToMayaLayout(widgetPtr, workspaceControlPtr)
 
 
+class PlanThread(QtCore.QThread):
+    """Plans rename of a scene snapshot outside of the main thread, see snapshotFn"""
+
+    def __init__(self, snapshot, newName, renameOptions, generation=None, skipped=None, parent=None):
+        super(PlanThread, self).__init__(parent)
+        self.snapshot = snapshot
+        self.skipped = skipped or []
+        self.newName = newName
+        self.renameOptions = renameOptions
+        self.generation = generation
+        self.cancelled = False
+        self.plan = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.plan = snapshotFn.planSnapshot(self.snapshot, self.newName, **self.renameOptions)
+        except Exception:
+            self.error = traceback.format_exc()
+
+
 class Dialog(MayaQWidgetDockableMixin, QtWidgets.QWidget):
 
     WINDOW_TITLE = "dsRenaming Tool"
@@ -34,7 +67,20 @@ class Dialog(MayaQWidgetDockableMixin, QtWidgets.QWidget):
     DEFAULT_SETTINGS = {"autoSuffix": True,
                         "indexing": True,
                         "indexPadding": 1,
-                        "indexStart": 0}
+                        "indexStart": 0,
+                        "backend": mayaSceneFn.PymelScene.NAME,
+                        "hierarchy": False,
+                        "rollbackOnCancel": True,
+                        "preview": True,
+                        "logStats": False,
+                        "profileRename": False,
+                        "backgroundPlan": False,
+                        "template": templateFn.DEFAULT_TEMPLATE,
+                        "templates": [],
+                        "indexPolicy": indexFn.NameIndex.FILL_GAPS,
+                        "scope": indexFn.ScopedNameIndex.GLOBAL}
+    HIERARCHY_CHUNK_SIZE = 500
+    PREVIEW_DELAY = 150
 
     @classmethod
     def display(cls):
@@ -55,6 +101,12 @@ class Dialog(MayaQWidgetDockableMixin, QtWidgets.QWidget):
 
         self.setWindowTitle(self.WINDOW_TITLE)
         self.settings = self.loadSettings()
+        self.renameJob = None  # type: renameFn.ChunkedRename
+        self.planThread = None  # type: PlanThread
+        self._renameSteps = None
+        self._callbackIds = []
+        self._previewSelectionDirty = True
+        self.liveIndex = liveIndexFn.LiveNameIndex()
 
         self.workspaceControlName = "{0}WorkspaceControl".format(self.UI_NAME)
         add_widget_to_layout(self, self.workspaceControlName)
@@ -71,13 +123,31 @@ class Dialog(MayaQWidgetDockableMixin, QtWidgets.QWidget):
     def createActions(self):
         # Menubar
         self.menuBar = QtWidgets.QMenuBar(self)
+        fileMenu = self.menuBar.addMenu("&File")
         editMenu = self.menuBar.addMenu("&Edit")
 
         # Actions
+        self.exportPlanAction = QtWidgets.QAction("Export rename plan", self)
+        self.applyPlanAction = QtWidgets.QAction("Apply rename plan", self)
         self.editSuffixAliasesAction = QtWidgets.QAction("Suffix aliases", self)
+        self.logStatsAction = QtWidgets.QAction("Log rename stats", self)
+        self.profileRenameAction = QtWidgets.QAction("Profile rename", self)
+        self.backgroundPlanAction = QtWidgets.QAction("Plan in background", self)
+        self.backgroundPlanAction.setCheckable(True)
+        self.backgroundPlanAction.setChecked(self.settings.get("backgroundPlan", False))
+        self.logStatsAction.setCheckable(True)
+        self.profileRenameAction.setCheckable(True)
+        self.logStatsAction.setChecked(self.settings.get("logStats", False))
+        self.profileRenameAction.setChecked(self.settings.get("profileRename", False))
 
         # Populate menubar
+        fileMenu.addAction(self.exportPlanAction)
+        fileMenu.addAction(self.applyPlanAction)
         editMenu.addAction(self.editSuffixAliasesAction)
+        editMenu.addSeparator()
+        editMenu.addAction(self.logStatsAction)
+        editMenu.addAction(self.profileRenameAction)
+        editMenu.addAction(self.backgroundPlanAction)
 
     def createWidgets(self):
         self.baseNameLineEdit = QtWidgets.QLineEdit()
@@ -85,8 +155,28 @@ class Dialog(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         self.suffixLineEdit = QtWidgets.QLineEdit()
         self.autoSuffixCheckBox = QtWidgets.QCheckBox("Auto suffix")
         self.indexingCheckBox = QtWidgets.QCheckBox("Indexing")
+        self.hierarchyCheckBox = QtWidgets.QCheckBox("Hierarchy")
+        self.rollbackCheckBox = QtWidgets.QCheckBox("Rollback on cancel")
         self.indexPaddingSpinBox = QtWidgets.QSpinBox()
         self.startingIndexSpinBox = QtWidgets.QSpinBox()
+        self.backendComboBox = QtWidgets.QComboBox()
+        self.templateComboBox = QtWidgets.QComboBox()
+        self.indexPolicyComboBox = QtWidgets.QComboBox()
+        self.scopeComboBox = QtWidgets.QComboBox()
+        self.previewCheckBox = QtWidgets.QCheckBox("Preview")
+        self.searchLineEdit = QtWidgets.QLineEdit()
+        self.replaceLineEdit = QtWidgets.QLineEdit()
+        self.regexCheckBox = QtWidgets.QCheckBox("Regex")
+        self.replaceButton = QtWidgets.QPushButton("Replace")
+        self.previewModel = previewWidget.PreviewModel(self)
+        self.previewTable = previewWidget.PreviewTable()
+        self.previewTable.setModel(self.previewModel)
+        self.previewTimer = QtCore.QTimer(self)
+        self.previewTimer.setSingleShot(True)
+        self.previewTimer.setInterval(self.PREVIEW_DELAY)
+        self.progressBar = QtWidgets.QProgressBar()
+        self.progressLabel = QtWidgets.QLabel()
+        self.cancelButton = QtWidgets.QPushButton("Cancel")
         self.applyButton = QtWidgets.QPushButton("Apply")
         self.closeButton = QtWidgets.QPushButton("Close")
 
@@ -94,10 +184,39 @@ class Dialog(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         self.baseNameLineEdit.setPlaceholderText("Name")
         self.prefixLineEdit.setPlaceholderText("Prefix")
         self.suffixLineEdit.setPlaceholderText("Suffix")
+        self.searchLineEdit.setPlaceholderText("Search")
+        self.replaceLineEdit.setPlaceholderText("Replace")
         self.autoSuffixCheckBox.setChecked(self.settings.get("autoSuffix", True))
         self.indexingCheckBox.setChecked(self.settings.get("indexing", True))
         self.indexPaddingSpinBox.setValue(self.settings.get("indexPadding", 1))
         self.startingIndexSpinBox.setValue(self.settings.get("indexing", 0))
+        self.backendComboBox.addItems(sorted(mayaSceneFn.BACKENDS.keys()))
+        self.backendComboBox.setCurrentText(self.settings.get("backend", mayaSceneFn.PymelScene.NAME))
+        for policy, label in ((indexFn.NameIndex.FILL_GAPS, "Fill gaps"),
+                              (indexFn.NameIndex.APPEND, "Append"),
+                              (indexFn.NameIndex.KEEP_EXISTING, "Keep existing")):
+            self.indexPolicyComboBox.addItem(label, policy)
+        self.indexPolicyComboBox.setCurrentIndex(max(0, self.indexPolicyComboBox.findData(self.settings.get("indexPolicy", indexFn.NameIndex.FILL_GAPS))))
+        for scope, label in ((indexFn.ScopedNameIndex.GLOBAL, "Scene"),
+                             (indexFn.ScopedNameIndex.PARENT, "Siblings"),
+                             (indexFn.ScopedNameIndex.NAMESPACE, "Namespace")):
+            self.scopeComboBox.addItem(label, scope)
+        self.scopeComboBox.setCurrentIndex(max(0, self.scopeComboBox.findData(self.settings.get("scope", indexFn.ScopedNameIndex.GLOBAL))))
+        self.templateComboBox.setEditable(True)
+        self.templateComboBox.setInsertPolicy(QtWidgets.QComboBox.NoInsert)
+        self.templateComboBox.addItems(list(templateFn.PRESET_TEMPLATES) + self.settings.get("templates", []))
+        self.templateComboBox.setCurrentText(self.settings.get("template", templateFn.DEFAULT_TEMPLATE))
+        self.templateComboBox.setToolTip(templateFn.__doc__)
+        self.hierarchyCheckBox.setChecked(self.settings.get("hierarchy", False))
+        self.rollbackCheckBox.setChecked(self.settings.get("rollbackOnCancel", True))
+        self.rollbackCheckBox.setEnabled(self.hierarchyCheckBox.isChecked())
+        self.previewCheckBox.setChecked(self.settings.get("preview", True))
+        self.previewTable.setVisible(self.previewCheckBox.isChecked())
+        # Hierarchy is walked lazily, total is unknown so progress is shown as busy
+        self.progressBar.setRange(0, 0)
+        self.progressBar.hide()
+        self.progressLabel.hide()
+        self.cancelButton.hide()
         self.applyButton.setMinimumSize(70, 20)
         self.closeButton.setMinimumSize(70, 20)
 
@@ -105,6 +224,7 @@ class Dialog(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         mainLayout = QtWidgets.QVBoxLayout(self)
         renameLayout = QtWidgets.QHBoxLayout()
         optionsLayout = QtWidgets.QHBoxLayout()
+        replaceLayout = QtWidgets.QHBoxLayout()
         self.indexLayout = QtWidgets.QFormLayout()
         buttonsLayout = QtWidgets.QHBoxLayout()
 
@@ -116,11 +236,30 @@ class Dialog(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         # Populate options
         optionsLayout.addWidget(self.autoSuffixCheckBox)
         optionsLayout.addWidget(self.indexingCheckBox)
+        optionsLayout.addWidget(self.hierarchyCheckBox)
+        optionsLayout.addWidget(self.rollbackCheckBox)
+        optionsLayout.addWidget(self.previewCheckBox)
         optionsLayout.addStretch()
 
         # Populate index
         self.indexLayout.addRow("Index padding", self.indexPaddingSpinBox)
         self.indexLayout.addRow("Index start", self.startingIndexSpinBox)
+        self.indexLayout.addRow("Index policy", self.indexPolicyComboBox)
+        self.indexLayout.addRow("Unique among", self.scopeComboBox)
+        self.indexLayout.addRow("Template", self.templateComboBox)
+        self.indexLayout.addRow("Backend", self.backendComboBox)
+
+        # Search and replace
+        replaceLayout.addWidget(self.searchLineEdit)
+        replaceLayout.addWidget(self.replaceLineEdit)
+        replaceLayout.addWidget(self.regexCheckBox)
+        replaceLayout.addWidget(self.replaceButton)
+
+        # Populate progress
+        progressLayout = QtWidgets.QHBoxLayout()
+        progressLayout.addWidget(self.progressBar)
+        progressLayout.addWidget(self.progressLabel)
+        progressLayout.addWidget(self.cancelButton)
 
         # Populate buttons
         buttonsLayout.addStretch()
@@ -131,7 +270,10 @@ class Dialog(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         mainLayout.addLayout(renameLayout)
         mainLayout.addLayout(optionsLayout)
         mainLayout.addLayout(self.indexLayout)
+        mainLayout.addLayout(replaceLayout)
+        mainLayout.addWidget(self.previewTable, 1)
         mainLayout.addStretch()
+        mainLayout.addLayout(progressLayout)
         mainLayout.addLayout(buttonsLayout)
         mainLayout.setSpacing(10)
         mainLayout.setContentsMargins(5, 25, 5, 5)
@@ -140,42 +282,412 @@ class Dialog(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         self.closeButton.clicked.connect(self.hide)
         self.indexingCheckBox.toggled.connect(self.indexPaddingSpinBox.setEnabled)
         self.indexingCheckBox.toggled.connect(self.startingIndexSpinBox.setEnabled)
+        self.indexingCheckBox.toggled.connect(self.indexPolicyComboBox.setEnabled)
         self.editSuffixAliasesAction.triggered.connect(self.editSuffixAliases)
+        self.exportPlanAction.triggered.connect(self.exportPlan)
+        self.logStatsAction.toggled.connect(self.setStatsEnabled)
+        self.setStatsEnabled(self.logStatsAction.isChecked())
+        self.applyPlanAction.triggered.connect(self.applyPlanFile)
+        self.hierarchyCheckBox.toggled.connect(self.rollbackCheckBox.setEnabled)
         self.applyButton.clicked.connect(self.rename)
+        self.replaceButton.clicked.connect(self.searchReplace)
+        self.cancelButton.clicked.connect(self.cancelRename)
+
+        # Preview
+        self.previewTimer.timeout.connect(self.updatePreview)
+        self.previewCheckBox.toggled.connect(self.previewTable.setVisible)
+        self.previewCheckBox.toggled.connect(self.schedulePreview)
+        for lineEdit in (self.prefixLineEdit, self.baseNameLineEdit, self.suffixLineEdit):
+            lineEdit.textChanged.connect(self.schedulePreview)
+        for checkBox in (self.autoSuffixCheckBox, self.indexingCheckBox):
+            checkBox.toggled.connect(self.schedulePreview)
+        for spinBox in (self.indexPaddingSpinBox, self.startingIndexSpinBox):
+            spinBox.valueChanged.connect(self.schedulePreview)
+        self.templateComboBox.currentTextChanged.connect(self.schedulePreview)
+        self.indexPolicyComboBox.currentIndexChanged.connect(self.schedulePreview)
+        self.scopeComboBox.currentIndexChanged.connect(self.schedulePreview)
+        self.backendComboBox.currentTextChanged.connect(self.onSelectionChanged)
 
         # Settings changed
         self.closeEventTriggered.connect(self.saveSettings)
 
+    def renameOptions(self):
+        """Current naming options as RenameUtils.planBatch keyword arguments
+
+        :rtype: dict
+        """
+        return {"prefix": self.prefixLineEdit.text(),
+                "suffix": self.suffixLineEdit.text(),
+                "autoSuffix": self.autoSuffixCheckBox.isChecked(),
+                "indexing": self.indexingCheckBox.isChecked(),
+                "indexPadding": self.indexPaddingSpinBox.value(),
+                "startIndex": self.startingIndexSpinBox.value(),
+                "template": self.template(),
+                "indexPolicy": self.indexPolicyComboBox.currentData(),
+                "scope": self.scopeComboBox.currentData()}
+
+    def template(self):
+        """Current naming template, None if empty or invalid
+
+        :rtype: templateFn.Template or None
+        """
+        text = self.templateComboBox.currentText().strip()
+        if not text:
+            return None
+        try:
+            return templateFn.compileTemplate(text)
+        except ValueError:
+            return None
+
+    def checkTemplate(self):
+        """Warn about invalid template and remember valid custom ones
+
+        :rtype: bool
+        """
+        text = self.templateComboBox.currentText().strip()
+        try:
+            templateFn.compileTemplate(text)
+        except ValueError as e:
+            Logger.warning("Invalid naming template: {0}".format(e))
+            return False
+        if text and self.templateComboBox.findText(text) < 0:
+            self.templateComboBox.addItem(text)
+        return True
+
     def rename(self):
-        sel = pm.ls(sl=1, r=1)
-        tempList = []
-        aliasesDict = json.loads(pm.optionVar.get("dsRenamingToolSuffixAliases", json.dumps(aliasesDialog.AliasDialog.DEFAULT_SUFFIX_ALIASES, sort_keys=True)))
-        for each in sel:
-            tempList.append(renameFn.RenameUtils.rename(each,
-                                                        "tempName",
-                                                        aliasesDict,
-                                                        prefix="NULL",
-                                                        suffix="NULL",
-                                                        autoSuffix=False,
-                                                        indexing=True,
-                                                        indexPadding=0,
-                                                        startIndex=0))
-        for each in tempList:
-            renameFn.RenameUtils.rename(each,
-                                        self.baseNameLineEdit.text(),
-                                        aliasesDict,
-                                        prefix=self.prefixLineEdit.text(),
-                                        suffix=self.suffixLineEdit.text(),
-                                        autoSuffix=self.autoSuffixCheckBox.isChecked(),
-                                        indexing=self.indexingCheckBox.isChecked(),
-                                        indexPadding=self.indexPaddingSpinBox.value(),
-                                        startIndex=self.startingIndexSpinBox.value())
+        if self.renameJob is not None or self.planThread is not None or not self.checkTemplate():
+            return
+
+        # Per node warnings of big batches are collapsed into a summary
+        with Logger.batch():
+            if self.profileRenameAction.isChecked():
+                with statsFn.profile():
+                    self.renameSelection()
+            else:
+                self.renameSelection()
+
+    def renameSelection(self):
+        stats = statsFn.RenameStats.instance()
+        stats.reset()
+        with stats.timer("selection"):
+            scene = mayaSceneFn.getBackend(self.backendComboBox.currentText())
+            sel = scene.selection()
+        with stats.timer("index"):
+            nameIndex = self.sceneNameIndex(scene)
+        aliasesDict = aliasFn.AliasStore.instance()
+        if self.hierarchyCheckBox.isChecked():
+            self.startHierarchyRename(sel, aliasesDict, nameIndex, scene)
+            return
+        if self.backgroundPlanAction.isChecked():
+            self.startBackgroundPlan(sel, aliasesDict, nameIndex, scene)
+            return
+
+        with self.liveIndex.suspended():
+            report = renameFn.RenameUtils.renameBatch(sel,
+                                                      self.baseNameLineEdit.text(),
+                                                      aliasesDict,
+                                                      nameIndex=nameIndex,
+                                                      scene=scene,
+                                                      **self.renameOptions())
+        report.log()
+        if stats.enabled:
+            stats.log()
+        self.onSelectionChanged()
+
+    @QtCore.Slot(bool)
+    def setStatsEnabled(self, enabled):
+        if enabled:
+            statsFn.RenameStats.instance().enable()
+        else:
+            statsFn.RenameStats.instance().disable()
+
+    def planSelection(self, sel, nameIndex, scene):
+        """Plan rename of selection with current options
+
+        :rtype: batchFn.RenameBatch
+        """
+        return renameFn.RenameUtils.planBatch(sel,
+                                              self.baseNameLineEdit.text(),
+                                              aliasFn.AliasStore.instance(),
+                                              nameIndex=nameIndex,
+                                              scene=scene,
+                                              **self.renameOptions())
+
+    def exportPlan(self):
+        if not self.checkTemplate():
+            return
+        exportPath = QtWidgets.QFileDialog.getSaveFileName(self, "Export rename plan", "/home/renamePlan.jsonl",
+                                                           "Rename plans (*.jsonl *.json)")[0]
+        if not exportPath:
+            return
+
+        scene = mayaSceneFn.getBackend(self.backendComboBox.currentText())
+        sel = scene.selection()
+        if self.hierarchyCheckBox.isChecked():
+            sel = list(renameFn.RenameUtils.iterHierarchy(sel, scene=scene))
+        # Exported plan isn't applied, names it claims must not stay in the scene index
+        nameIndex = self.sceneNameIndex(scene).overlay()
+        plan = self.planSelection(sel, nameIndex, scene)
+        try:
+            count = planFn.writePlan(plan, exportPath, scene=scene)
+            Logger.info("Exported rename plan of {0} nodes to: {1}".format(count, exportPath))
+        except IOError:
+            Logger.error("Failed to export rename plan", exc_info=1)
+
+    def applyPlanFile(self):
+        if self.renameJob is not None:
+            return
+        importPath = QtWidgets.QFileDialog.getOpenFileName(self, "Apply rename plan", "/home/", "Rename plans (*.jsonl *.json)")[0]
+        if not importPath:
+            return
+
+        scene = mayaSceneFn.getBackend(self.backendComboBox.currentText())
+        nameIndex = self.sceneNameIndex(scene)
+        try:
+            report = planFn.dryRun(planFn.iterPlanFile(importPath, scene=scene), nameIndex=nameIndex, scene=scene)
+            planFn.logReport(report)
+            if report["collisions"] and not self.confirmCollisions(len(report["collisions"])):
+                Logger.info("Rename plan not applied")
+                return
+            with self.liveIndex.suspended():
+                counts = planFn.applyPlanFile(importPath, nameIndex=nameIndex, scene=scene)
+        except renameFn.RenameError as e:
+            Logger.error("Failed to apply rename plan, {0} renames rolled back: {1}".format(e.rolledBack, e))
+            return
+        except (IOError, ValueError):
+            Logger.error("Failed to apply rename plan: {0}".format(importPath), exc_info=1)
+            return
+        Logger.info("Applied rename plan, {renamed} renamed, {unchanged} unchanged, {missing} missing, {skipped} skipped, {collisions} collisions".format(**counts))
+        self.onSelectionChanged()
+
+    def confirmCollisions(self, count):
+        answer = QtWidgets.QMessageBox.question(self,
+                                                "Apply rename plan",
+                                                "{0} planned names are taken by nodes outside of the plan, Maya will make them unique.\nApply anyway?".format(count),
+                                                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+                                                QtWidgets.QMessageBox.No)
+        return answer == QtWidgets.QMessageBox.Yes
+
+    def searchReplace(self):
+        if self.renameJob is not None:
+            return
+        if not self.searchLineEdit.text():
+            Logger.warning("No search string was specified")
+            return
+
+        try:
+            rule = renameFn.RewriteRule.replace(self.searchLineEdit.text(),
+                                                self.replaceLineEdit.text(),
+                                                regex=self.regexCheckBox.isChecked())
+        except re.error as e:
+            Logger.warning("Invalid search pattern: {0}".format(e))
+            return
+
+        scene = mayaSceneFn.getBackend(self.backendComboBox.currentText())
+        sel = scene.selection()
+        if self.hierarchyCheckBox.isChecked():
+            sel = list(renameFn.RenameUtils.iterHierarchy(sel, scene=scene))
+        nameIndex = self.sceneNameIndex(scene)
+        total = len(sel)
+        sel, skipped = renameFn.RenameUtils.checkNodes(sel, scene=scene)
+        with self.liveIndex.suspended():
+            plan = renameFn.NameRewriter([rule]).planBatch(sel, nameIndex=nameIndex, scene=scene)
+            report = renameFn.RenameUtils.applyTransaction(plan, nameIndex=nameIndex, scene=scene, skipped=skipped)
+        if report.failed or report.skipped:
+            report.log()
+        if not report.failed:
+            Logger.info("Replaced in {0} of {1} names".format(len(plan), total))
+        self.onSelectionChanged()
+
+    def startHierarchyRename(self, roots, aliasesDict, nameIndex, scene):
+        if not self.baseNameLineEdit.text():
+            Logger.warning("No name was specified")
+            return
+
+        self.renameJob = renameFn.ChunkedRename(renameFn.RenameUtils.iterHierarchy(roots, scene=scene),
+                                                self.baseNameLineEdit.text(),
+                                                aliasesDict,
+                                                chunkSize=self.HIERARCHY_CHUNK_SIZE,
+                                                rollbackOnCancel=self.rollbackCheckBox.isChecked(),
+                                                nameIndex=nameIndex,
+                                                scene=scene,
+                                                **self.renameOptions())
+        self._renameSteps = self.renameJob.steps()
+        # Chunks run over several event loop passes, repeated messages are collected until the job finishes
+        Logger.begin_batch()
+        self.applyButton.setEnabled(False)
+        self.progressLabel.setText("Renamed 0")
+        self.progressBar.show()
+        self.progressLabel.show()
+        self.cancelButton.show()
+        QtCore.QTimer.singleShot(0, self.renameStep)
+
+    @QtCore.Slot()
+    def renameStep(self):
+        # One chunk per event loop pass keeps UI responsive and lets Cancel through
+        try:
+            with self.liveIndex.suspended():
+                renamed = next(self._renameSteps)
+        except StopIteration:
+            self.finishHierarchyRename()
+            return
+        except renameFn.RenameError as e:
+            self.finishHierarchyRename(error=e)
+            return
+        except Exception:
+            Logger.exception("Hierarchy rename failed")
+            self.finishHierarchyRename()
+            return
+
+        self.progressLabel.setText("Renamed {0}".format(renamed))
+        QtCore.QTimer.singleShot(0, self.renameStep)
+
+    @QtCore.Slot()
+    def cancelRename(self):
+        if self.renameJob is not None:
+            self.renameJob.cancel()
+        if self.planThread is not None:
+            # Thread can't be interrupted, its plan is dropped when it finishes
+            self.planThread.cancelled = True
+
+    def startBackgroundPlan(self, sel, aliasesDict, nameIndex, scene):
+        if not self.baseNameLineEdit.text():
+            Logger.warning("No name was specified")
+            return
+
+        options = self.renameOptions()
+        sel, skipped = renameFn.RenameUtils.checkNodes(sel, scene=scene)
+        with statsFn.RenameStats.instance().timer("snapshot"):
+            snapshot = snapshotFn.SceneSnapshot.capture(scene, sel, aliasesDict=aliasesDict, nameIndex=nameIndex,
+                                                        autoSuffix=options["autoSuffix"], scope=options["scope"])
+        generation = self.liveIndex.generation if self.liveIndex.running else None
+        self.planThread = PlanThread(snapshot, self.baseNameLineEdit.text(), options, generation=generation, skipped=skipped, parent=self)
+        self.planThread.finished.connect(self.finishBackgroundPlan)
+        self.applyButton.setEnabled(False)
+        self.progressLabel.setText("Planning {0} nodes".format(len(snapshot)))
+        self.progressBar.show()
+        self.progressLabel.show()
+        self.cancelButton.show()
+        self.planThread.start()
+
+    @QtCore.Slot()
+    def finishBackgroundPlan(self):
+        thread = self.planThread
+        self.planThread = None
+        self.applyButton.setEnabled(True)
+        self.progressBar.hide()
+        self.progressLabel.hide()
+        self.cancelButton.hide()
+        thread.deleteLater()
+        if thread.cancelled:
+            Logger.info("Rename cancelled while planning")
+            return
+        if thread.error:
+            Logger.error("Background planning failed:\n{0}".format(thread.error))
+            return
+
+        scene = thread.snapshot.source
+        nameIndex = self.sceneNameIndex(scene)
+        plan = thread.plan
+        skipped = thread.skipped
+        replanned = False
+        if thread.generation is None or not self.liveIndex.running or thread.generation != self.liveIndex.generation:
+            # Scene changed while planning, plan is only kept if it still applies as is
+            report = planFn.dryRun(plan, nameIndex=nameIndex, scene=scene)
+            if report["missing"] or report["stale"] or report["collisions"]:
+                planFn.logReport(report)
+                Logger.warning("Scene changed while planning, planning again")
+                nodes = [node for node in thread.snapshot.nodes if scene.nodeExists(node)]
+                # Nodes could have been locked or referenced meanwhile too
+                nodes, newSkipped = renameFn.RenameUtils.checkNodes(nodes, scene=scene)
+                skipped = skipped + newSkipped
+                plan = self.planSelection(nodes, nameIndex, scene)
+                replanned = True
+
+        with Logger.batch(), self.liveIndex.suspended():
+            if not replanned:
+                # Plan was made with a copy of the index, scene index still holds the old names
+                renameFn.RenameUtils.claimPlan(plan, nameIndex)
+            report = renameFn.RenameUtils.applyTransaction(plan, nameIndex=nameIndex, scene=scene, skipped=skipped)
+        report.log()
+        if statsFn.RenameStats.instance().enabled:
+            statsFn.RenameStats.instance().log()
+        self.onSelectionChanged()
+
+    def finishHierarchyRename(self, error=None):
+        if self.renameJob.cancelled:
+            Logger.info("Hierarchy rename cancelled, {0} nodes renamed".format(self.renameJob.renamed))
+        else:
+            report = renameFn.RenameReport(self.renameJob.skipped)
+            report.renamed = self.renameJob.renamed
+            report.error = error
+            report.log()
+        if statsFn.RenameStats.instance().enabled:
+            statsFn.RenameStats.instance().log()
+        Logger.end_batch()
+        self.renameJob = None
+        self._renameSteps = None
+        self.onSelectionChanged()
+        self.applyButton.setEnabled(True)
+        self.progressBar.hide()
+        self.progressLabel.hide()
+        self.cancelButton.hide()
+
+    # Preview
+    def onSelectionChanged(self, *args):
+        self._previewSelectionDirty = True
+        self.schedulePreview()
+
+    @QtCore.Slot()
+    def schedulePreview(self, *args):
+        # Restarting the timer debounces bursts of edits into one update
+        if self.previewCheckBox.isChecked():
+            self.previewTimer.start()
+
+    @QtCore.Slot()
+    def updatePreview(self):
+        if not self.previewCheckBox.isChecked() or not self.isVisible():
+            return
+
+        if self._previewSelectionDirty:
+            scene = mayaSceneFn.getBackend(self.backendComboBox.currentText())
+            self.previewModel.setSelection(scene.selection(), scene, self.sceneNameIndex(scene), aliasFn.AliasStore.instance())
+            self._previewSelectionDirty = False
+        self.previewModel.setOptions(self.baseNameLineEdit.text(), self.renameOptions())
+
+    def sceneNameIndex(self, scene):
+        """Index of scene names, maintained by callbacks while the dialog is shown
+
+        :rtype: indexFn.NameIndex
+        """
+        if self.liveIndex.running:
+            return self.liveIndex.index()
+        return indexFn.NameIndex.fromScene(scene)
+
+    def registerCallbacks(self):
+        if self._callbackIds:
+            return
+        self._callbackIds.append(om2.MEventMessage.addEventCallback("SelectionChanged", self.onSelectionChanged))
+        self.liveIndex.start()
+
+    def removeCallbacks(self):
+        for callbackId in self._callbackIds:
+            om2.MMessage.removeCallback(callbackId)
+        self._callbackIds = []
+        self.liveIndex.stop()
 
     def editSuffixAliases(self):
         editDialog = aliasesDialog.AliasDialog(parent=self)
         editDialog.show()
 
+    def showEvent(self, e):
+        super(Dialog, self).showEvent(e)
+        self.registerCallbacks()
+        self.onSelectionChanged()
+
     def hideEvent(self, e):
+        self.cancelRename()
+        self.removeCallbacks()
         self.saveSettings()
 
     def dockCloseEventTriggered(self):
@@ -199,7 +711,19 @@ class Dialog(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         self.settings = {"indexing": self.indexingCheckBox.isChecked(),
                          "indexStart": self.startingIndexSpinBox.value(),
                          "autoSuffix": self.autoSuffixCheckBox.isChecked(),
-                         "indexPadding": self.indexPaddingSpinBox.value()}
+                         "indexPadding": self.indexPaddingSpinBox.value(),
+                         "backend": self.backendComboBox.currentText(),
+                         "hierarchy": self.hierarchyCheckBox.isChecked(),
+                         "rollbackOnCancel": self.rollbackCheckBox.isChecked(),
+                         "preview": self.previewCheckBox.isChecked(),
+                         "logStats": self.logStatsAction.isChecked(),
+                         "profileRename": self.profileRenameAction.isChecked(),
+                         "backgroundPlan": self.backgroundPlanAction.isChecked(),
+                         "indexPolicy": self.indexPolicyComboBox.currentData(),
+                         "scope": self.scopeComboBox.currentData(),
+                         "template": self.templateComboBox.currentText(),
+                         "templates": [self.templateComboBox.itemText(i) for i in range(self.templateComboBox.count())
+                                       if self.templateComboBox.itemText(i) not in templateFn.PRESET_TEMPLATES]}
         pm.optionVar["dsRiggingRenamingToolSettings"] = json.dumps(self.settings, sort_keys=True)
         return 1
 
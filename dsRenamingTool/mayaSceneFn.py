@@ -0,0 +1,357 @@
+import contextlib
+import os
+from maya import cmds
+from maya.api import OpenMaya as om2
+from dsRenamingTool import sceneFn
+from dsRenamingTool.loggingFn import Logger
+
+# pymel takes seconds to import, it is loaded by the first PymelScene
+pm = None
+
+
+def _loadPymel():
+    global pm
+    if pm is None:
+        import pymel.core
+        pm = pymel.core
+    return pm
+
+
+def _renameBlockers(names):
+    # Three queries for the whole batch, lockNode keeps input order, ls results are matched by name
+    locked = cmds.lockNode(names, q=1, lock=1) or [False] * len(names)
+    referenced = set(cmds.ls(names, referencedNodes=1, long=1) or [])
+    readOnly = set(cmds.ls(names, readOnly=1, long=1) or [])
+    blockers = []
+    for name, isLocked in zip(names, locked):
+        if isLocked:
+            blockers.append(sceneFn.SceneBase.LOCKED)
+        elif name in referenced:
+            blockers.append(sceneFn.SceneBase.REFERENCED)
+        elif name in readOnly:
+            blockers.append(sceneFn.SceneBase.READ_ONLY)
+        else:
+            blockers.append(None)
+    return blockers
+
+
+class PymelScene(sceneFn.SceneBase):
+    """Scene access through pymel, every rename is a separate command inside one undo chunk."""
+
+    NAME = "pymel"
+
+    def __init__(self):
+        _loadPymel()
+
+    def selection(self):
+        return pm.ls(sl=1, r=1)
+
+    def nodeName(self, node):
+        return node.nodeName()
+
+    def nodeKey(self, node):
+        return cmds.ls(node.name(), uuid=1)[0]
+
+    def nodeFromKey(self, key):
+        # Nodes of the same file referenced twice share UUIDs
+        names = cmds.ls(key, long=1) or []
+        return pm.PyNode(names[0]) if len(names) == 1 else None
+
+    def nodeExists(self, node):
+        return node.exists()
+
+    def nodeType(self, node):
+        return pm.objectType(node)
+
+    def renameBlockers(self, nodes):
+        if not nodes:
+            return []
+        return _renameBlockers([node.longName() if isinstance(node, pm.nt.DagNode) else node.name() for node in nodes])
+
+    def children(self, node):
+        return pm.listRelatives(node, c=1)
+
+    def parent(self, node):
+        if not isinstance(node, pm.nt.DagNode):
+            return None
+        return node.getParent()
+
+    def nodeTypes(self, nodes):
+        if not nodes:
+            return []
+        longNames = [node.longName() if isinstance(node, pm.nt.DagNode) else node.name() for node in nodes]
+        return self._typesByName(longNames)
+
+    def firstChildTypes(self, nodes):
+        if not nodes:
+            return []
+        longNames = [node.longName() for node in nodes]
+        # Full paths keep the parent of every child, first one listed per parent is the first child
+        firstChildren = {}
+        for child in cmds.listRelatives(longNames, c=1, fullPath=1) or []:
+            parentPath = child.rsplit("|", 1)[0]
+            firstChildren.setdefault(parentPath, child)
+        childTypes = self._typesByName(list(firstChildren.values()))
+        typeMap = dict(zip(firstChildren.keys(), childTypes))
+        return [typeMap.get(longName) for longName in longNames]
+
+    @staticmethod
+    def _typesByName(names):
+        # ls doesn't guarantee input order, map results back by name
+        result = cmds.ls(names, long=1, showType=1) or []
+        typeMap = dict(zip(result[::2], result[1::2]))
+        return [typeMap.get(name) for name in names]
+
+    def typeAncestry(self, nodeType):
+        return cmds.nodeType(nodeType, inherited=1, isTypeName=1) or [nodeType]
+
+    def exists(self, name):
+        return pm.objExists(name)
+
+    def ls(self, patterns=None, nodeType=None):
+        kwargs = {"type": nodeType} if nodeType else {}
+        if patterns:
+            return pm.ls(patterns, **kwargs)
+        return pm.ls(**kwargs)
+
+    def listNames(self, patterns=None):
+        # Plain strings are much cheaper than wrapping every scene node into a PyNode
+        if patterns:
+            return cmds.ls(patterns, sn=1) or []
+        return cmds.ls(sn=1) or []
+
+    def rename(self, node, name):
+        pm.rename(node, name)
+        return node.nodeName()
+
+    @contextlib.contextmanager
+    def batch(self):
+        pm.undoInfo(openChunk=1)
+        try:
+            yield self
+        finally:
+            pm.undoInfo(closeChunk=1)
+
+    undoChunk = batch
+
+
+class ApiScene(sceneFn.SceneBase):
+    """Scene access through OpenMaya 2.
+
+    Nodes are MObjectHandles. Renames made inside batch() are queued on a single MDGModifier
+    and executed with one doIt() through the modifier command, so the whole batch is one undo step.
+    """
+
+    NAME = "api"
+    _pendingModifiers = []
+
+    def __init__(self):
+        self._modifier = None  # type: om2.MDGModifier
+
+    @classmethod
+    def popPendingModifier(cls):
+        return cls._pendingModifiers.pop(0)
+
+    def selection(self):
+        selList = om2.MGlobal.getActiveSelectionList()
+        return [om2.MObjectHandle(selList.getDependNode(i)) for i in range(selList.length())]
+
+    def nodeName(self, node):
+        return om2.MFnDependencyNode(node.object()).name()
+
+    def nodeId(self, node):
+        return node.hashCode()
+
+    def nodeKey(self, node):
+        return om2.MFnDependencyNode(node.object()).uuid().asString()
+
+    def nodeFromKey(self, key):
+        selList = om2.MSelectionList()
+        try:
+            selList.add(om2.MUuid(key))
+        except (RuntimeError, ValueError):
+            return None
+        if selList.length() != 1:
+            return None
+        return om2.MObjectHandle(selList.getDependNode(0))
+
+    def nodeExists(self, node):
+        return node.isValid() and node.isAlive()
+
+    def nodeType(self, node):
+        return om2.MFnDependencyNode(node.object()).typeName
+
+    def renameBlockers(self, nodes):
+        if not nodes:
+            return []
+        names = []
+        for node in nodes:
+            mobj = node.object()
+            if mobj.hasFn(om2.MFn.kDagNode):
+                names.append(om2.MFnDagNode(mobj).fullPathName())
+            else:
+                names.append(om2.MFnDependencyNode(mobj).name())
+        return _renameBlockers(names)
+
+    def children(self, node):
+        mobj = node.object()
+        if not mobj.hasFn(om2.MFn.kDagNode):
+            return []
+        dagFn = om2.MFnDagNode(mobj)
+        return [om2.MObjectHandle(dagFn.child(i)) for i in range(dagFn.childCount())]
+
+    def parent(self, node):
+        mobj = node.object()
+        if not mobj.hasFn(om2.MFn.kDagNode):
+            return None
+        parent = om2.MFnDagNode(mobj).parent(0)
+        if parent.hasFn(om2.MFn.kWorld):
+            return None
+        return om2.MObjectHandle(parent)
+
+    def typeAncestry(self, nodeType):
+        return cmds.nodeType(nodeType, inherited=1, isTypeName=1) or [nodeType]
+
+    def exists(self, name):
+        return cmds.objExists(name)
+
+    def ls(self, patterns=None, nodeType=None):
+        kwargs = {"type": nodeType} if nodeType else {}
+        if patterns:
+            names = cmds.ls(patterns, long=1, **kwargs)
+        else:
+            names = cmds.ls(long=1, **kwargs)
+        if not names:
+            return []
+
+        selList = om2.MSelectionList()
+        for name in names:
+            selList.add(name)
+        return [om2.MObjectHandle(selList.getDependNode(i)) for i in range(selList.length())]
+
+    def listNames(self, patterns=None):
+        if patterns:
+            return cmds.ls(patterns, sn=1) or []
+        return cmds.ls(sn=1) or []
+
+    def rename(self, node, name):
+        """Rename node, inside of a batch the rename is queued and name returned as requested."""
+        if self._modifier is not None:
+            self._modifier.renameNode(node.object(), name)
+            return name
+
+        with self.batch():
+            self._modifier.renameNode(node.object(), name)
+        return self.nodeName(node)
+
+    @contextlib.contextmanager
+    def batch(self):
+        if self._modifier is not None:
+            yield self
+            return
+
+        self._modifier = om2.MDGModifier()
+        try:
+            yield self
+            modifier = self._modifier
+            self._modifier = None
+            self._execute(modifier)
+        finally:
+            self._modifier = None
+
+    @contextlib.contextmanager
+    def undoChunk(self):
+        cmds.undoInfo(openChunk=1)
+        try:
+            yield self
+        finally:
+            cmds.undoInfo(closeChunk=1)
+
+    @classmethod
+    def _execute(cls, modifier):
+        if cls.loadCommand():
+            cls._pendingModifiers.append(modifier)
+            getattr(cmds, ApplyModifierCmd.COMMAND_NAME)()
+        else:
+            Logger.warning("Failed to load {0} command, batch won't be undoable".format(ApplyModifierCmd.COMMAND_NAME))
+            ApplyModifierCmd.doModifier(modifier)
+
+    @classmethod
+    def loadCommand(cls):
+        if hasattr(cmds, ApplyModifierCmd.COMMAND_NAME):
+            return True
+        try:
+            cmds.loadPlugin(os.path.splitext(__file__)[0] + ".py", quiet=1)
+        except RuntimeError:
+            return False
+        return hasattr(cmds, ApplyModifierCmd.COMMAND_NAME)
+
+
+BACKENDS = {PymelScene.NAME: PymelScene,
+            ApiScene.NAME: ApiScene}
+
+
+def getBackend(name=PymelScene.NAME):
+    """Get scene access backend by name, falls back to pymel for unknown names
+
+    :param name: Backend name, one of BACKENDS keys
+    :type name: str
+    :rtype: sceneFn.SceneBase
+    """
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        Logger.warning("Unknown scene backend: {0}, using {1}".format(name, PymelScene.NAME))
+        return PymelScene()
+
+
+# Modifier command, this module doubles as a plugin providing it
+maya_useNewAPI = True
+
+
+class ApplyModifierCmd(om2.MPxCommand):
+    """Executes the pending modifier of ApiScene and keeps it for undo."""
+
+    COMMAND_NAME = "dsRenamingToolApplyModifier"
+
+    def __init__(self):
+        super(ApplyModifierCmd, self).__init__()
+        self._modifier = None
+
+    @staticmethod
+    def creator():
+        return ApplyModifierCmd()
+
+    @staticmethod
+    def doModifier(modifier):
+        """Execute modifier, operations done before a failure are undone so it applies whole or not at all"""
+        try:
+            modifier.doIt()
+        except RuntimeError:
+            modifier.undoIt()
+            raise
+
+    def doIt(self, args):
+        # Plugin loading imports this file as a separate module, pending modifiers live in the package one
+        from dsRenamingTool import mayaSceneFn
+        self._modifier = mayaSceneFn.ApiScene.popPendingModifier()
+        self.redoIt()
+
+    def redoIt(self):
+        self.doModifier(self._modifier)
+
+    def undoIt(self):
+        self._modifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+
+def initializePlugin(plugin):
+    pluginFn = om2.MFnPlugin(plugin)
+    pluginFn.registerCommand(ApplyModifierCmd.COMMAND_NAME, ApplyModifierCmd.creator)
+
+
+def uninitializePlugin(plugin):
+    pluginFn = om2.MFnPlugin(plugin)
+    pluginFn.deregisterCommand(ApplyModifierCmd.COMMAND_NAME)
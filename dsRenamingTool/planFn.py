@@ -0,0 +1,261 @@
+"""Saving, checking and applying rename plans.
+
+Plans are stored either as a single JSON document or as JSON lines, one entry per line after
+a header line. Entries are [node key, old name, new name, reason] lists, node keys come from
+SceneBase.nodeKey, e.g. UUIDs in Maya. JSON lines plans are read lazily, so plans generated
+elsewhere can be checked and applied without loading them whole, readPlan loads them into a
+compact batch when they have to be kept.
+"""
+import itertools
+import json
+
+from dsRenamingTool import batchFn
+from dsRenamingTool import indexFn
+from dsRenamingTool import renameFn
+from dsRenamingTool.loggingFn import Logger
+
+
+PLAN_VERSION = 1
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+
+
+def isJsonLines(path):
+    return path.lower().endswith(JSON_LINES_EXTENSIONS)
+
+
+def writePlan(plan, path, scene=None):
+    """Save plan, JSON lines are written entry by entry so plan can be any iterable
+
+    :param plan: Plan entries
+    :type plan: batchFn.RenameBatch or iterable[renameFn.PlanEntry]
+    :param path: Output file, .jsonl/.ndjson extension writes JSON lines
+    :type path: str
+    :param scene: Scene plan nodes belong to
+    :return: Number of written entries
+    :rtype: int
+    """
+    scene = renameFn.RenameUtils.getScene(scene)
+    if isinstance(plan, batchFn.RenameBatch):
+        # Columns are read directly, no entry objects are created
+        records = ((node, oldName, newName, plan.reason(position))
+                   for position, (node, oldName, newName) in enumerate(zip(plan.nodes, plan.oldNames, plan.newNames)))
+    else:
+        records = ((entry.node, entry.oldName, entry.newName, entry.reason) for entry in plan)
+    header = {"version": PLAN_VERSION, "backend": scene.NAME}
+    count = 0
+    with open(path, "w") as planFile:
+        if isJsonLines(path):
+            planFile.write(json.dumps(header) + "\n")
+        else:
+            planFile.write(json.dumps(header)[:-1] + ', "entries": [')
+        for node, oldName, newName, reason in records:
+            record = json.dumps([scene.nodeKey(node), oldName, newName, reason])
+            if isJsonLines(path):
+                planFile.write(record + "\n")
+            else:
+                planFile.write((",\n" if count else "\n") + record)
+            count += 1
+        if not isJsonLines(path):
+            planFile.write("\n]}\n")
+
+    return count
+
+
+def readHeader(path):
+    """Read plan header
+
+    :rtype: dict
+    """
+    with open(path, "r") as planFile:
+        if isJsonLines(path):
+            return json.loads(planFile.readline())
+        header = json.load(planFile)
+    header.pop("entries", None)
+    return header
+
+
+def iterPlanFile(path, scene=None):
+    """Read plan entries, JSON lines plans are streamed
+
+    :param scene: Scene to resolve node keys in, entries of missing nodes have node set to None
+    :return: Plan entries
+    :rtype: generator
+    """
+    scene = renameFn.RenameUtils.getScene(scene)
+    with open(path, "r") as planFile:
+        if isJsonLines(path):
+            header = json.loads(planFile.readline())
+            records = (json.loads(line) for line in planFile if line.strip())
+        else:
+            header = json.load(planFile)
+            records = header.pop("entries")
+
+        if header.get("version", PLAN_VERSION) > PLAN_VERSION:
+            raise ValueError("Unsupported plan version: {0}".format(header["version"]))
+        if header.get("backend") not in (None, scene.NAME):
+            Logger.warning("Plan was made with {0} backend, node keys may not resolve".format(header["backend"]))
+
+        for key, oldName, newName, reason in records:
+            yield renameFn.PlanEntry(scene.nodeFromKey(key), oldName, newName, reason)
+
+
+def readPlan(path, scene=None):
+    """Load whole plan
+
+    :param scene: Scene to resolve node keys in, entries of missing nodes have node set to None
+    :rtype: batchFn.RenameBatch
+    """
+    return batchFn.RenameBatch.fromEntries(iterPlanFile(path, scene=scene))
+
+
+def dryRun(plan, nameIndex=None, scene=None):
+    """Check plan against the current scene without renaming anything.
+
+    Only names are kept while checking, so plans read with iterPlanFile don't get loaded whole.
+
+    :param plan: Plan entries
+    :type plan: iterable[renameFn.PlanEntry]
+    :param nameIndex: Index of scene names, built from the scene if not given. Not modified
+    :type nameIndex: indexFn.NameIndex, optional
+    :return: Report with entry count, unchanged, missing and stale entries as [old name, new name] and colliding new names
+    :rtype: dict
+    """
+    scene = renameFn.RenameUtils.getScene(scene)
+    if nameIndex is None:
+        nameIndex = indexFn.NameIndex.fromScene(scene)
+
+    report = {"entries": 0, "unchanged": [], "missing": [], "stale": [], "collisions": []}
+    releasedNames = set()
+    claimedNames = {}
+    for entry in plan:
+        report["entries"] += 1
+        if entry.node is None or not scene.nodeExists(entry.node):
+            report["missing"].append([entry.oldName, entry.newName])
+            continue
+        currentName = scene.nodeName(entry.node)
+        if currentName == entry.newName:
+            report["unchanged"].append([entry.oldName, entry.newName])
+            continue
+        if currentName != entry.oldName:
+            # Renamed since planning, new name still applies
+            report["stale"].append([entry.oldName, entry.newName])
+        releasedNames.add(currentName)
+        claimedNames[entry.newName] = claimedNames.get(entry.newName, 0) + 1
+
+    for newName, claims in claimedNames.items():
+        heldOutside = nameIndex.count(newName) - (1 if newName in releasedNames else 0)
+        if claims > 1 or heldOutside > 0:
+            report["collisions"].append(newName)
+    report["collisions"].sort()
+    return report
+
+
+def logReport(report):
+    Logger.info("Plan of {entries} entries: {unchanged} unchanged, {missing} missing, {stale} stale, {collisions} collisions".format(
+        entries=report["entries"], **dict((key, len(value)) for key, value in report.items() if key != "entries")))
+    for name in report["collisions"][:20]:
+        Logger.warning("Name collision: {0}".format(name))
+
+
+def applyPlanFile(path, nameIndex=None, scene=None, chunkSize=1000, journal=None):
+    """Apply saved plan as one undo step, entries are streamed in chunks.
+
+    Every chunk is applied in its own scene batch, so backends that queue renames until the
+    batch ends have made them before the next chunk reads node names.
+
+    An entry whose new name is held by a node outside of its chunk is moved to a temporary name
+    and finished after the last chunk, when names held by nodes of later chunks are released.
+    Only those deferred entries are kept in memory. If a node outside of the plan still holds the
+    name by then, the scene makes the name unique and the entry is counted as a collision.
+
+    Entries of nodes that can't be renamed are skipped, each chunk is checked with one batched
+    query. If a rename fails, everything applied so far is reverted in the same undo step.
+
+    :param path: Plan file
+    :type path: str
+    :param nameIndex: Index of scene names, built from the scene if not given. Kept in sync
+    :type nameIndex: indexFn.NameIndex, optional
+    :param chunkSize: Number of entries applied at once
+    :type chunkSize: int
+    :param journal: Journal to record performed renames in, see RenameUtils.applyPlan
+    :type journal: batchFn.RenameJournal or list, optional
+    :return: Counts of renamed, unchanged, missing, skipped, deferred and collisions entries. Only
+        renames to the planned name count as renamed
+    :rtype: dict
+    :raises renameFn.RenameError: Rename of a node failed, nothing of the plan stays applied
+    """
+    scene = renameFn.RenameUtils.getScene(scene)
+    if nameIndex is None:
+        nameIndex = indexFn.NameIndex.fromScene(scene)
+
+    counts = {"renamed": 0, "unchanged": 0, "missing": 0, "skipped": 0, "deferred": 0, "collisions": 0}
+    deferred = batchFn.RenameBatch()
+    applied = batchFn.RenameJournal()
+    entries = iterPlanFile(path, scene=scene)
+    with scene.undoChunk():
+        try:
+            _applyChunks(entries, chunkSize, nameIndex, scene, counts, deferred, applied)
+        except renameFn.RenameError as e:
+            renameFn.RenameUtils.revertJournal(applied, nameIndex=nameIndex, scene=scene)
+            raise renameFn.RenameError(str(e), node=e.node, name=e.name, rolledBack=e.rolledBack + len(applied))
+
+    if journal is not None:
+        journal.extend(applied)
+    counts["deferred"] = len(deferred)
+    return counts
+
+
+def _applyChunks(entries, chunkSize, nameIndex, scene, counts, deferred, applied):
+    while True:
+        chunk = list(itertools.islice(entries, max(1, chunkSize)))
+        if not chunk:
+            break
+
+        ready = []
+        for entry in chunk:
+            if entry.node is None:
+                counts["missing"] += 1
+                continue
+            entry.oldName = scene.nodeName(entry.node)
+            if entry.oldName == entry.newName:
+                counts["unchanged"] += 1
+                continue
+            ready.append(entry)
+        if ready:
+            blockers = scene.renameBlockers([entry.node for entry in ready])
+            counts["skipped"] += sum(1 for blocker in blockers if blocker is not None)
+            ready = [entry for entry, blocker in zip(ready, blockers) if blocker is None]
+
+        # Index follows the planner convention, old names released and new names claimed before applying
+        deferredBefore = len(deferred)
+        chunkNames = set(entry.oldName for entry in ready)
+        steps = batchFn.RenameBatch()
+        for entry in ready:
+            nameIndex.discard(entry.oldName)
+        for entry in ready:
+            if nameIndex.exists(entry.newName) and entry.newName not in chunkNames:
+                tempName = renameFn.RenameUtils._tempName(nameIndex, chunkNames)
+                nameIndex.add(tempName)
+                steps.append(entry.node, entry.oldName, tempName, entry.reason)
+                deferred.append(entry.node, tempName, entry.newName, entry.reason)
+                continue
+            # Later entries of the chunk with the same name get deferred instead
+            chunkNames.discard(entry.newName)
+            nameIndex.add(entry.newName)
+            steps.append(entry.node, entry.oldName, entry.newName, entry.reason)
+
+        renameFn.RenameUtils.applyPlan(steps, nameIndex=nameIndex, scene=scene, journal=applied)
+        counts["renamed"] += len(steps) - (len(deferred) - deferredBefore)
+
+    for tempName, newName in zip(deferred.oldNames, deferred.newNames):
+        nameIndex.rename(tempName, newName)
+    renameFn.RenameUtils.applyPlan(deferred, nameIndex=nameIndex, scene=scene, journal=applied)
+    for node, newName in zip(deferred.nodes, deferred.newNames):
+        actualName = scene.nodeName(node)
+        if actualName == newName:
+            counts["renamed"] += 1
+            continue
+        # Held by a node outside of the plan, the scene made it unique
+        counts["collisions"] += 1
+        if counts["collisions"] <= Logger.SUMMARY_LIMIT:
+            Logger.warning("Name collision, {0} was renamed to {1}".format(newName, actualName))
@@ -0,0 +1,180 @@
+from PySide2 import QtCore
+from PySide2 import QtWidgets
+from dsRenamingTool import batchFn
+from dsRenamingTool import indexFn
+from dsRenamingTool import renameFn
+
+
+class PreviewModel(QtCore.QAbstractTableModel):
+    """Old name -> new name table of the current selection.
+
+    New names are planned lazily against an overlay of a precomputed name index, only as far
+    as the view asks for rows. Old names and auto suffixes are cached per node, so changing
+    naming options never queries the scene. Rows are kept in a RenameBatch, planned names are
+    appended to it as they are computed.
+
+    Each planning session gets its own overlay, patterns cached while planning live in it and are
+    dropped with it once the name, options or selection change. The index passed in is never written.
+    """
+
+    HEADERS = ("Old name", "New name")
+
+    def __init__(self, parent=None):
+        super(PreviewModel, self).__init__(parent)
+        self.scene = None
+        self.nameIndex = None
+        self.aliasesDict = None
+        self.newName = ""
+        self.options = {}
+
+        self._batch = batchFn.RenameBatch()
+        self._suffixCache = {}
+        self._scopedIndices = {}
+        self._aliasesVersion = None
+        self._planIterator = None
+        self._planIndex = None  # type: indexFn.ScopedNameIndex
+
+    def setSelection(self, nodes, scene, nameIndex, aliasesDict):
+        """Set previewed nodes
+
+        :param nodes: Selected nodes
+        :type nodes: list
+        :param scene: Scene access backend
+        :param nameIndex: Index of scene names, only read through an overlay
+        :type nameIndex: indexFn.NameIndex
+        :param aliasesDict: Aliases dict or store
+        """
+        # Backends are recreated per update, cached suffixes stay valid for the same kind of backend
+        aliasesVersion = getattr(aliasesDict, "version", None)
+        sameScene = self.scene is not None and scene.NAME == self.scene.NAME
+        if aliasesDict is not self.aliasesDict or not sameScene or aliasesVersion != self._aliasesVersion:
+            self._suffixCache = {}
+        self._aliasesVersion = aliasesVersion
+
+        self.beginResetModel()
+        self.scene = scene
+        self.nameIndex = nameIndex
+        self.aliasesDict = aliasesDict
+        self._scopedIndices = {}
+        nodes = list(nodes)
+        self._batch = batchFn.RenameBatch(nodes, [scene.nodeName(node) for node in nodes])
+        self._restartPlan()
+        self.endResetModel()
+
+    def setOptions(self, newName, options):
+        """Set naming options, rows are only recomputed if options actually changed
+
+        :param newName: Base name
+        :type newName: str
+        :param options: RenameUtils.planBatch keyword arguments
+        :type options: dict
+        """
+        if newName == self.newName and options == self.options:
+            return
+
+        self.newName = newName
+        self.options = dict(options)
+        self._restartPlan()
+        if self._batch.nodes:
+            # Only the new name column changed, views re-request just the visible rows
+            self.dataChanged.emit(self.index(0, 1), self.index(len(self._batch.nodes) - 1, 1))
+
+    def clear(self):
+        self.beginResetModel()
+        self._batch = batchFn.RenameBatch()
+        self._restartPlan()
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._batch.nodes)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role not in (QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole):
+            return None
+
+        row = index.row()
+        if index.column() == 0:
+            return self._batch.oldNames[row]
+        return self._planUpTo(row)
+
+    def _restartPlan(self):
+        self._batch.resetPlan()
+        self._planIterator = None
+        self._planIndex = None
+        if not self._batch.nodes or not self.newName or self.nameIndex is None:
+            return
+
+        options = dict(self.options)
+        if options.pop("autoSuffix", False):
+            suffixes = self._autoSuffixes()
+        else:
+            suffixes = [options.get("suffix")] * len(self._batch.nodes)
+        options.pop("suffix", None)
+        scope = options.pop("scope", indexFn.ScopedNameIndex.GLOBAL)
+
+        self._planIndex = self._scopedIndex(scope).overlay()
+        self._planIterator = renameFn.RenameUtils.iterPlan(self._batch.nodes,
+                                                           self.newName,
+                                                           self.aliasesDict,
+                                                           nameIndex=self._planIndex,
+                                                           scene=self.scene,
+                                                           oldNames=self._batch.oldNames,
+                                                           suffixes=suffixes,
+                                                           **options)
+
+    def _scopedIndex(self, scope):
+        # Parents and scope indices are queried once per selection, option changes only overlay them
+        scoped = self._scopedIndices.get(scope)
+        if scoped is None:
+            scoped = self._scopedIndices[scope] = indexFn.ScopedNameIndex(self.scene, scope, self.nameIndex)
+        return scoped
+
+    def _planUpTo(self, row):
+        # Allocation is sequential, a row needs every row above it planned first
+        if self._planIterator is None:
+            return ""
+        batch = self._batch
+        while len(batch) <= row:
+            try:
+                entry = next(self._planIterator)
+            except StopIteration:
+                self._planIterator = None
+                return ""
+            batch.append(entry.node, entry.oldName, entry.newName, entry.reason, entry.scope)
+        return batch.newNames[row]
+
+    def _autoSuffixes(self):
+        nodes = self._batch.nodes
+        keys = [self.scene.nodeId(node) for node in nodes]
+        missing = [node for node, key in zip(nodes, keys) if key not in self._suffixCache]
+        if missing:
+            suffixes = renameFn.RenameUtils.getSuffixes(missing, self.aliasesDict, scene=self.scene)
+            for node, suffix in zip(missing, suffixes):
+                self._suffixCache[self.scene.nodeId(node)] = suffix
+        return [self._suffixCache[key] for key in keys]
+
+
+class PreviewTable(QtWidgets.QTableView):
+    """Table view tuned for large previews, fixed row height keeps scrolling cheap."""
+
+    def __init__(self, parent=None):
+        super(PreviewTable, self).__init__(parent)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.setWordWrap(False)
+        self.verticalHeader().hide()
+        self.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 4)
+        self.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
@@ -1,69 +1,970 @@
-import pymel.core as pm
+import itertools
 import json
+import re
+from dsRenamingTool import aliasFn
+from dsRenamingTool import batchFn
+from dsRenamingTool import indexFn
+from dsRenamingTool import statsFn
+from dsRenamingTool import templateFn
+from dsRenamingTool.batchFn import PlanEntry
 from dsRenamingTool.loggingFn import Logger
 
+_stats = statsFn.RenameStats.instance()
+
+
+class RenameError(RuntimeError):
+    """Rename of a node failed while applying a plan, renames made by the plan before it were rolled back."""
+
+    def __init__(self, message, node=None, name=None, rolledBack=0):
+        """
+        :param node: Node whose rename failed
+        :param name: Name it was renamed to
+        :type name: str
+        :param rolledBack: Number of reverted renames
+        :type rolledBack: int
+        """
+        super(RenameError, self).__init__(message)
+        self.node = node
+        self.name = name
+        self.rolledBack = rolledBack
+
+
+class RenameReport(object):
+    """Outcome of a transactional batch rename, see RenameUtils.renameBatch"""
+
+    SUMMARY_LIMIT = 20
+
+    def __init__(self, skipped=None):
+        """
+        :param skipped: Nodes left out of the batch as (node, name, reason), see RenameUtils.checkNodes
+        :type skipped: list, optional
+        """
+        self.renamed = 0
+        self.skipped = list(skipped or [])
+        self.error = None  # type: RenameError
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def log(self):
+        if self.error is not None:
+            Logger.error("Rename failed, {0} renames rolled back: {1}".format(self.error.rolledBack, self.error))
+        else:
+            Logger.info("Renamed {0} nodes".format(self.renamed))
+        if not self.skipped:
+            return
+
+        reasons = {}
+        for _, _, reason in self.skipped:
+            reasons[reason] = reasons.get(reason, 0) + 1
+        Logger.warning("Skipped {0} nodes: {1}".format(len(self.skipped), ", ".join("{0} {1}".format(count, reason) for reason, count in sorted(reasons.items()))))
+        for _, name, reason in self.skipped[:self.SUMMARY_LIMIT]:
+            Logger.warning("Skipped {0} node: {1}".format(reason, name))
+
+
+class RewriteRule(object):
+    """Single compiled name rewrite, created through the classmethod constructors."""
+
+    __slots__ = ("kind", "pattern", "replacement", "_regex")
+
+    REPLACE = "replace"
+    ADD_PREFIX = "addPrefix"
+    ADD_SUFFIX = "addSuffix"
+    REMOVE_PREFIX = "removePrefix"
+    REMOVE_SUFFIX = "removeSuffix"
+
+    def __init__(self, kind, pattern="", replacement="", regex=None):
+        self.kind = kind
+        self.pattern = pattern
+        self.replacement = replacement
+        self._regex = regex
+
+    def __repr__(self):
+        return "RewriteRule({0}, {1!r}, {2!r})".format(self.kind, self.pattern, self.replacement)
+
+    @classmethod
+    def replace(cls, search, replacement, regex=False, ignoreCase=False):
+        """Replace all occurrences of search
+
+        :param regex: Treat search as regular expression, replacement can use group references
+        :type regex: bool
+        """
+        if regex or ignoreCase:
+            flags = re.IGNORECASE if ignoreCase else 0
+            compiled = re.compile(search if regex else re.escape(search), flags)
+            if not regex:
+                # Plain replacement text must not be parsed for group references
+                replacement = replacement.replace("\\", "\\\\")
+            return cls(cls.REPLACE, search, replacement, compiled)
+        return cls(cls.REPLACE, search, replacement)
+
+    @classmethod
+    def addPrefix(cls, prefix):
+        return cls(cls.ADD_PREFIX, prefix)
+
+    @classmethod
+    def addSuffix(cls, suffix):
+        return cls(cls.ADD_SUFFIX, suffix)
+
+    @classmethod
+    def removePrefix(cls, prefix):
+        return cls(cls.REMOVE_PREFIX, prefix)
+
+    @classmethod
+    def removeSuffix(cls, suffix):
+        return cls(cls.REMOVE_SUFFIX, suffix)
+
+    def apply(self, name):
+        if self.kind == self.REPLACE:
+            if self._regex is not None:
+                return self._regex.sub(self.replacement, name)
+            return name.replace(self.pattern, self.replacement) if self.pattern else name
+        if self.kind == self.ADD_PREFIX:
+            return self.pattern + name
+        if self.kind == self.ADD_SUFFIX:
+            return name + self.pattern
+        if self.kind == self.REMOVE_PREFIX:
+            return name[len(self.pattern):] if self.pattern and name.startswith(self.pattern) else name
+        if self.kind == self.REMOVE_SUFFIX:
+            return name[:-len(self.pattern)] if self.pattern and name.endswith(self.pattern) else name
+        raise ValueError("Unknown rewrite rule kind: {0}".format(self.kind))
+
+
+class NameRewriter(object):
+    """Ordered list of rewrite rules applied to whole batches of names.
+
+    Rules are compiled once on construction, results are memoized per distinct name.
+    """
+
+    _TRAILING_DIGITS = re.compile(r"\d+$")
+
+    def __init__(self, rules):
+        """
+        :param rules: Rules applied in order
+        :type rules: list[RewriteRule]
+        """
+        self.rules = list(rules)
+        self._cache = {}
+
+    def rewrite(self, name):
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        newName = name
+        for rule in self.rules:
+            newName = rule.apply(newName)
+        self._cache[name] = newName
+        return newName
+
+    def planBatch(self, nodes, nameIndex=None, scene=None):
+        """Plan rewrite of nodes, nodes whose name doesn't change are skipped.
+
+        Names released by the batch can be reused by other batch nodes, so swaps like L_ <-> R_
+        resolve through applyPlan. Rewritten names colliding with existing names get a number
+        the same way Maya would, using the shared name index instead of probing the scene.
+
+        :param nodes: Nodes to rename
+        :type nodes: list
+        :param nameIndex: Index of scene names, built from the scene if not given
+        :type nameIndex: indexFn.NameIndex, optional
+        :param scene: Scene access backend
+        :return: Plan entries
+        :rtype: batchFn.RenameBatch
+        """
+        with _stats.timer("rewrite"):
+            return self._planBatch(nodes, nameIndex, scene)
+
+    def _planBatch(self, nodes, nameIndex, scene):
+        scene = RenameUtils.getScene(scene)
+        if nameIndex is None:
+            nameIndex = indexFn.NameIndex.fromScene(scene)
+
+        changed = []
+        for node in nodes:
+            oldName = scene.nodeName(node)
+            newName = self.rewrite(oldName)
+            if newName == oldName:
+                continue
+            if not newName:
+                Logger.warning("Rewrite of {0} results in empty name, skipped".format(oldName))
+                continue
+            changed.append((node, oldName, newName))
+
+        for _, oldName, _ in changed:
+            nameIndex.discard(oldName)
+
+        plan = batchFn.RenameBatch()
+        for node, oldName, newName in changed:
+            reason = PlanEntry.REWRITE
+            if nameIndex.exists(newName):
+                newName = self.uniqueName(newName, nameIndex)
+                reason = PlanEntry.COLLISION
+            nameIndex.add(newName)
+            plan.append(node, oldName, newName, reason)
+        plan.nodes = batchFn.nodeColumn(plan.nodes)
+
+        return plan
+
+    @classmethod
+    def uniqueName(cls, name, nameIndex):
+        """Number taken name like Maya does, incrementing its trailing number if it has one"""
+        match = cls._TRAILING_DIGITS.search(name)
+        if match:
+            digits = match.group()
+            return nameIndex.nextName(name[:match.start()], padding=len(digits), start=int(digits))
+        return nameIndex.nextName(name, padding=1, start=1)
+
+
+class ChunkedRename(object):
+    """Renames nodes in fixed size chunks, driven one chunk at a time by the caller.
+
+    Each chunk is planned and applied separately with a shared name index, so nodes are consumed
+    lazily and names held by nodes of later chunks count as taken. Calling cancel() stops the run
+    before the next chunk, finished chunks are either kept or reverted.
+    """
+
+    def __init__(self, nodes, newName, aliasesDict, chunkSize=500, rollbackOnCancel=False, nameIndex=None, scene=None, **renameOptions):
+        """
+        :param nodes: Nodes to rename, any iterable, e.g. RenameUtils.iterHierarchy
+        :param chunkSize: Number of nodes planned and applied per step
+        :type chunkSize: int
+        :param rollbackOnCancel: Revert finished chunks when cancelled
+        :type rollbackOnCancel: bool
+        :param renameOptions: Keyword arguments of RenameUtils.planBatch
+        """
+        self.scene = RenameUtils.getScene(scene)
+        self.nodes = nodes
+        self.newName = newName
+        self.aliasesDict = aliasesDict
+        self.chunkSize = max(1, chunkSize)
+        self.rollbackOnCancel = rollbackOnCancel
+        self.nameIndex = nameIndex
+        self.renameOptions = renameOptions
+
+        self.renamed = 0
+        self.cancelled = False
+        self.finished = False
+        self.journal = batchFn.RenameJournal()
+        self.skipped = []
+
+    def cancel(self):
+        self.cancelled = True
+
+    def steps(self):
+        """Generator applying one chunk per iteration
+
+        Nodes that can't be renamed are left out of their chunk and collected in skipped. If a
+        rename fails, all finished chunks are reverted and the RenameError is raised.
+
+        :return: Number of nodes renamed so far after each chunk
+        :rtype: generator
+        :raises RenameError: Rename of a node failed
+        """
+        if self.nameIndex is None:
+            self.nameIndex = indexFn.NameIndex.fromScene(self.scene)
+
+        iterator = iter(self.nodes)
+        while not self.cancelled:
+            chunk = list(itertools.islice(iterator, self.chunkSize))
+            if not chunk:
+                break
+            chunk, skipped = RenameUtils.checkNodes(chunk, scene=self.scene)
+            self.skipped.extend(skipped)
+            plan = RenameUtils.planBatch(chunk, self.newName, self.aliasesDict, nameIndex=self.nameIndex, scene=self.scene, **self.renameOptions)
+            try:
+                RenameUtils.applyPlan(plan, nameIndex=self.nameIndex, scene=self.scene, journal=self.journal)
+            except RenameError:
+                # Failed chunk is rolled back already, earlier ones are reverted to leave no partial rename
+                RenameUtils.revertJournal(self.journal, nameIndex=self.nameIndex, scene=self.scene)
+                self.journal = batchFn.RenameJournal()
+                self.renamed = 0
+                self.finished = True
+                raise
+            self.renamed += len(plan)
+            yield self.renamed
+
+        if self.cancelled and self.rollbackOnCancel:
+            RenameUtils.revertJournal(self.journal, nameIndex=self.nameIndex, scene=self.scene)
+            Logger.info("Rename cancelled, reverted {0} renames".format(len(self.journal)))
+            self.journal = batchFn.RenameJournal()
+            self.renamed = 0
+        self.finished = True
+
+    def run(self):
+        """Run all chunks at once
+
+        :return: Number of renamed nodes
+        :rtype: int
+        """
+        for _ in self.steps():
+            pass
+        return self.renamed
+
 
 class RenameUtils:
 
+    TEMP_NAME = "NULL_tempName"
+    TEMP_SUFFIX = "_NULL"
+    DEFAULT_BACKEND = "pymel"
+
     @classmethod
-    def rename(cls, obj, newName, aliasesDict, prefix=None, suffix=None, autoSuffix=False, indexing=True, indexPadding=1, startIndex=0):
+    def getScene(cls, scene=None):
+        """Get scene access to use, Maya backends are only imported when no scene is given
+
+        :param scene: Any sceneFn.SceneBase implementation
+        :rtype: sceneFn.SceneBase
+        """
+        if scene is None:
+            from dsRenamingTool import mayaSceneFn
+            return mayaSceneFn.getBackend(cls.DEFAULT_BACKEND)
+        return scene
+
+    @classmethod
+    def rename(cls, obj, newName, aliasesDict, prefix=None, suffix=None, autoSuffix=False, indexing=True, indexPadding=1, startIndex=0, nameIndex=None, scene=None,
+               template=None, indexPolicy=indexFn.NameIndex.FILL_GAPS, scope=indexFn.ScopedNameIndex.GLOBAL):
         if not newName:
             Logger.warning("No name was specified")
             return
 
+        scene = cls.getScene(scene)
+        if scope == indexFn.ScopedNameIndex.GLOBAL:
+            fullName = cls.planName(obj, newName, aliasesDict, prefix=prefix, suffix=suffix, autoSuffix=autoSuffix,
+                                    indexing=indexing, indexPadding=indexPadding, startIndex=startIndex, nameIndex=nameIndex, scene=scene, template=template,
+                                    indexPolicy=indexPolicy)
+        else:
+            # Scope index has the current name released, same as a batch of one
+            plan = cls.planBatch([obj], newName, aliasesDict, prefix=prefix, suffix=suffix, autoSuffix=autoSuffix, indexing=indexing,
+                                 indexPadding=indexPadding, startIndex=startIndex, nameIndex=nameIndex.overlay() if nameIndex is not None else None,
+                                 scene=scene, template=template, indexPolicy=indexPolicy, scope=scope)
+            fullName = plan[0].newName
+        oldName = scene.nodeName(obj) if nameIndex is not None else None
+        scene.rename(obj, fullName)
+        if nameIndex is not None:
+            # Maya can still adjust the name, record the one it actually got
+            nameIndex.rename(oldName, scene.nodeName(obj))
+
+        return fullName
+
+    @classmethod
+    def planName(cls, obj, newName, aliasesDict, prefix=None, suffix=None, autoSuffix=False, indexing=True, indexPadding=1, startIndex=0, nameIndex=None, keepName=True, scene=None,
+                 template=None, indexPolicy=indexFn.NameIndex.FILL_GAPS, oldName=None):
+        if template:
+            scene = cls.getScene(scene)
+            if autoSuffix:
+                suffix = cls.getSuffix(obj, aliasesDict, scene=scene)
+            bound = cls.bindTemplate(template, newName, prefix=prefix, indexing=indexing)
+            return cls.templateName(obj if keepName else None, bound, oldName or scene.nodeName(obj), suffix=suffix, indexPadding=indexPadding,
+                                    startIndex=startIndex, nameIndex=nameIndex, scene=scene, indexPolicy=indexPolicy)
+
         if prefix:
             baseName = "{0}_{1}".format(prefix, newName)
         else:
             baseName = newName
 
         if autoSuffix:
-            suffix = cls.getSuffix(obj, aliasesDict)
+            suffix = cls.getSuffix(obj, aliasesDict, scene=scene)
 
-        fullName = cls.genName(obj, baseName, suffix, padding=indexPadding + 1, start=startIndex, indexing=indexing)
-        pm.rename(obj, fullName)
+        # Without keepName the current name of the object is treated as taken like any other
+        return cls.genName(obj if keepName else None, baseName, suffix, padding=indexPadding + 1, start=startIndex, indexing=indexing, nameIndex=nameIndex, scene=scene,
+                           indexPolicy=indexPolicy, oldName=oldName)
 
-        return fullName
+    @classmethod
+    def planBatch(cls, nodes, newName, aliasesDict, prefix=None, suffix=None, autoSuffix=False, indexing=True, indexPadding=1, startIndex=0, nameIndex=None, scene=None,
+                  template=None, indexPolicy=indexFn.NameIndex.FILL_GAPS, scope=indexFn.ScopedNameIndex.GLOBAL):
+        """Compute final names for the whole batch up front.
+
+        Names currently held by the batch are treated as free, so the result matches renaming
+        every node to a temporary name first. Planned names are claimed in the name index.
+
+        :param nodes: Nodes to rename, in allocation order
+        :type nodes: list
+        :param nameIndex: Index of scene names, built from the scene if not given
+        :type nameIndex: indexFn.NameIndex, optional
+        :param scene: Scene access backend, defaults to DEFAULT_BACKEND
+        :param template: Naming template text or compiled template, see templateFn
+        :type template: str or templateFn.Template, optional
+        :param indexPolicy: Index allocation policy, see indexFn.NameIndex.POLICIES. KEEP_EXISTING keeps
+            indices of nodes already named after the pattern
+        :type indexPolicy: str
+        :param scope: Uniqueness scope, see indexFn.ScopedNameIndex.SCOPES. Per parent scope only
+            queries children of parents of the batch, world level nodes still use the global index
+        :type scope: str
+        :return: Plan entries
+        :rtype: batchFn.RenameBatch
+        """
+        if not newName:
+            Logger.warning("No name was specified")
+            return batchFn.RenameBatch()
+
+        with _stats.timer("plan"):
+            # Template is bound once, templates with an index plan in bulk same as the plain pattern
+            bound = cls.bindTemplate(template, newName, prefix=prefix, indexing=indexing) if template else None
+            bulk = (indexing and (bound is None or bound.hasIndex) and scope == indexFn.ScopedNameIndex.GLOBAL
+                    and not isinstance(nameIndex, indexFn.ScopedNameIndex) and indexPolicy in (indexFn.NameIndex.FILL_GAPS, indexFn.NameIndex.APPEND))
+            if bulk:
+                plan = cls._planBulk(nodes, newName, aliasesDict, prefix=prefix, suffix=suffix, autoSuffix=autoSuffix, indexPadding=indexPadding,
+                                     startIndex=startIndex, nameIndex=nameIndex, scene=scene, indexPolicy=indexPolicy, bound=bound)
+                if plan is not None:
+                    return plan
+            return batchFn.RenameBatch.fromEntries(cls.iterPlan(nodes, newName, aliasesDict, prefix=prefix, suffix=suffix, autoSuffix=autoSuffix, indexing=indexing,
+                                     indexPadding=indexPadding, startIndex=startIndex, nameIndex=nameIndex, scene=scene, template=template,
+                                     indexPolicy=indexPolicy, scope=scope))
 
     @classmethod
-    def genName(cls, obj, name, suffix=None, indexing=True, padding=2, start=0):
+    def _planBulk(cls, nodes, newName, aliasesDict, prefix=None, suffix=None, autoSuffix=False, indexPadding=1, startIndex=0, nameIndex=None, scene=None,
+                  indexPolicy=indexFn.NameIndex.FILL_GAPS, bound=None):
+        # Names of different patterns can't take each other's indices, so every pattern is
+        # allocated in one go with the same result as planning node by node.
+        # Returns None if patterns of the batch could overlap, those are planned node by node
+        scene = cls.getScene(scene)
+        nodes = list(nodes)
+        oldNames = [scene.nodeName(node) for node in nodes]
+        if autoSuffix:
+            suffixes = cls.getSuffixes(nodes, aliasesDict, scene=scene)
+        else:
+            suffixes = [suffix] * len(nodes)
+
+        groups = {}
+        if bound is None:
+            baseName = "{0}_{1}".format(prefix, newName) if prefix else newName
+            for position, nodeSuffix in enumerate(suffixes):
+                # None and empty suffix are the same pattern
+                key = (baseName, "_" + nodeSuffix if nodeSuffix else "", indexPadding + 1)
+                groups.setdefault(key, []).append(position)
+        else:
+            padding = bound.indexPadding if bound.indexPadding is not None else indexPadding + 1
+            # Per node fields only take a few distinct values, each combination is split once
+            keys = {}
+            for position, (oldName, nodeSuffix) in enumerate(zip(oldNames, suffixes)):
+                fields = (nodeSuffix or "", templateFn.sideOf(oldName))
+                key = keys.get(fields)
+                if key is None:
+                    before, after = bound.split({"suffix": fields[0], "side": fields[1]})
+                    key = keys[fields] = (before, after, padding)
+                groups.setdefault(key, []).append(position)
+        if cls._patternsOverlap(list(groups)):
+            return None
+
+        if nameIndex is None:
+            nameIndex = indexFn.NameIndex.fromScene(scene)
+        for oldName in oldNames:
+            nameIndex.discard(oldName)
+        newNames = [None] * len(nodes)
+        for (base, nodeSuffix, padding), positions in groups.items():
+            names = nameIndex.reserveNames(base, nodeSuffix, padding=padding, start=startIndex, count=len(positions), policy=indexPolicy)
+            for position, name in zip(positions, names):
+                newNames[position] = name
+        _stats.count("indexLookups", len(nodes))
+
+        plan = batchFn.RenameBatch(nodes, oldNames)
+        plan.setNewNames(newNames, PlanEntry.PATTERN)
+        return plan
+
+    @staticmethod
+    def _patternsOverlap(keys):
+        # A name of one pattern matches another only if their bases and suffixes nest and the
+        # text in between could be read as an index, e.g. geo + 1 + "" and geo1 + index + ""
+        for i, (base, suffix, padding) in enumerate(keys):
+            for otherBase, otherSuffix, otherPadding in keys[i + 1:]:
+                if not (base.startswith(otherBase) or otherBase.startswith(base)):
+                    continue
+                if not (suffix.endswith(otherSuffix) or otherSuffix.endswith(suffix)):
+                    continue
+                between = (base[len(otherBase):] + otherBase[len(base):] + suffix[:max(0, len(suffix) - len(otherSuffix))]
+                           + otherSuffix[:max(0, len(otherSuffix) - len(suffix))])
+                if not between or between.isalnum():
+                    return True
+        return False
+
+    @classmethod
+    def iterPlan(cls, nodes, newName, aliasesDict, prefix=None, suffix=None, autoSuffix=False, indexing=True, indexPadding=1, startIndex=0,
+                 nameIndex=None, scene=None, oldNames=None, suffixes=None, template=None, indexPolicy=indexFn.NameIndex.FILL_GAPS,
+                 scope=indexFn.ScopedNameIndex.GLOBAL):
+        """Lazily plan a batch, entries are computed as they are consumed.
+
+        Same as planBatch, names of all nodes are released from the index before the first entry.
+
+        :param nameIndex: Index of scene names or scoped indices, a scoped index overrides scope
+        :type nameIndex: indexFn.NameIndex or indexFn.ScopedNameIndex, optional
+        :param oldNames: Current names of nodes if already known
+        :type oldNames: list, optional
+        :param suffixes: Per node suffixes if already resolved, overrides suffix and autoSuffix
+        :type suffixes: list, optional
+        :rtype: generator
+        """
+        scene = cls.getScene(scene)
+        if isinstance(nameIndex, indexFn.ScopedNameIndex):
+            scoped = nameIndex
+        else:
+            scoped = indexFn.ScopedNameIndex(scene, scope, nameIndex)
+
+        if oldNames is None:
+            oldNames = [scene.nodeName(node) for node in nodes]
+        scopeKeys = scoped.scopeKeys(nodes, oldNames)
+        if None in scopeKeys:
+            # Global index first, so releases and claims of other scopes are mirrored into it
+            scoped.index(None)
+        for key, oldName in zip(scopeKeys, oldNames):
+            scoped.release(key, oldName)
+
+        if suffixes is None:
+            if autoSuffix:
+                suffixes = cls.getSuffixes(nodes, aliasesDict, scene=scene)
+            else:
+                suffixes = [suffix] * len(nodes)
+
+        # Template is compiled and bound once, only per node fields are rendered in the loop
+        bound = cls.bindTemplate(template, newName, prefix=prefix, indexing=indexing) if template else None
+
+        def planNode(node, key, localName, nodeSuffix, policy):
+            if bound is not None:
+                return cls.templateName(None, bound, localName, suffix=nodeSuffix, indexPadding=indexPadding, startIndex=startIndex,
+                                        nameIndex=scoped.index(key), scene=scene, indexPolicy=policy)
+            return cls.planName(node, newName, aliasesDict, prefix=prefix, suffix=nodeSuffix, autoSuffix=False,
+                                indexing=indexing, indexPadding=indexPadding, startIndex=startIndex, nameIndex=scoped.index(key), keepName=False,
+                                scene=scene, indexPolicy=policy, oldName=localName)
+
+        keepers = set()
+        if indexing and indexPolicy == indexFn.NameIndex.KEEP_EXISTING:
+            # Nodes already named after their pattern claim their names first, the rest fills gaps around them
+            for position, (node, key, oldName, nodeSuffix) in enumerate(zip(nodes, scopeKeys, oldNames, suffixes)):
+                localName = scoped.localName(key, oldName)
+                if planNode(node, key, localName, nodeSuffix, indexPolicy) == localName:
+                    scoped.claim(key, localName)
+                    keepers.add(position)
+            indexPolicy = indexFn.NameIndex.FILL_GAPS
+
+        for position, (node, key, oldName, nodeSuffix) in enumerate(zip(nodes, scopeKeys, oldNames, suffixes)):
+            if position in keepers:
+                yield PlanEntry(node, oldName, oldName, PlanEntry.PATTERN, scope=key)
+                continue
+            localName = planNode(node, key, scoped.localName(key, oldName), nodeSuffix, indexPolicy)
+            scoped.claim(key, localName)
+            yield PlanEntry(node, oldName, scoped.fullName(key, localName), PlanEntry.PATTERN, scope=key)
+
+    @classmethod
+    def bindTemplate(cls, template, newName, prefix=None, indexing=True):
+        """Compile template and resolve fields that are the same for the whole batch
+
+        :param template: Template text or compiled template
+        :type template: str or templateFn.Template
+        :rtype: templateFn.BoundTemplate
+        :raises ValueError: Invalid template
+        """
+        if not isinstance(template, templateFn.Template):
+            template = templateFn.compileTemplate(template)
+        return template.bind(indexing=indexing, prefix=prefix or "", name=newName)
+
+    @classmethod
+    def templateName(cls, obj, bound, oldName, suffix=None, indexPadding=1, startIndex=0, nameIndex=None, scene=None,
+                     indexPolicy=indexFn.NameIndex.FILL_GAPS):
+        """Render per node fields of bound template and allocate its index
+
+        Literal text around the index is the pattern passed to the name index. Index without
+        format in the template uses indexPadding like genName does.
+
+        :param obj: Object whose current name is kept if reached first, None treats it as taken
+        :param bound: Template bound with bindTemplate
+        :type bound: templateFn.BoundTemplate
+        :param oldName: Current name of the object, source of the side field
+        :type oldName: str
+        :rtype: str
+        """
+        before, after = bound.split({"suffix": suffix or "", "side": templateFn.sideOf(oldName)})
+        padding = bound.indexPadding if bound.indexPadding is not None else indexPadding + 1
+        return cls.allocName(obj, before, after, indexing=bound.hasIndex, padding=padding, start=startIndex, nameIndex=nameIndex, scene=scene,
+                             indexPolicy=indexPolicy, oldName=oldName)
+
+    @classmethod
+    def orderPlan(cls, plan):
+        """Order plan so no node is renamed to a name another batch node still holds, see RenameBatch.orderSteps
+
+        :param plan: Plan entries
+        :type plan: batchFn.RenameBatch or list[PlanEntry]
+        :return: Steps as (entry, isTemp) pairs, temp steps need a temporary name
+        :rtype: list[tuple]
+        """
+        entries = list(plan)
+        batch = plan if isinstance(plan, batchFn.RenameBatch) else batchFn.RenameBatch.fromEntries(entries)
+        return [(entries[~step], True) if step < 0 else (entries[step], False) for step in batch.orderSteps()]
+
+    @classmethod
+    def checkNodes(cls, nodes, scene=None):
+        """Split batch into nodes that can be renamed and skipped ones, with one batched query
+
+        :param nodes: Nodes of the batch
+        :type nodes: list
+        :return: Nodes that can be renamed and skipped nodes as (node, name, reason), see SceneBase.renameBlockers
+        :rtype: tuple[list, list]
+        """
+        scene = cls.getScene(scene)
+        nodes = list(nodes)
+        renamable = []
+        skipped = []
+        for node, blocker in zip(nodes, scene.renameBlockers(nodes)):
+            if blocker is None:
+                renamable.append(node)
+            else:
+                skipped.append((node, scene.nodeName(node), blocker))
+        return renamable, skipped
+
+    @classmethod
+    def renameBatch(cls, nodes, newName, aliasesDict, nameIndex=None, scene=None, journal=None, **renameOptions):
+        """Rename batch as a transaction, nodes that can't be renamed are skipped before planning.
+
+        If a rename still fails, renames made before it are rolled back and the error is reported
+        instead of raised.
+
+        :param renameOptions: Keyword arguments of planBatch
+        :rtype: RenameReport
+        """
+        scene = cls.getScene(scene)
+        nodes, skipped = cls.checkNodes(nodes, scene=scene)
+        plan = cls.planBatch(nodes, newName, aliasesDict, nameIndex=nameIndex, scene=scene, **renameOptions)
+        return cls.applyTransaction(plan, nameIndex=nameIndex, scene=scene, journal=journal, skipped=skipped)
+
+    @classmethod
+    def applyTransaction(cls, plan, nameIndex=None, scene=None, journal=None, skipped=None):
+        """Apply plan, a failed rename is reported instead of raised
+
+        :param skipped: Nodes left out of the plan, see checkNodes
+        :type skipped: list, optional
+        :rtype: RenameReport
+        """
+        report = RenameReport(skipped)
+        try:
+            cls.applyPlan(plan, nameIndex=nameIndex, scene=scene, journal=journal)
+        except RenameError as e:
+            report.error = e
+        else:
+            # Steps of cycles rename a node twice, report counts nodes
+            report.renamed = sum(1 for entry in plan if entry.oldName != entry.newName)
+        return report
+
+    @classmethod
+    def applyPlan(cls, plan, nameIndex=None, scene=None, journal=None):
+        """Rename nodes according to plan, one rename per node outside of cycles.
+
+        All renames are made in a single scene batch, so the whole plan is one undo step. If
+        a rename fails, the renames made before it are reverted in the same batch, most recent
+        first, and the name index is restored to the state before applying.
+
+        Must not run inside another scene batch, backends queueing renames until the outermost
+        batch ends would make the name index read names that haven't changed yet. Group several
+        plans into one undo step with scene.undoChunk() instead.
+
+        :param plan: Plan entries
+        :type plan: batchFn.RenameBatch or list[PlanEntry]
+        :param nameIndex: Index the plan was computed with, updated if Maya adjusts any name
+        :type nameIndex: indexFn.NameIndex, optional
+        :param scene: Scene access backend, defaults to DEFAULT_BACKEND
+        :param journal: Journal to record every performed rename in as (node, fromName, toName)
+        :type journal: batchFn.RenameJournal or list, optional
+        :return: Number of renames performed
+        :rtype: int
+        :raises RenameError: Rename of a node failed, nothing of the plan stays applied
+        """
+        scene = cls.getScene(scene)
+        if not isinstance(plan, batchFn.RenameBatch):
+            plan = batchFn.RenameBatch.fromEntries(plan)
+        nodes = plan.nodes
+        oldNames = plan.oldNames
+        newNames = plan.newNames
+        steps = plan.orderSteps()
+        heldNames = None
+        tempNames = {}
+        applied = batchFn.RenameJournal()
+        current = None
+        if _stats.enabled:
+            _stats.count("renames", len(steps))
+            _stats.count("tempRenames", len(steps) - len(plan) + sum(1 for oldName, newName in zip(oldNames, newNames) if newName == oldName))
+        try:
+            with _stats.timer("apply"), scene.batch():
+                try:
+                    for step in steps:
+                        if step < 0:
+                            position = ~step
+                            if nameIndex is None:
+                                nameIndex = indexFn.NameIndex.fromScene(scene, ["{0}*{1}".format(cls.TEMP_NAME, cls.TEMP_SUFFIX)])
+                            if heldNames is None:
+                                heldNames = set(oldNames)
+                            current = (nodes[position], cls._tempName(nameIndex, heldNames))
+                            tempName = scene.rename(*current)
+                            # Held until the node gets its final name, other cycles must not take it
+                            nameIndex.add(tempName)
+                            tempNames[position] = tempName
+                            applied.append((nodes[position], oldNames[position], tempName))
+                            continue
+                        current = (nodes[step], newNames[step])
+                        tempName = tempNames.pop(step, None)
+                        applied.append((nodes[step], oldNames[step] if tempName is None else tempName, scene.rename(*current)))
+                        if tempName is not None:
+                            nameIndex.discard(tempName)
+                except Exception:
+                    # Still inside the batch, rollback is part of the same undo step
+                    cls._rollback(applied, scene)
+                    raise
+        except Exception as e:
+            # Batched backends fail when the batch is executed, their scene batch is undone whole
+            for tempName in tempNames.values():
+                nameIndex.discard(tempName)
+            if nameIndex is not None:
+                for oldName, newName in zip(oldNames, newNames):
+                    nameIndex.rename(newName, oldName)
+            node, name = current if current is not None else (None, None)
+            raise RenameError("Failed to rename {0} to {1}: {2}".format(scene.nodeName(node) if node is not None else None, name, e),
+                              node=node, name=name, rolledBack=len(applied))
+
+        if journal is not None:
+            journal.extend(applied)
+        if nameIndex is not None:
+            # Temp names are all released by now, Maya can still adjust final names
+            for node, newName in zip(nodes, newNames):
+                actualName = scene.nodeName(node)
+                if actualName != newName:
+                    nameIndex.rename(newName, actualName)
+
+        return len(steps)
+
+    @classmethod
+    def claimPlan(cls, plan, nameIndex):
+        """Record plan made with another index, e.g. a snapshot copy, the way planBatch would have
+
+        Old names are released and new names claimed, which is the state applyPlan expects.
+
+        :type plan: batchFn.RenameBatch or list[PlanEntry]
+        :type nameIndex: indexFn.NameIndex
+        """
+        if not isinstance(plan, batchFn.RenameBatch):
+            plan = batchFn.RenameBatch.fromEntries(plan)
+        for oldName in plan.oldNames:
+            nameIndex.discard(oldName)
+        for newName in plan.newNames:
+            nameIndex.add(newName)
+
+    @classmethod
+    def _rollback(cls, applied, scene):
+        # Reverts renames of a failed apply, a revert that fails too doesn't stop the others
+        for node, fromName, toName in reversed(applied):
+            try:
+                scene.rename(node, fromName)
+            except Exception:
+                Logger.exception("Failed to revert rename of {0} to {1}".format(toName, fromName))
+
+    @classmethod
+    def revertJournal(cls, journal, nameIndex=None, scene=None):
+        """Undo renames recorded by applyPlan, most recent first
+
+        :param journal: Renames as (node, fromName, toName)
+        :type journal: batchFn.RenameJournal or list
+        :return: Number of reverted renames
+        :rtype: int
+        """
+        scene = cls.getScene(scene)
+        with scene.batch():
+            for node, fromName, toName in reversed(journal):
+                scene.rename(node, fromName)
+                if nameIndex is not None:
+                    nameIndex.rename(toName, fromName)
+
+        return len(journal)
+
+    @classmethod
+    def iterHierarchy(cls, roots, scene=None):
+        """Lazily walk roots and all of their DAG descendants, depth first
+
+        :param roots: Root nodes, nodes reachable from several roots are only yielded once
+        :type roots: list
+        :rtype: generator
+        """
+        scene = cls.getScene(scene)
+        visited = set()
+        stack = list(reversed(roots))
+        while stack:
+            node = stack.pop()
+            key = scene.nodeId(node)
+            if key in visited:
+                continue
+            visited.add(key)
+            yield node
+            stack.extend(reversed(scene.children(node)))
+
+    @classmethod
+    def _tempName(cls, nameIndex, heldNames):
+        # Planned batches release their old names in the index before nodes actually move
+        skipped = []
+        tempName = nameIndex.nextName(cls.TEMP_NAME, cls.TEMP_SUFFIX, padding=1)
+        while tempName in heldNames:
+            nameIndex.add(tempName)
+            skipped.append(tempName)
+            tempName = nameIndex.nextName(cls.TEMP_NAME, cls.TEMP_SUFFIX, padding=1)
+        for each in skipped:
+            nameIndex.discard(each)
+
+        return tempName
+
+    @classmethod
+    def genName(cls, obj, name, suffix=None, indexing=True, padding=2, start=0, nameIndex=None, scene=None,
+                indexPolicy=indexFn.NameIndex.FILL_GAPS, oldName=None):
         if suffix:
             suffix = "_" + suffix
         else:
             suffix = ""
 
-        if indexing:
+        return cls.allocName(obj, name, suffix, indexing=indexing, padding=padding, start=start, nameIndex=nameIndex, scene=scene,
+                             indexPolicy=indexPolicy, oldName=oldName)
+
+    @classmethod
+    def genNames(cls, name, suffix=None, count=1, padding=2, start=0, nameIndex=None, scene=None, indexPolicy=indexFn.NameIndex.FILL_GAPS):
+        """Generate names of one pattern in bulk, the names consecutive genName calls give when each name is taken before the next call
+
+        :param count: Number of names
+        :type count: int
+        :param nameIndex: Index to allocate from, names are claimed in it. Without it FILL_GAPS names are
+            checked against a single listing of the scene
+        :type nameIndex: indexFn.NameIndex, optional
+        :rtype: list[str]
+        """
+        suffix = "_" + suffix if suffix else ""
+        if nameIndex is None:
+            scene = cls.getScene(scene)
+            scenePattern = "{0}*{1}".format(name, suffix)
+            if indexPolicy == indexFn.NameIndex.FILL_GAPS:
+                return indexFn.NameIndex.freeNames(name, suffix, padding=padding, start=start, count=count,
+                                                   existing=set(scene.listNames([scenePattern])))
+            nameIndex = indexFn.NameIndex.fromScene(scene, [scenePattern])
+        return nameIndex.reserveNames(name, suffix, padding=padding, start=start, count=count, policy=indexPolicy)
+
+    @classmethod
+    def allocName(cls, obj, base, suffix="", indexing=True, padding=2, start=0, nameIndex=None, scene=None,
+                  indexPolicy=indexFn.NameIndex.FILL_GAPS, oldName=None):
+        """Get free name of base + index + suffix, suffix is used as is
+
+        :param padding: Number of index digits or letter style, see indexFn.NameIndex
+        :type padding: int or str
+        :param indexPolicy: Index allocation policy, see indexFn.NameIndex.POLICIES
+        :type indexPolicy: str
+        :param oldName: Name released by the planner, KEEP_EXISTING keeps it if no other node claimed it since
+        :type oldName: str, optional
+        :rtype: str
+        """
+        scene = cls.getScene(scene)
+        currentName = scene.nodeName(obj) if obj is not None else None
+        if indexing and indexPolicy != indexFn.NameIndex.FILL_GAPS:
+            if nameIndex is None:
+                # Other policies need every used index of the pattern, probing can't tell
+                nameIndex = indexFn.NameIndex.fromScene(scene, ["{0}*{1}".format(base, suffix)])
+            if currentName is None and oldName is not None and not nameIndex.exists(oldName):
+                currentName = oldName
+
+        if indexing and nameIndex is not None:
+            testName = nameIndex.nextName(base, suffix, padding=padding, start=start, current=currentName, policy=indexPolicy)
+            _stats.count("indexLookups")
+
+        elif indexing:
             index = start
-            version = str(index).zfill(padding)
-            testName = name + version + suffix
+            testName = indexFn.NameIndex.formatName(base, index, suffix, padding)
 
-            if pm.objExists(testName):
-                while pm.objExists(testName):
-                    if testName == obj:
-                        return testName
+            existsChecks = 1
+            if scene.exists(testName):
+                while scene.exists(testName):
+                    existsChecks += 1
+                    if testName == currentName:
+                        break
                     index += 1
-                    version = str(index).zfill(padding)
-                    testName = name + version + suffix
+                    testName = indexFn.NameIndex.formatName(base, index, suffix, padding)
+                else:
+                    existsChecks += 1
 
             else:
                 "Name is unique: ", testName
 
+            if _stats.enabled:
+                _stats.count("probes", index - start + 1)
+                _stats.count("existsChecks", existsChecks)
+
         else:
-            testName = name + suffix
+            testName = base + suffix
 
         return testName
 
     @classmethod
-    def getSuffix(cls, obj, aliasesDict):
-        objType = pm.objectType(obj)
+    def getSuffixes(cls, nodes, aliasesDict, scene=None, default="OBJ"):
+        """Resolve auto suffixes for a whole batch.
+
+        Node types and first child types of transforms are fetched in bulk, suffix lookups are
+        memoized per type and each unknown type is reported once.
+
+        :param nodes: Nodes to get suffixes for
+        :type nodes: list
+        :param aliasesDict: Node type to suffix map or alias store
+        :type aliasesDict: dict or aliasFn.AliasStore
+        :return: Suffixes in the same order as nodes
+        :rtype: list[str]
+        """
+        scene = cls.getScene(scene)
+        store = cls._aliasStore(aliasesDict)
+        with _stats.timer("typeQueries"):
+            nodeTypes = scene.nodeTypes(nodes)
+            transformIndices = [i for i, nodeType in enumerate(nodeTypes) if nodeType == "transform"]
+            if transformIndices:
+                childTypes = scene.firstChildTypes([nodes[i] for i in transformIndices])
+                for i, childType in zip(transformIndices, childTypes):
+                    if childType:
+                        nodeTypes[i] = childType
+        if _stats.enabled:
+            _stats.count("typeQueries", 2 if transformIndices else 1)
+            _stats.count("typeQueryNodes", len(nodes) + len(transformIndices))
+
+        suffixCache = {}
+        missing = {}
+        suffixes = []
+        for nodeType in nodeTypes:
+            try:
+                suffixes.append(suffixCache[nodeType])
+                continue
+            except KeyError:
+                pass
+
+            suffix = store.lookup(nodeType, scene)
+            _stats.count("suffixLookups")
+            if suffix is None:
+                missing[nodeType] = 0
+                suffix = default
+            suffixCache[nodeType] = suffix
+            suffixes.append(suffix)
+
+        if missing:
+            for nodeType in nodeTypes:
+                if nodeType in missing:
+                    missing[nodeType] += 1
+            for nodeType, count in sorted(missing.items()):
+                Logger.warning("No suffix recorded for type: {0} ({1} nodes).\nUpdate aliases using suffix alias editor.".format(nodeType, count))
+
+        return suffixes
+
+    @classmethod
+    def getSuffix(cls, obj, aliasesDict, scene=None):
+        scene = cls.getScene(scene)
+        objType = scene.nodeType(obj)
+        _stats.count("typeQueries")
         if objType == "transform":
-            dependNodes = pm.listRelatives(obj, c=1)
+            dependNodes = scene.children(obj)
             if dependNodes:
-                objType = pm.objectType(dependNodes[0])
+                objType = scene.nodeType(dependNodes[0])
+                _stats.count("typeQueries")
 
-        try:
-            suffix = aliasesDict[objType]
-        except KeyError:
+        suffix = cls._aliasStore(aliasesDict).lookup(objType, scene)
+        if suffix is None:
             Logger.warning("No suffix recorded for type: {0}.\nUpdate aliases using suffix alias editor.".format(objType))
             suffix = "OBJ"
 
         return suffix
+
+    @staticmethod
+    def _aliasStore(aliases):
+        if isinstance(aliases, aliasFn.AliasStore):
+            return aliases
+        return aliasFn.AliasStore(aliases)
@@ -0,0 +1,333 @@
+import contextlib
+import fnmatch
+import re
+
+
+class SceneBase(object):
+    """Scene access interface used by the naming logic.
+
+    Nodes are opaque handles of the implementation, names are always short node names.
+    """
+
+    NAME = None
+
+    # Reasons a node can't be renamed, see renameBlockers
+    LOCKED = "locked"
+    REFERENCED = "referenced"
+    READ_ONLY = "readOnly"
+
+    def selection(self):
+        raise NotImplementedError
+
+    def nodeName(self, node):
+        raise NotImplementedError
+
+    def nodeId(self, node):
+        """Hashable identity of the node, stable across renames"""
+        return node
+
+    def nodeKey(self, node):
+        """Serializable identity of the node, valid outside of the current session if possible
+
+        :rtype: str or int
+        """
+        return self.nodeName(node)
+
+    def nodeFromKey(self, key):
+        """Find node by its nodeKey
+
+        :return: Node or None if it doesn't exist or isn't unique
+        """
+        nodes = self.ls(key)
+        return nodes[0] if len(nodes) == 1 else None
+
+    def nodeExists(self, node):
+        """Check node handle still points to a node of the scene"""
+        return True
+
+    def nodeType(self, node):
+        raise NotImplementedError
+
+    def renameBlockers(self, nodes):
+        """Get reasons nodes can't be renamed, implementations should batch the queries
+
+        :return: LOCKED, REFERENCED or READ_ONLY per node, None for nodes that can be renamed
+        :rtype: list[str or None]
+        """
+        return [None] * len(nodes)
+
+    def children(self, node):
+        raise NotImplementedError
+
+    def parent(self, node):
+        """DAG parent of the node, None for world level and non DAG nodes"""
+        raise NotImplementedError
+
+    def parents(self, nodes):
+        """Get parents of many nodes at once
+
+        :rtype: list
+        """
+        return [self.parent(node) for node in nodes]
+
+    def childNames(self, node):
+        """Short names of node children, siblings a child name has to be unique among
+
+        :rtype: list[str]
+        """
+        return [self.nodeName(child) for child in self.children(node)]
+
+    def nodeTypes(self, nodes):
+        """Get types of many nodes at once, implementations should batch the queries
+
+        :rtype: list[str]
+        """
+        return [self.nodeType(node) for node in nodes]
+
+    def firstChildTypes(self, nodes):
+        """Get type of the first child for many nodes at once
+
+        :return: Types in the same order as nodes, None for nodes without children
+        :rtype: list[str or None]
+        """
+        childTypes = []
+        for node in nodes:
+            children = self.children(node)
+            childTypes.append(self.nodeType(children[0]) if children else None)
+        return childTypes
+
+    def typeAncestry(self, nodeType):
+        """Get inherited types of node type, from the root type down to the type itself
+
+        :rtype: list[str]
+        """
+        return [nodeType]
+
+    def exists(self, name):
+        raise NotImplementedError
+
+    def ls(self, patterns=None, nodeType=None):
+        """List nodes matching name patterns and/or node type
+
+        :param patterns: Name or list of names, wildcards are supported
+        :type patterns: str or list, optional
+        :param nodeType: Node type to filter by
+        :type nodeType: str, optional
+        :rtype: list
+        """
+        raise NotImplementedError
+
+    def listNames(self, patterns=None):
+        return [self.nodeName(node) for node in self.ls(patterns)]
+
+    def rename(self, node, name):
+        """Rename node
+
+        :return: Name node ended up with
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    @contextlib.contextmanager
+    def batch(self):
+        yield self
+
+    @contextlib.contextmanager
+    def undoChunk(self):
+        """Group several batches into one undo step.
+
+        Unlike batch() renames are made right away, so nested batches keep reading actual names.
+        """
+        yield self
+
+
+class MemoryScene(SceneBase):
+    """Pure python scene graph for running the naming logic outside of Maya.
+
+    Nodes are integer ids into flat columns, names and types are indexed with dicts so
+    scenes with millions of nodes stay cheap to query.
+    """
+
+    NAME = "memory"
+    _TRAILING_DIGITS = re.compile(r"\d+$")
+
+    def __init__(self):
+        self._names = []
+        self._types = []
+        self._parents = []
+        self._children = {}
+        self._byName = {}
+        self._sharedNames = {}
+        self._byType = {}
+        self._typeParents = {}
+        self._selection = []
+        self._locked = set()
+
+    def __len__(self):
+        return len(self._names)
+
+    def createNode(self, nodeType, name=None, parent=None):
+        """Create node, same as Maya the name is made unique if taken.
+
+        Children only have to be unique among their siblings, everything else is unique globally.
+
+        :param parent: Parent node id for DAG nodes
+        :type parent: int, optional
+        :return: Node id
+        :rtype: int
+        """
+        node = len(self._names)
+        name = self._uniqueName(name or nodeType + "1", parent)
+        self._names.append(name)
+        self._types.append(nodeType)
+        self._parents.append(-1 if parent is None else parent)
+        if parent is not None:
+            self._children.setdefault(parent, []).append(node)
+        self._byType.setdefault(nodeType, set()).add(node)
+        self._addName(name, node)
+        return node
+
+    def registerType(self, nodeType, parentType):
+        """Declare type inheritance, types are unrelated unless registered"""
+        self._typeParents[nodeType] = parentType
+
+    def typeAncestry(self, nodeType):
+        ancestry = [nodeType]
+        while ancestry[-1] in self._typeParents:
+            ancestry.append(self._typeParents[ancestry[-1]])
+        return ancestry[::-1]
+
+    def lockNode(self, node, locked=True):
+        """Lock or unlock node, renaming a locked node fails like in Maya"""
+        if locked:
+            self._locked.add(node)
+        else:
+            self._locked.discard(node)
+
+    def renameBlockers(self, nodes):
+        locked = self._locked
+        return [self.LOCKED if node in locked else None for node in nodes]
+
+    def select(self, nodes):
+        self._selection = list(nodes)
+
+    def selection(self):
+        return list(self._selection)
+
+    def nodeName(self, node):
+        return self._names[node]
+
+    def nodeKey(self, node):
+        return node
+
+    def nodeFromKey(self, key):
+        if isinstance(key, int) and 0 <= key < len(self._names):
+            return key
+        return None
+
+    def nodeType(self, node):
+        return self._types[node]
+
+    def parent(self, node):
+        parent = self._parents[node]
+        return None if parent < 0 else parent
+
+    def children(self, node):
+        return list(self._children.get(node, ()))
+
+    def parents(self, nodes):
+        parents = self._parents
+        return [None if parents[node] < 0 else parents[node] for node in nodes]
+
+    def childNames(self, node):
+        names = self._names
+        return [names[child] for child in self._children.get(node, ())]
+
+    def nodeTypes(self, nodes):
+        types = self._types
+        return [types[node] for node in nodes]
+
+    def firstChildTypes(self, nodes):
+        types = self._types
+        children = self._children
+        return [types[children[node][0]] if children.get(node) else None for node in nodes]
+
+    def exists(self, name):
+        return name in self._byName
+
+    def ls(self, patterns=None, nodeType=None):
+        if patterns is None:
+            nodes = range(len(self._names)) if nodeType is None else sorted(self._byType.get(nodeType, ()))
+            return list(nodes)
+
+        if not isinstance(patterns, (list, tuple)):
+            patterns = [patterns]
+
+        nodes = []
+        for pattern in patterns:
+            if any(char in pattern for char in "*?["):
+                regex = re.compile(fnmatch.translate(pattern))
+                nodes.extend(node for name, node in self._iterNames() if regex.match(name))
+            elif pattern in self._byName:
+                nodes.extend(self._sharedNames.get(pattern, [self._byName[pattern]]))
+
+        if nodeType is not None:
+            nodes = [node for node in nodes if self._types[node] == nodeType]
+        return nodes
+
+    def listNames(self, patterns=None):
+        if patterns is None:
+            return list(self._names)
+        return [self._names[node] for node in self.ls(patterns)]
+
+    def rename(self, node, name):
+        oldName = self._names[node]
+        if name == oldName:
+            return name
+        if node in self._locked:
+            raise RuntimeError("Cannot rename a locked node: {0}".format(oldName))
+
+        self._removeName(oldName, node)
+        name = self._uniqueName(name, self.parent(node))
+        self._names[node] = name
+        self._addName(name, node)
+        return name
+
+    def _iterNames(self):
+        for name, node in self._byName.items():
+            for each in self._sharedNames.get(name, [node]):
+                yield name, each
+
+    def _isTaken(self, name, parent):
+        if parent is None:
+            return name in self._byName
+        if name not in self._byName:
+            return False
+        return any(self._names[child] == name for child in self._children.get(parent, ()))
+
+    def _uniqueName(self, name, parent=None):
+        if not self._isTaken(name, parent):
+            return name
+
+        base = self._TRAILING_DIGITS.sub("", name)
+        index = 1
+        while self._isTaken(base + str(index), parent):
+            index += 1
+        return base + str(index)
+
+    def _addName(self, name, node):
+        if name not in self._byName:
+            self._byName[name] = node
+            return
+        # DAG nodes under different parents can share a name
+        self._sharedNames.setdefault(name, [self._byName[name]]).append(node)
+
+    def _removeName(self, name, node):
+        shared = self._sharedNames.get(name)
+        if shared is None:
+            del self._byName[name]
+            return
+        shared.remove(node)
+        self._byName[name] = shared[0]
+        if len(shared) == 1:
+            del self._sharedNames[name]
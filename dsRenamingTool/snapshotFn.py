@@ -0,0 +1,182 @@
+"""Read only scene snapshots for planning renames away from the main thread.
+
+Maya can only be queried from the main thread. A snapshot collects everything the planner
+needs about a batch there, in a few bulk queries, after which planning runs on plain Python
+data in any thread. Plans made from a snapshot refer to live nodes again and must be checked
+with planFn.dryRun before applying if the scene changed in the meantime.
+"""
+import array
+import fnmatch
+import re
+
+from dsRenamingTool import aliasFn
+from dsRenamingTool import batchFn
+from dsRenamingTool import indexFn
+from dsRenamingTool import renameFn
+from dsRenamingTool import sceneFn
+
+
+class SceneSnapshot(sceneFn.SceneBase):
+    """Names, types and hierarchy of a batch captured at one point in time.
+
+    Nodes are positions in the batch, parents are numbered after them. Scene names are a flat
+    copy of the name index, so the snapshot doesn't change when the scene or index does. Types
+    and parents are kept in array columns, types as ids of interned type names.
+    """
+
+    NAME = "snapshot"
+
+    def __init__(self, source, nodes, names, nodeTypes, childTypes, parents, childNames, ancestry, nameIndex, aliases):
+        """Use capture() to create snapshots
+
+        :param source: Scene backend nodes belong to
+        :param nodes: Live nodes of the batch
+        :param nodeTypes: Type of every node, None where not captured
+        :param childTypes: First child type of every node, None where not captured
+        :param parents: Parent number of every node, None for world level or not captured
+        :param childNames: Child names of every captured parent
+        :param ancestry: Type ancestry of captured types
+        :param nameIndex: Flat copy of scene names
+        :type nameIndex: indexFn.NameIndex
+        :param aliases: Copy of suffix aliases
+        :type aliases: dict
+        """
+        self.source = source
+        self.nodes = batchFn.nodeColumn(nodes)
+        self.nameIndex = nameIndex
+        self.aliases = aliases
+        self._names = names
+        self._typePool = batchFn.InternPool([None])
+        self._typeIds = self._typePool.ids(nodeTypes)
+        self._childTypeIds = self._typePool.ids(childTypes)
+        self._parents = array.array("l", [-1 if parent is None else parent for parent in parents])
+        self._childNames = childNames
+        self._ancestry = ancestry
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @classmethod
+    def capture(cls, scene, nodes, aliasesDict=None, nameIndex=None, autoSuffix=True, scope=indexFn.ScopedNameIndex.GLOBAL):
+        """Collect batch data, must run on the main thread
+
+        :param scene: Scene backend
+        :param nodes: Nodes of the batch
+        :type nodes: list
+        :param aliasesDict: Node type to suffix map or alias store, copied
+        :type aliasesDict: dict or aliasFn.AliasStore, optional
+        :param nameIndex: Index of scene names to copy, scene is scanned if not given
+        :type nameIndex: indexFn.NameIndex, optional
+        :param autoSuffix: Capture node types needed for auto suffixes
+        :type autoSuffix: bool
+        :param scope: Uniqueness scope the batch is planned with, parents are captured for per parent scope
+        :type scope: str
+        :rtype: SceneSnapshot
+        """
+        nodes = list(nodes)
+        names = [scene.nodeName(node) for node in nodes]
+        nodeTypes = [None] * len(nodes)
+        childTypes = [None] * len(nodes)
+        ancestry = {}
+        if autoSuffix and nodes:
+            nodeTypes = scene.nodeTypes(nodes)
+            transformIndices = [i for i, nodeType in enumerate(nodeTypes) if nodeType == "transform"]
+            for i, childType in zip(transformIndices, scene.firstChildTypes([nodes[i] for i in transformIndices])):
+                childTypes[i] = childType
+            for nodeType in set(nodeTypes) | set(childTypes):
+                if nodeType is not None:
+                    ancestry[nodeType] = scene.typeAncestry(nodeType)
+
+        parents = [None] * len(nodes)
+        childNames = []
+        if scope == indexFn.ScopedNameIndex.PARENT and nodes:
+            parentNumbers = {}
+            for i, parent in enumerate(scene.parents(nodes)):
+                if parent is None:
+                    continue
+                parentId = scene.nodeId(parent)
+                if parentId not in parentNumbers:
+                    parentNumbers[parentId] = len(childNames)
+                    childNames.append(scene.childNames(parent))
+                parents[i] = parentNumbers[parentId]
+
+        if nameIndex is None:
+            nameIndex = indexFn.NameIndex.fromScene(scene)
+        else:
+            nameIndex = nameIndex.copy()
+        # Reading a store can query Maya and its lookups are memoized, planning gets a plain copy
+        if isinstance(aliasesDict, aliasFn.AliasStore):
+            aliasesDict = aliasesDict.aliases()
+        aliases = dict(aliasesDict) if aliasesDict is not None else dict(aliasFn.DEFAULT_SUFFIX_ALIASES)
+        return cls(scene, nodes, names, nodeTypes, childTypes, parents, childNames, ancestry, nameIndex, aliases)
+
+    def liveNode(self, node):
+        return self.nodes[node]
+
+    def nodeName(self, node):
+        return self._names[node]
+
+    def nodeId(self, node):
+        return node
+
+    def nodeType(self, node):
+        return self._typePool[self._typeIds[node]]
+
+    def nodeTypes(self, nodes):
+        types = self._typePool.values
+        typeIds = self._typeIds
+        return [types[typeIds[node]] for node in nodes]
+
+    def firstChildTypes(self, nodes):
+        types = self._typePool.values
+        childTypeIds = self._childTypeIds
+        return [types[childTypeIds[node]] for node in nodes]
+
+    def typeAncestry(self, nodeType):
+        return self._ancestry.get(nodeType, [nodeType])
+
+    def parent(self, node):
+        parent = self._parents[node]
+        # Parents are numbered after the batch nodes
+        return None if parent < 0 else len(self.nodes) + parent
+
+    def childNames(self, node):
+        return list(self._childNames[node - len(self.nodes)])
+
+    def children(self, node):
+        raise NotImplementedError("Snapshot only keeps first child types and parent child names")
+
+    def exists(self, name):
+        return self.nameIndex.exists(name)
+
+    def ls(self, patterns=None, nodeType=None):
+        raise NotImplementedError("Snapshot only lists names")
+
+    def listNames(self, patterns=None):
+        names = self.nameIndex.names()
+        if patterns is None:
+            return names
+        if not isinstance(patterns, (list, tuple)):
+            patterns = [patterns]
+        regex = re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+        return [name for name in names if regex.match(name)]
+
+    def rename(self, node, name):
+        raise RuntimeError("Scene snapshot is read only")
+
+
+def planSnapshot(snapshot, newName, **renameOptions):
+    """Plan rename of the snapshot batch, safe to run outside of the main thread.
+
+    Snapshot itself isn't modified, so it can be planned again with other options.
+
+    :param snapshot: Captured batch
+    :type snapshot: SceneSnapshot
+    :param renameOptions: Keyword arguments of RenameUtils.planBatch
+    :return: Plan entries of live nodes
+    :rtype: batchFn.RenameBatch
+    """
+    plan = renameFn.RenameUtils.planBatch(list(range(len(snapshot))), newName, aliasFn.AliasStore(snapshot.aliases),
+                                          nameIndex=snapshot.nameIndex.overlay(), scene=snapshot, **renameOptions)
+    plan.mapNodes(snapshot.liveNode)
+    return plan
@@ -0,0 +1,151 @@
+import contextlib
+import logging
+import time
+from dsRenamingTool.loggingFn import Logger
+
+_clock = getattr(time, "perf_counter", time.time)
+
+
+class _NullTimer(object):
+    """Timer used while stats are disabled, entering it costs a single method call."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class _PhaseTimer(object):
+
+    __slots__ = ("stats", "phase", "start")
+
+    def __init__(self, stats, phase):
+        self.stats = stats
+        self.phase = phase
+        self.start = None
+
+    def __enter__(self):
+        self.start = _clock()
+        return self
+
+    def __exit__(self, *args):
+        self.stats.addTime(self.phase, _clock() - self.start)
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class RenameStats(object):
+    """Per-phase timers and counters of the rename pipeline.
+
+    Disabled by default, timers and counters are no-ops until enable() is called.
+    Hot loops should check enabled once and count in bulk.
+    """
+
+    _instance = None  # type: RenameStats
+
+    def __init__(self):
+        self.enabled = False
+        self.timers = {}
+        self.counters = {}
+
+    @classmethod
+    def instance(cls):
+        """Shared stats used by renameFn
+
+        :rtype: RenameStats
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def enable(self, reset=True):
+        if reset:
+            self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.timers = {}
+        self.counters = {}
+
+    def timer(self, phase):
+        """Context manager adding its duration to phase
+
+        :param phase: Phase name
+        :type phase: str
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _PhaseTimer(self, phase)
+
+    def addTime(self, phase, seconds):
+        record = self.timers.get(phase)
+        if record is None:
+            record = self.timers[phase] = [0.0, 0]
+        record[0] += seconds
+        record[1] += 1
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def asDict(self):
+        """Stats as plain dict
+
+        :return: Timers as {phase: {"seconds", "calls"}} and counters
+        :rtype: dict
+        """
+        return {"timers": dict((phase, {"seconds": round(seconds, 6), "calls": calls}) for phase, (seconds, calls) in self.timers.items()),
+                "counters": dict(self.counters)}
+
+    def report(self):
+        lines = ["Rename stats:"]
+        for phase, (seconds, calls) in sorted(self.timers.items(), key=lambda item: -item[1][0]):
+            lines.append("  {0:<16} {1:>10.3f} ms {2:>8} calls".format(phase, seconds * 1000.0, calls))
+        for name, value in sorted(self.counters.items()):
+            lines.append("  {0:<16} {1:>10}".format(name, value))
+        return "\n".join(lines)
+
+    def log(self, level=logging.INFO):
+        Logger.log(level, self.report())
+
+
+@contextlib.contextmanager
+def profile(path=None, sortBy="cumulative", limit=30):
+    """Profile block with cProfile
+
+    :param path: Dump raw stats to file instead of logging the summary
+    :type path: str, optional
+    :param sortBy: pstats sort key of the logged summary
+    :type sortBy: str
+    :param limit: Number of logged functions
+    :type limit: int
+    """
+    # Profiling modules are only needed when asked for, keep them out of the import time
+    import cProfile
+    import pstats
+    try:
+        from StringIO import StringIO
+    except ImportError:
+        from io import StringIO
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+            Logger.info("Profile written to: {0}".format(path))
+        else:
+            stream = StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats(sortBy).print_stats(limit)
+            Logger.info(stream.getvalue())
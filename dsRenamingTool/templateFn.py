@@ -0,0 +1,236 @@
+"""Naming templates.
+
+Templates are format strings with {field} placeholders, text in square brackets is an optional
+section that is dropped when any of its fields is empty:
+
+    [{prefix}_]{name}{index}[_{suffix}]
+    {side}_{name}_{index:03d}_{suffix}
+    {name}{index:A}_{suffix}
+
+Fields are prefix, name, suffix, side (L, R, C or M token of the current name, C if none) and index.
+Index takes a digit count (d spec, e.g. 03d) or A/a for letter indices, without a spec the
+padding of the rename options is used. A template can contain a single index.
+"""
+import re
+import string
+
+
+DEFAULT_TEMPLATE = "[{prefix}_]{name}{index}[_{suffix}]"
+PRESET_TEMPLATES = (DEFAULT_TEMPLATE,
+                    "{side}_{name}[_{index:03d}][_{suffix}]",
+                    "[{prefix}_]{name}[_{index:A}][_{suffix}]")
+INDEX_FIELD = "index"
+FIELDS = ("prefix", "name", "suffix", "side", INDEX_FIELD)
+LETTER_STYLES = ("A", "a")
+
+try:
+    _STRING_TYPES = (str, unicode)  # noqa: F821
+except NameError:
+    _STRING_TYPES = (str,)
+_SIDE_TOKEN = re.compile(r"^(?:[LRCM])(?=_)|(?<=_)(?:[LRCM])$")
+_formatter = string.Formatter()
+
+
+def sideOf(name, default="C"):
+    """Side token of a name, L_arm -> L, arm_R -> R"""
+    match = _SIDE_TOKEN.search(name)
+    return match.group() if match else default
+
+
+class _Field(object):
+
+    __slots__ = ("name", "spec")
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+
+
+class _Section(object):
+    """Optional part of the template, list of literals and fields"""
+
+    __slots__ = ("tokens", "fields")
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.fields = [token.name for token in tokens if isinstance(token, _Field)]
+
+
+class Template(object):
+    """Template parsed once, bound per batch and split per node.
+
+    Split gives the literal text before and after the index, which is what the name index
+    needs to allocate indices.
+    """
+
+    def __init__(self, text):
+        """
+        :param text: Template text
+        :type text: str
+        :raises ValueError: Invalid template
+        """
+        self.text = text
+        self.tokens = self._parse(text)
+        self.hasIndex = any(self._isIndex(token) for token in self._iterFields(self.tokens))
+
+    def __repr__(self):
+        return "Template({0!r})".format(self.text)
+
+    @classmethod
+    def _parse(cls, text):
+        tokens = []
+        sectionStart = None
+        indexCount = 0
+        position = 0
+        for part in re.split(r"(\[|\])", text):
+            if part == "[":
+                if sectionStart is not None:
+                    raise ValueError("Nested optional section at {0}: {1}".format(position, text))
+                sectionStart = len(tokens)
+            elif part == "]":
+                if sectionStart is None:
+                    raise ValueError("Unmatched ] at {0}: {1}".format(position, text))
+                tokens[sectionStart:] = [_Section(tokens[sectionStart:])]
+                sectionStart = None
+            elif part:
+                for literal, fieldName, spec, conversion in _formatter.parse(part):
+                    if literal:
+                        tokens.append(literal)
+                    if fieldName is None:
+                        continue
+                    if fieldName not in FIELDS:
+                        raise ValueError("Unknown template field: {0}".format(fieldName))
+                    if fieldName == INDEX_FIELD:
+                        indexCount += 1
+                        spec = cls._indexPadding(spec)
+                    tokens.append(_Field(fieldName, spec))
+            position += len(part)
+
+        if sectionStart is not None:
+            raise ValueError("Unclosed optional section: {0}".format(text))
+        if indexCount > 1:
+            raise ValueError("Template can contain a single index: {0}".format(text))
+        return tokens
+
+    @staticmethod
+    def _indexPadding(spec):
+        if not spec:
+            return None
+        if spec in LETTER_STYLES:
+            return spec
+        match = re.match(r"^0?(\d+)d?$", spec)
+        if not match:
+            raise ValueError("Invalid index format: {0}".format(spec))
+        return int(match.group(1))
+
+    @staticmethod
+    def _isIndex(token):
+        return isinstance(token, _Field) and token.name == INDEX_FIELD
+
+    @classmethod
+    def _iterFields(cls, tokens):
+        for token in tokens:
+            if isinstance(token, _Section):
+                for each in token.tokens:
+                    if isinstance(each, _Field):
+                        yield each
+            elif isinstance(token, _Field):
+                yield token
+
+    def bind(self, indexing=True, **fields):
+        """Resolve fields that are the same for the whole batch
+
+        :param indexing: Render the index, sections containing it are dropped otherwise
+        :type indexing: bool
+        :param fields: Batch constant field values
+        :rtype: BoundTemplate
+        """
+        if not indexing:
+            fields[INDEX_FIELD] = ""
+        return BoundTemplate(self._resolve(self.tokens, fields))
+
+    @classmethod
+    def _resolve(cls, tokens, fields):
+        resolved = []
+        for token in tokens:
+            if isinstance(token, _Section):
+                if any(name in fields and not fields[name] for name in token.fields):
+                    continue
+                inner = cls._resolve(token.tokens, fields)
+                if any(not isinstance(each, _STRING_TYPES) for each in inner):
+                    resolved.append(_Section(inner))
+                else:
+                    resolved.extend(inner)
+            elif isinstance(token, _Field) and token.name in fields:
+                resolved.append(str(fields[token.name]))
+            else:
+                resolved.append(token)
+        return cls._mergeLiterals(resolved)
+
+    @staticmethod
+    def _mergeLiterals(tokens):
+        merged = []
+        for token in tokens:
+            if isinstance(token, _STRING_TYPES) and merged and isinstance(merged[-1], _STRING_TYPES):
+                merged[-1] += token
+            else:
+                merged.append(token)
+        return merged
+
+
+class BoundTemplate(object):
+    """Template with batch constant fields resolved, see Template.bind"""
+
+    __slots__ = ("tokens", "hasIndex", "indexPadding")
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        index = next((token for token in Template._iterFields(tokens) if Template._isIndex(token)), None)
+        self.hasIndex = index is not None
+        self.indexPadding = index.spec if index is not None else None
+
+    def split(self, fields):
+        """Render per node fields
+
+        :param fields: Per node field values
+        :type fields: dict
+        :return: Text before and after the index, whole name is in the first one without index
+        :rtype: tuple[str, str]
+        """
+        before = []
+        after = []
+        current = before
+        for token in self.tokens:
+            if isinstance(token, _STRING_TYPES):
+                current.append(token)
+            elif isinstance(token, _Section):
+                if any(name != INDEX_FIELD and not fields.get(name) for name in token.fields):
+                    continue
+                for each in token.tokens:
+                    if isinstance(each, _STRING_TYPES):
+                        current.append(each)
+                    elif each.name == INDEX_FIELD:
+                        current = after
+                    else:
+                        current.append(str(fields[each.name]))
+            elif token.name == INDEX_FIELD:
+                current = after
+            else:
+                current.append(str(fields.get(token.name) or ""))
+        return "".join(before), "".join(after)
+
+
+_cache = {}
+
+
+def compileTemplate(text):
+    """Parse template, parsed templates are cached by text
+
+    :rtype: Template
+    :raises ValueError: Invalid template
+    """
+    try:
+        return _cache[text]
+    except KeyError:
+        template = _cache[text] = Template(text)
+        return template
@@ -0,0 +1,31 @@
+"""Suffix alias lookups."""
+from dsRenamingTool import aliasFn
+from dsRenamingTool import sceneFn
+
+
+def test_lookupFallsBackToAncestors():
+    scene = sceneFn.MemoryScene()
+    scene.registerType("locator", "shape")
+    scene.registerType("rigLocator", "locator")
+    store = aliasFn.AliasStore({"locator": "LOC", "shape": "SHP"})
+
+    assert store.lookup("rigLocator", scene=scene) == "LOC"
+    assert store.lookup("locator", scene=scene) == "LOC"
+    assert store.lookup("mesh", scene=scene, default="OBJ") == "OBJ"
+    # Exact matches only without a scene to read types from
+    assert aliasFn.AliasStore({"locator": "LOC"}).lookup("rigLocator", default="OBJ") == "OBJ"
+
+
+def test_writeInvalidatesLookups():
+    scene = sceneFn.MemoryScene()
+    scene.registerType("rigLocator", "locator")
+    store = aliasFn.AliasStore({"locator": "LOC"})
+    assert store.lookup("rigLocator", scene=scene) == "LOC"
+    version = store.version
+
+    assert not store.setAliases({"locator": "LOC"})
+    assert store.version == version
+    assert store.setAliases({"locator": "LOC", "rigLocator": "RIG"})
+    assert store.version == version + 1
+    assert store.lookup("rigLocator", scene=scene) == "RIG"
+    assert "rigLocator" in store
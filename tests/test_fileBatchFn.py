@@ -0,0 +1,30 @@
+"""Process pool batch over Maya ASCII files."""
+from dsRenamingTool import fileBatchFn
+
+
+class DeadPool(object):
+    """Executor whose workers never start, every submit fails"""
+    created = 0
+
+    def __init__(self, max_workers=None):
+        DeadPool.created += 1
+
+    def submit(self, *args, **kwargs):
+        raise fileBatchFn.BrokenProcessPool("A child process terminated abruptly")
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def test_runBatchGivesUpOnDeadPools(tmpdir, monkeypatch):
+    monkeypatch.setattr(fileBatchFn.futures, "ProcessPoolExecutor", DeadPool)
+    DeadPool.created = 0
+    summaryPath = str(tmpdir.join("summary.jsonl"))
+    jobs = [("a{0}.ma".format(each), "b{0}.ma".format(each)) for each in range(3)]
+
+    counts = fileBatchFn.runBatch(jobs, {"newName": "body"}, summaryPath, workers=1)
+    assert counts == {"processed": 3, "failed": 3, "skipped": 0}
+    records = fileBatchFn.readSummary(summaryPath)
+    assert [record["input"] for record in records] == [job[0] for job in jobs]
+    assert all(record["status"] == fileBatchFn.STATUS_FAILED for record in records)
+    assert DeadPool.created == fileBatchFn.MAX_POOL_RESTARTS + len(jobs) + 1
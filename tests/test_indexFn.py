@@ -0,0 +1,58 @@
+"""Name index allocation and pattern caching."""
+from dsRenamingTool import indexFn
+from dsRenamingTool import renameFn
+from dsRenamingTool import sceneFn
+
+
+def test_overlayDoesNotCachePatternsInParent():
+    scene = sceneFn.MemoryScene()
+    nodes = [scene.createNode("transform", "n{0}".format(each)) for each in range(5)]
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+    for each in range(10):
+        renameFn.RenameUtils.planBatch(nodes, "name{0}".format(each), {}, nameIndex=nameIndex.overlay(), scene=scene)
+    assert len(nameIndex._patterns) == 0
+    assert sorted(nameIndex.names()) == sorted(scene.listNames())
+
+
+def test_overlayStartsFromParentPattern():
+    nameIndex = indexFn.NameIndex(["a00", "a01"])
+    assert nameIndex.nextName("a") == "a02"
+    overlay = nameIndex.overlay()
+    overlay.discard("a00")
+    overlay.add("a02")
+    assert overlay.nextName("a") == "a00"
+    assert nameIndex.nextName("a") == "a02"
+
+
+def test_patternCacheIsBounded():
+    nameIndex = indexFn.NameIndex(["a00"])
+    for each in range(nameIndex.MAX_PATTERNS * 2):
+        nameIndex.nextName("base{0}".format(each))
+    assert len(nameIndex._patterns) == nameIndex.MAX_PATTERNS
+    # Evicted patterns are rebuilt from names
+    nameIndex.add("base000")
+    assert nameIndex.nextName("base0", padding=2) == "base001"
+    assert nameIndex.nextName("a") == "a01"
+
+
+def test_scopedPreviewOverlaysLeaveIndexUntouched():
+    scene = sceneFn.MemoryScene()
+    group = scene.createNode("transform", "grp")
+    nodes = [scene.createNode("transform", "k{0}".format(each), parent=group) for each in range(3)]
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+    scoped = indexFn.ScopedNameIndex(scene, indexFn.ScopedNameIndex.PARENT, nameIndex)
+    # Same as typing a name into the dialog, every keystroke plans on a new overlay
+    for name in ("a", "ar", "arm", "arm_L"):
+        list(renameFn.RenameUtils.iterPlan(nodes, name, {}, nameIndex=scoped.overlay(), scene=scene))
+    assert len(nameIndex._patterns) == 0
+    assert all(len(index._patterns) == 0 for index in scoped._indices.values())
+
+
+def test_allocationPolicies():
+    nameIndex = indexFn.NameIndex(["a00", "a01", "a03", "a07"])
+    assert nameIndex.nextName("a") == "a02"
+    assert nameIndex.nextName("a", policy=nameIndex.APPEND) == "a08"
+    assert nameIndex.nextName("a", current="a05", policy=nameIndex.KEEP_EXISTING) == "a05"
+    assert nameIndex.nextName("a", current="a05") == "a02"
+    assert nameIndex.reserveNames("a", count=4) == ["a02", "a04", "a05", "a06"]
+    assert nameIndex.reserveNames("a", count=2, start=1, policy=nameIndex.APPEND) == ["a08", "a09"]
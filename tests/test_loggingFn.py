@@ -0,0 +1,45 @@
+"""Repeated message filtering of batches."""
+import logging
+
+from dsRenamingTool import loggingFn
+from dsRenamingTool.loggingFn import Logger
+
+
+def makeRecord(message, level=logging.WARNING):
+    return logging.LogRecord("test", level, __file__, 0, message, None, None)
+
+
+def test_dedupFilterOnlyFiltersWhileActive():
+    dedup = loggingFn.DedupFilter(max_repeats=2, rate_limit=0)
+    assert all(dedup.filter(makeRecord("same")) for _ in range(5))
+
+    dedup.active = True
+    assert [dedup.filter(makeRecord("same")) for _ in range(4)] == [True, True, False, False]
+    assert dedup.filter(makeRecord("other"))
+    assert all(dedup.filter(makeRecord("same", logging.ERROR)) for _ in range(3))
+    assert sum(dedup.suppressed.values()) == 2
+
+
+def test_dedupFilterRateLimit():
+    dedup = loggingFn.DedupFilter(max_repeats=100, rate_limit=3)
+    dedup.active = True
+    passed = [dedup.filter(makeRecord("message {0}".format(each))) for each in range(5)]
+    # Window can roll over between records, at least the first ones pass
+    assert passed[:3] == [True] * 3
+    assert dedup.rate_suppressed == passed.count(False)
+
+
+def test_nestedBatchesJoinOuterOne():
+    Logger.set_dedup(max_repeats=2, rate_limit=0)
+    try:
+        Logger.begin_batch()
+        Logger.begin_batch()
+        for _ in range(5):
+            Logger.debug("repeated")
+        assert Logger.end_batch() == 0
+        # Inner batch end keeps filtering and counting
+        Logger.debug("repeated")
+        assert Logger.end_batch() == 4
+        assert Logger.end_batch() == 0
+    finally:
+        Logger.set_dedup()
@@ -0,0 +1,230 @@
+"""Naming logic against the in-memory scene, runs without Maya."""
+import itertools
+import random
+
+import pytest
+
+from dsRenamingTool import batchFn
+from dsRenamingTool import indexFn
+from dsRenamingTool import maFileFn
+from dsRenamingTool import renameFn
+from dsRenamingTool import sceneFn
+from dsRenamingTool import templateFn
+
+RenameUtils = renameFn.RenameUtils
+ALIASES = {"transform": "GRP", "mesh": "PLY"}
+
+
+def buildScene(seed):
+    """Random scene with names colliding with the ones a batch renamed to "a" allocates"""
+    rng = random.Random(seed)
+    scene = sceneFn.MemoryScene()
+    nodes = []
+    for _ in range(rng.randint(1, 20)):
+        name = rng.choice(["a{0:02d}_GRP".format(rng.randint(0, 15)), "b", "a{0:02d}_PLY".format(rng.randint(0, 5)), "a{0}_GRP".format(rng.randint(0, 120))])
+        node = scene.createNode("transform", name)
+        if rng.random() < 0.5:
+            scene.createNode("mesh", "s", parent=node)
+        nodes.append(node)
+    selection = rng.sample(nodes, rng.randint(1, len(nodes)))
+    return scene, selection
+
+
+def indexedNames(nameIndex):
+    return sorted(name for name in nameIndex.names() for _ in range(nameIndex.count(name)))
+
+
+def renameLegacy(scene, selection, newName, **renameOptions):
+    """Temp name pass and genName pass node by node, the way the dialog renamed before planning"""
+    for node in selection:
+        RenameUtils.rename(node, "tempName", ALIASES, prefix="NULL", suffix="NULL", indexPadding=0, scene=scene)
+    for node in selection:
+        RenameUtils.rename(node, newName, ALIASES, scene=scene, **renameOptions)
+    return [scene.nodeName(node) for node in selection]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("template", [None, templateFn.DEFAULT_TEMPLATE])
+def test_planMatchesLegacyLoop(seed, template):
+    scene, selection = buildScene(seed)
+    expected = renameLegacy(scene, selection, "a", autoSuffix=True)
+
+    scene, selection = buildScene(seed)
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+    plan = RenameUtils.planBatch(selection, "a", ALIASES, autoSuffix=True, nameIndex=nameIndex, scene=scene, template=template)
+    RenameUtils.applyPlan(plan, nameIndex=nameIndex, scene=scene)
+    assert [scene.nodeName(node) for node in selection] == expected
+    assert indexedNames(nameIndex) == sorted(scene.listNames())
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_bulkMatchesNodeByNode(seed):
+    scene, selection = buildScene(seed)
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+    expected = [entry.newName for entry in RenameUtils.iterPlan(selection, "a", ALIASES, autoSuffix=True, nameIndex=nameIndex.overlay(), scene=scene)]
+    plan = RenameUtils.planBatch(selection, "a", ALIASES, autoSuffix=True, nameIndex=nameIndex, scene=scene)
+    assert plan.newNames == expected
+
+
+@pytest.mark.parametrize("permutation", list(itertools.permutations(range(4))))
+def test_swapAndCycleOrdering(permutation):
+    scene = sceneFn.MemoryScene()
+    names = ["n{0}".format(each) for each in range(4)]
+    nodes = [scene.createNode("transform", name) for name in names]
+    plan = [batchFn.PlanEntry(node, name, names[target]) for node, name, target in zip(nodes, names, permutation)]
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+
+    RenameUtils.applyPlan(plan, nameIndex=nameIndex, scene=scene)
+    assert [scene.nodeName(node) for node in nodes] == [names[target] for target in permutation]
+    assert indexedNames(nameIndex) == sorted(names)
+
+
+def test_swapNeedsSingleTempStep():
+    plan = batchFn.RenameBatch([0, 1], ["x", "y"])
+    plan.setNewNames(["y", "x"])
+    steps = list(plan.orderSteps())
+    assert sum(1 for step in steps if step < 0) == 1
+    assert sorted(step for step in steps if step >= 0) == [0, 1]
+
+
+def test_rollbackOnLockedNodeMidPlan():
+    scene = sceneFn.MemoryScene()
+    nodes = [scene.createNode("transform", "n{0}".format(each)) for each in range(10)]
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+    before = sorted(scene.listNames())
+    plan = RenameUtils.planBatch(nodes, "geo", ALIASES, autoSuffix=True, nameIndex=nameIndex, scene=scene)
+    # Locked after planning, the precheck can't see it
+    scene.lockNode(nodes[6])
+
+    with pytest.raises(renameFn.RenameError) as raised:
+        RenameUtils.applyPlan(plan, nameIndex=nameIndex, scene=scene)
+    assert raised.value.node == nodes[6]
+    assert raised.value.rolledBack == 6
+    assert sorted(scene.listNames()) == before
+    assert indexedNames(nameIndex) == before
+
+
+def test_lockedNodesAreSkipped():
+    scene = sceneFn.MemoryScene()
+    nodes = [scene.createNode("transform", "n{0}".format(each)) for each in range(5)]
+    scene.lockNode(nodes[2])
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+
+    report = RenameUtils.renameBatch(nodes, "geo", ALIASES, nameIndex=nameIndex, scene=scene, autoSuffix=True)
+    assert not report.failed
+    assert report.renamed == 4
+    assert report.skipped == [(nodes[2], "n2", sceneFn.SceneBase.LOCKED)]
+    assert scene.nodeName(nodes[2]) == "n2"
+    assert indexedNames(nameIndex) == sorted(scene.listNames())
+
+
+def test_parentScope():
+    scene = sceneFn.MemoryScene()
+    groups = [scene.createNode("transform", "grp{0}".format(each)) for each in (1, 2)]
+    children = [scene.createNode("transform", "k{0}".format(each), parent=group) for group in groups for each in range(3)]
+    scene.createNode("transform", "a00_GRP")
+
+    plan = RenameUtils.planBatch(children + groups[:1], "a", ALIASES, suffix="GRP", scene=scene, scope=indexFn.ScopedNameIndex.PARENT)
+    # World level group is unique globally, where children names are mirrored too
+    assert [entry.newName for entry in plan] == ["a00_GRP", "a01_GRP", "a02_GRP", "a00_GRP", "a01_GRP", "a02_GRP", "a03_GRP"]
+    RenameUtils.applyPlan(plan, scene=scene)
+    assert [scene.nodeName(node) for node in children] == ["a00_GRP", "a01_GRP", "a02_GRP"] * 2
+
+
+def test_namespaceScope():
+    scene = sceneFn.MemoryScene()
+    scene.createNode("transform", "a00_GRP")
+    nodes = [scene.createNode("transform", name) for name in ("ns:x", "ns:a00_GRP", "y", "ns:sub:z")]
+
+    plan = RenameUtils.planBatch(nodes, "a", ALIASES, suffix="GRP", scene=scene, scope=indexFn.ScopedNameIndex.NAMESPACE)
+    assert [entry.newName for entry in plan] == ["ns:a00_GRP", "ns:a01_GRP", "a01_GRP", "ns:sub:a00_GRP"]
+
+
+@pytest.mark.parametrize("policy", [indexFn.NameIndex.FILL_GAPS, indexFn.NameIndex.KEEP_EXISTING])
+def test_paddingOverflow(policy):
+    scene = sceneFn.MemoryScene()
+    nodes = [scene.createNode("transform", "n{0}".format(each)) for each in range(103)]
+    scene.createNode("transform", "a101")
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+
+    plan = RenameUtils.planBatch(nodes, "a", ALIASES, indexPadding=1, nameIndex=nameIndex, scene=scene, indexPolicy=policy)
+    expected = ["a{0:02d}".format(each) for each in range(100)] + ["a100", "a102", "a103"]
+    assert plan.newNames == expected
+    # Overflowed names are still read back as indices of the pattern
+    assert nameIndex.nextName("a", padding=2) == "a104"
+
+
+def test_paddingOverflowAppend():
+    scene = sceneFn.MemoryScene()
+    nodes = [scene.createNode("transform", "n{0}".format(each)) for each in range(3)]
+    scene.createNode("transform", "a99")
+    plan = RenameUtils.planBatch(nodes, "a", ALIASES, indexPadding=1, scene=scene, indexPolicy=indexFn.NameIndex.APPEND)
+    assert plan.newNames == ["a100", "a101", "a102"]
+
+
+def test_genNamesPastPadding():
+    names = RenameUtils.genNames("a", "GRP", count=12, padding=1, start=5, nameIndex=indexFn.NameIndex(["a7_GRP"]))
+    assert names == ["a5_GRP", "a6_GRP", "a8_GRP", "a9_GRP"] + ["a{0}_GRP".format(each) for each in range(10, 18)]
+
+
+MA_FILE = """//Maya ASCII 2022 scene
+//Name: asset.ma
+requires maya "2022";
+createNode transform -n "pCube1";
+createNode mesh -n "pCubeShape1" -p "pCube1";
+\tsetAttr -k off ".v";
+createNode transform -n "pSphere1";
+createNode mesh -n "pSphereShape1" -p "pSphere1";
+createNode lambert -n "body_PLY";
+connectAttr "pCubeShape1.iog" ":initialShadingGroup.dsm" -na;
+connectAttr "pSphereShape1.iog" ":initialShadingGroup.dsm" -na;
+select -ne :initialShadingGroup;
+"""
+
+
+def test_maFileRoundTrip(tmpdir):
+    inputPath = str(tmpdir.join("asset.ma"))
+    outputPath = str(tmpdir.join("renamed.ma"))
+    with open(inputPath, "w") as maFile:
+        maFile.write(MA_FILE)
+
+    result = maFileFn.renameFile(inputPath, "body", outputPath=outputPath, aliasesDict=ALIASES, nodeTypes=["mesh"], autoSuffix=True)
+    assert result["renamed"] == 2
+
+    renamed = maFileFn.MaFileScene.fromFile(outputPath)
+    assert sorted(renamed.listNames()) == sorted(["pCube1", "body00_PLY", "pSphere1", "body01_PLY", "body_PLY", "initialShadingGroup"])
+    with open(outputPath, "r") as maFile:
+        text = maFile.read()
+    assert 'connectAttr "body00_PLY.iog" ":initialShadingGroup.dsm" -na;' in text
+    assert 'createNode mesh -n "body01_PLY" -p "pSphere1";' in text
+    assert "pCubeShape1" not in text
+
+    # Renaming back gives the original file
+    backPath = str(tmpdir.join("back.ma"))
+    renameMap = dict((new, old) for old, new in (("pCubeShape1", "body00_PLY"), ("pSphereShape1", "body01_PLY")))
+    maFileFn.rewriteFile(outputPath, backPath, renameMap)
+    with open(backPath, "r") as maFile:
+        assert maFile.read() == MA_FILE
+
+
+def test_maFileRejectsOtherFiles(tmpdir):
+    path = str(tmpdir.join("broken.ma"))
+    with open(path, "w") as maFile:
+        maFile.write("createNode transform -n \"pCube1\";\n")
+    with pytest.raises(ValueError):
+        maFileFn.MaFileScene.fromFile(path)
+
+
+def test_memorySceneUniqueNames():
+    scene = sceneFn.MemoryScene()
+    first = scene.createNode("transform", "a")
+    second = scene.createNode("transform", "a")
+    assert scene.nodeName(second) == "a1"
+    assert scene.rename(first, "a1") == "a2"
+    group = scene.createNode("transform", "g")
+    child = scene.createNode("transform", "a", parent=group)
+    assert scene.nodeName(child) == "a"
+
+    scene.lockNode(first)
+    with pytest.raises(RuntimeError):
+        scene.rename(first, "b")
@@ -0,0 +1,75 @@
+"""Saved rename plans: writing, reading, checking and applying them in chunks."""
+from dsRenamingTool import batchFn
+from dsRenamingTool import indexFn
+from dsRenamingTool import planFn
+from dsRenamingTool import renameFn
+from dsRenamingTool import sceneFn
+
+
+def savePlan(tmpdir, scene, nodes, newNames, fileName="plan.jsonl"):
+    plan = batchFn.RenameBatch(nodes, [scene.nodeName(node) for node in nodes])
+    plan.setNewNames(newNames)
+    path = str(tmpdir.join(fileName))
+    planFn.writePlan(plan, path, scene=scene)
+    return path
+
+
+def test_applyPlanFileReportsCollisionsOfDeferredRenames(tmpdir):
+    scene = sceneFn.MemoryScene()
+    nodes = [scene.createNode("transform", name) for name in ("a", "b", "c", "d")]
+    scene.createNode("transform", "taken")
+    path = savePlan(tmpdir, scene, nodes, ["taken", "d", "x", "b"])
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+
+    assert planFn.dryRun(planFn.iterPlanFile(path, scene=scene), nameIndex=nameIndex, scene=scene)["collisions"] == ["taken"]
+    counts = planFn.applyPlanFile(path, nameIndex=nameIndex, scene=scene, chunkSize=2)
+    assert [scene.nodeName(node) for node in nodes] == ["taken1", "d", "x", "b"]
+    # Temp steps aren't renames, the collided entry isn't either
+    assert counts["renamed"] == 3
+    assert counts["collisions"] == 1
+    assert counts["deferred"] == 2
+    assert sorted(nameIndex.names()) == sorted(scene.listNames())
+
+
+def test_planFileRoundTrip(tmpdir):
+    scene = sceneFn.MemoryScene()
+    nodes = [scene.createNode("transform", name) for name in ("a", "b", "c")]
+    for fileName in ("plan.jsonl", "plan.json"):
+        path = savePlan(tmpdir, scene, nodes, ["x", "a", "c"], fileName)
+        assert planFn.readHeader(path) == {"version": planFn.PLAN_VERSION, "backend": scene.NAME}
+        plan = planFn.readPlan(path, scene=scene)
+        assert list(plan.nodes) == nodes
+        assert plan.oldNames == ["a", "b", "c"]
+        assert plan.newNames == ["x", "a", "c"]
+
+
+def test_dryRunReportsWithoutRenaming(tmpdir):
+    scene = sceneFn.MemoryScene()
+    nodes = [scene.createNode("transform", name) for name in ("a", "b", "c", "d")]
+    scene.createNode("transform", "taken")
+    path = savePlan(tmpdir, scene, nodes, ["b", "a", "c", "taken"])
+    scene.rename(nodes[1], "moved")
+
+    report = planFn.dryRun(planFn.iterPlanFile(path, scene=scene), scene=scene)
+    assert report == {"entries": 4, "unchanged": [["c", "c"]], "missing": [], "stale": [["b", "a"]], "collisions": ["taken"]}
+    assert [scene.nodeName(node) for node in nodes] == ["a", "moved", "c", "d"]
+
+
+def test_applyPlanFileInChunks(tmpdir):
+    scene = sceneFn.MemoryScene()
+    nodes = [scene.createNode("transform", "n{0}".format(each)) for each in range(5)]
+    scene.lockNode(nodes[3])
+    # Cycle spans chunks, n0 can only take n4's name after the last chunk
+    path = savePlan(tmpdir, scene, nodes, ["n4", "n0", "n1", "x", "n2"])
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+    journal = []
+
+    counts = planFn.applyPlanFile(path, nameIndex=nameIndex, scene=scene, chunkSize=2, journal=journal)
+    assert [scene.nodeName(node) for node in nodes] == ["n4", "n0", "n1", "n3", "n2"]
+    assert counts["renamed"] == 4
+    assert counts["skipped"] == 1
+    assert counts["collisions"] == 0
+    assert sorted(nameIndex.names()) == sorted(scene.listNames())
+
+    renameFn.RenameUtils.revertJournal(journal, nameIndex=nameIndex, scene=scene)
+    assert [scene.nodeName(node) for node in nodes] == ["n{0}".format(each) for each in range(5)]
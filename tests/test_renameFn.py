@@ -0,0 +1,121 @@
+"""Rewrite rules and chunked renames."""
+import pytest
+
+from dsRenamingTool import indexFn
+from dsRenamingTool import renameFn
+from dsRenamingTool import sceneFn
+
+RewriteRule = renameFn.RewriteRule
+ALIASES = {"transform": "GRP", "mesh": "PLY"}
+
+
+@pytest.mark.parametrize("rule, name, expected", [
+    (RewriteRule.replace("arm", "leg"), "L_arm_arm", "L_leg_leg"),
+    (RewriteRule.replace("", "x"), "arm", "arm"),
+    (RewriteRule.replace(r"(\w)_(\d+)", r"\2_\1", regex=True), "a_01", "01_a"),
+    (RewriteRule.replace("ARM", "a\\1", ignoreCase=True), "L_arm", "L_a\\1"),
+    (RewriteRule.addPrefix("ns_"), "arm", "ns_arm"),
+    (RewriteRule.addSuffix("_GRP"), "arm", "arm_GRP"),
+    (RewriteRule.removePrefix("L_"), "L_arm", "arm"),
+    (RewriteRule.removePrefix("R_"), "L_arm", "L_arm"),
+    (RewriteRule.removeSuffix("_GRP"), "arm_GRP", "arm"),
+    (RewriteRule.removeSuffix(""), "arm", "arm"),
+])
+def test_rewriteRule(rule, name, expected):
+    assert rule.apply(name) == expected
+
+
+def test_rewriteRulesApplyInOrder():
+    rewriter = renameFn.NameRewriter([RewriteRule.removeSuffix("_GRP"), RewriteRule.addSuffix("_JNT"), RewriteRule.addPrefix("C_")])
+    assert rewriter.rewrite("spine_GRP") == "C_spine_JNT"
+    assert rewriter.rewrite("spine") == "C_spine_JNT"
+
+
+def test_rewriterPlanSwapsAndNumbersCollisions():
+    scene = sceneFn.MemoryScene()
+    nodes = [scene.createNode("transform", name) for name in ("L_arm", "R_arm", "L_leg", "x09", "arm_GRP")]
+    scene.createNode("transform", "R_leg")
+    scene.createNode("transform", "y09")
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+    rewriter = renameFn.NameRewriter([RewriteRule.replace("L_", "TMP_"), RewriteRule.replace("R_", "L_"),
+                                      RewriteRule.replace("TMP_", "R_"), RewriteRule.replace("x", "y")])
+
+    plan = rewriter.planBatch(nodes, nameIndex=nameIndex, scene=scene)
+    # Unchanged names aren't planned, swapped names are free, taken ones are numbered like Maya does
+    assert [(entry.oldName, entry.newName, entry.reason) for entry in plan] == [
+        ("L_arm", "R_arm", renameFn.PlanEntry.REWRITE),
+        ("R_arm", "L_arm", renameFn.PlanEntry.REWRITE),
+        ("L_leg", "R_leg1", renameFn.PlanEntry.COLLISION),
+        ("x09", "y10", renameFn.PlanEntry.COLLISION)]
+    renameFn.RenameUtils.applyPlan(plan, nameIndex=nameIndex, scene=scene)
+    assert [scene.nodeName(node) for node in nodes] == ["R_arm", "L_arm", "R_leg1", "y10", "arm_GRP"]
+    assert sorted(nameIndex.names()) == sorted(scene.listNames())
+
+
+def test_rewriterSkipsEmptyNames():
+    scene = sceneFn.MemoryScene()
+    nodes = [scene.createNode("transform", name) for name in ("arm", "leg")]
+    plan = renameFn.NameRewriter([RewriteRule.replace("arm", "")]).planBatch(nodes, scene=scene)
+    assert len(plan) == 0
+
+
+class FailingScene(sceneFn.MemoryScene):
+    """Rename of failNode raises, without the node being reported as locked"""
+    failNode = None
+
+    def rename(self, node, name):
+        if node == self.failNode:
+            raise RuntimeError("Cannot rename {0}".format(self.nodeName(node)))
+        return super(FailingScene, self).rename(node, name)
+
+
+def buildChunkScene(count=10):
+    scene = FailingScene()
+    nodes = [scene.createNode("transform", "n{0}".format(each)) for each in range(count)]
+    return scene, nodes
+
+
+def test_chunkedRenameRunsAllChunks():
+    scene, nodes = buildChunkScene()
+    scene.lockNode(nodes[4])
+    job = renameFn.ChunkedRename(nodes, "a", ALIASES, chunkSize=3, scene=scene)
+    assert list(job.steps()) == [3, 5, 8, 9]
+    assert job.finished
+    assert job.skipped == [(nodes[4], "n4", sceneFn.SceneBase.LOCKED)]
+    assert [scene.nodeName(node) for node in nodes] == ["a00", "a01", "a02", "a03", "n4", "a04", "a05", "a06", "a07", "a08"]
+
+
+@pytest.mark.parametrize("rollbackOnCancel", [False, True])
+def test_chunkedRenameCancel(rollbackOnCancel):
+    scene, nodes = buildChunkScene()
+    before = [scene.nodeName(node) for node in nodes]
+    job = renameFn.ChunkedRename(nodes, "a", ALIASES, chunkSize=4, rollbackOnCancel=rollbackOnCancel, scene=scene)
+    steps = job.steps()
+    assert next(steps) == 4
+    job.cancel()
+    assert list(steps) == []
+    assert job.finished
+
+    names = [scene.nodeName(node) for node in nodes]
+    if rollbackOnCancel:
+        assert job.renamed == 0
+        assert names == before
+    else:
+        assert job.renamed == 4
+        assert names == ["a00", "a01", "a02", "a03"] + before[4:]
+    assert sorted(job.nameIndex.names()) == sorted(scene.listNames())
+
+
+def test_chunkedRenameFailureRevertsFinishedChunks():
+    scene, nodes = buildChunkScene()
+    before = [scene.nodeName(node) for node in nodes]
+    scene.failNode = nodes[6]
+    job = renameFn.ChunkedRename(nodes, "a", ALIASES, chunkSize=4, scene=scene)
+
+    with pytest.raises(renameFn.RenameError) as raised:
+        job.run()
+    assert raised.value.node == nodes[6]
+    assert job.finished
+    assert job.renamed == 0
+    assert [scene.nodeName(node) for node in nodes] == before
+    assert sorted(job.nameIndex.names()) == sorted(scene.listNames())
@@ -0,0 +1,44 @@
+"""Planning renames from scene snapshots."""
+import pytest
+
+from dsRenamingTool import indexFn
+from dsRenamingTool import renameFn
+from dsRenamingTool import sceneFn
+from dsRenamingTool import snapshotFn
+
+ALIASES = {"transform": "GRP", "mesh": "PLY"}
+
+
+def buildScene():
+    scene = sceneFn.MemoryScene()
+    nodes = [scene.createNode("transform", "n{0}".format(each)) for each in range(4)]
+    scene.createNode("mesh", "s", parent=nodes[1])
+    scene.createNode("transform", "a00_GRP")
+    return scene, nodes
+
+
+def test_planSnapshotMatchesLivePlan():
+    scene, nodes = buildScene()
+    nameIndex = indexFn.NameIndex.fromScene(scene)
+    expected = renameFn.RenameUtils.planBatch(nodes, "a", ALIASES, autoSuffix=True, nameIndex=nameIndex.overlay(), scene=scene)
+
+    snapshot = snapshotFn.SceneSnapshot.capture(scene, nodes, aliasesDict=ALIASES, nameIndex=nameIndex)
+    plan = snapshotFn.planSnapshot(snapshot, "a", autoSuffix=True)
+    assert list(plan.nodes) == nodes
+    assert plan.newNames == expected.newNames == ["a01_GRP", "a00_PLY", "a02_GRP", "a03_GRP"]
+    # Planning leaves the snapshot as captured, it can be planned again
+    assert snapshotFn.planSnapshot(snapshot, "a", autoSuffix=True).newNames == plan.newNames
+
+
+def test_snapshotIgnoresLaterChanges():
+    scene, nodes = buildScene()
+    snapshot = snapshotFn.SceneSnapshot.capture(scene, nodes, aliasesDict=ALIASES)
+    scene.rename(nodes[0], "renamed")
+    scene.createNode("transform", "a01_GRP")
+
+    assert snapshot.nodeName(0) == "n0"
+    assert not snapshot.exists("a01_GRP")
+    assert snapshot.nodeType(1) == "transform"
+    assert snapshotFn.planSnapshot(snapshot, "a", autoSuffix=True).newNames[0] == "a01_GRP"
+    with pytest.raises(RuntimeError):
+        snapshot.rename(0, "x")
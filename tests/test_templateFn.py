@@ -0,0 +1,37 @@
+"""Naming template parsing and splitting."""
+import pytest
+
+from dsRenamingTool import templateFn
+
+
+@pytest.mark.parametrize("text", [
+    "[{prefix}_[{name}]]",
+    "{name}]",
+    "[{prefix}_{name}",
+    "{name}{unknown}",
+    "{name}{index}_{index}",
+    "{name}{index:x}",
+])
+def test_invalidTemplates(text):
+    with pytest.raises(ValueError):
+        templateFn.Template(text)
+
+
+def test_bindDropsEmptySections():
+    template = templateFn.compileTemplate(templateFn.DEFAULT_TEMPLATE)
+    assert template.hasIndex
+    bound = template.bind(prefix="", name="arm")
+    assert bound.split({"suffix": "GRP"}) == ("arm", "_GRP")
+    assert bound.split({"suffix": ""}) == ("arm", "")
+    assert template.bind(prefix="C", name="arm", indexing=False).split({"suffix": "GRP"}) == ("C_arm_GRP", "")
+
+
+def test_indexPadding():
+    assert templateFn.Template("{name}_{index:03d}").bind(name="arm").indexPadding == 3
+    assert templateFn.Template("{name}{index:A}").bind(name="arm").indexPadding == "A"
+    assert templateFn.Template("{name}{index}").bind(name="arm").indexPadding is None
+    assert not templateFn.Template("{side}_{name}").hasIndex
+
+
+def test_sideOf():
+    assert [templateFn.sideOf(name) for name in ("L_arm", "arm_R", "Leg", "M_spine_L")] == ["L", "R", "C", "M"]